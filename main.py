@@ -1,49 +1,132 @@
 import logging
-from pathlib import Path
 from src.preprocessing import DataPreprocessor
 from src.data_ingestion import DataIngestion
 from src.sentiment_analysis import TextAnalyzer
 from src.impact_analysis import ImpactAnalyzer
 from src.visualise import DevelopmentVisualizer
+from src.model_registry import get_registry
+from src.pipeline import PipelineRunner, Stage
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def run_pipeline():
-    """Run the complete analysis pipeline"""
-    try:
-        logger.info("Starting analysis pipeline...")
-        
-        # 1. Preprocess raw data
-        logger.info("Preprocessing data...")
-        preprocessor = DataPreprocessor()
+def build_pipeline(discover_themes: bool = False, relevance: bool = False) -> PipelineRunner:
+    """Build the analysis DAG: preprocess -> ingest -> sentiment -> impact/releases -> visualise
+
+    Args:
+        discover_themes (bool): Also run the 'discovery' stage, which embeds all
+            feedback (downloading the embedding model on first use)
+        relevance (bool): Also run the 'relevance' stage, which scores backlog
+            items against the feedback text with TF-IDF
+    """
+    def preprocess():
+        preprocessor = DataPreprocessor(incremental=True, output_format='parquet', workers=None,
+                                        partition_by='month')
         preprocessor.process_all()
-        
-        # 2. Load processed data
-        logger.info("Loading data...")
-        ingestion = DataIngestion()
+        return preprocessor.output_dir
+
+    def ingest(processed_dir):
+        ingestion = DataIngestion(auto_load=False)
         csat_df, tickets_df, dev_tickets_df = ingestion.get_combined_data()
-        
-        # 3. Run sentiment and theme analysis
-        logger.info("Running text analysis...")
-        analyzer = TextAnalyzer()
-        analysis_results = analyzer.analyze_all(csat_df, tickets_df)
-        
-        # 4. Perform impact analysis
-        logger.info("Analyzing impact...")
-        impact_analyzer = ImpactAnalyzer()
-        impact_metrics = impact_analyzer.analyze_impact(dev_tickets_df['target_release_date'].min())
-        
-        # 5. Generate visualizations
-        logger.info("Creating visualizations...")
-        visualizer = DevelopmentVisualizer()
-        visualizer.create_visualizations()
-        
+        return {'csat_df': csat_df, 'tickets_df': tickets_df, 'dev_tickets_df': dev_tickets_df}
+
+    def sentiment(csat_df, tickets_df):
+        get_registry().warm_up("sentiment-analysis")
+        text_analyzer = TextAnalyzer()
+        # Later stages reuse this analyzer (model, cache and taxonomy) rather than building their own
+        return {'analysis_results': text_analyzer.analyze_all(csat_df, tickets_df), 'text_analyzer': text_analyzer}
+
+    def impact(tickets_df, dev_tickets_df, analysis_results, text_analyzer):
+        impact_analyzer = ImpactAnalyzer(text_analyzer=text_analyzer)
+        return impact_analyzer.analyze_impact(
+            dev_tickets_df['target_release_date'].min(),
+            tickets_df=tickets_df,
+            dev_tickets_df=dev_tickets_df,
+            sentiment_results=analysis_results
+        )
+
+    def releases(csat_df, tickets_df, dev_tickets_df, analysis_results, text_analyzer):
+        release_impact = ImpactAnalyzer(text_analyzer=text_analyzer).analyze_releases(
+            csat_df, tickets_df, dev_tickets_df, analysis_results, before_days=30, after_days=30,
+            bootstrap=1000, seed=0
+        )
+        significant = (release_impact.summary['q_value'] < 0.05).sum()
+        logger.info(f"{significant} of {len(release_impact.summary)} releases changed sentiment significantly")
+        return release_impact
+
+    def discovery(csat_df, tickets_df, dev_tickets_df, analysis_results, text_analyzer):
+        result = ImpactAnalyzer(text_analyzer=text_analyzer).discover_themes(
+            csat_df, tickets_df, dev_tickets_df, analysis_results, n_matches=3
+        )
+        if 'emerging' in result.clusters.columns:
+            emerging = result.clusters[result.clusters['emerging']]
+            logger.info(f"{len(emerging)} of {len(result.clusters)} feedback clusters fall outside the keyword themes")
+        return result
+
+    def score_relevance(csat_df, tickets_df, dev_tickets_df, analysis_results, text_analyzer):
+        relevance_df = ImpactAnalyzer(text_analyzer=text_analyzer).analyze_relevance(
+            csat_df, tickets_df, dev_tickets_df, analysis_results
+        )
+        matched = relevance_df[relevance_df['matching_feedback'] > 0]
+        logger.info(
+            f"{len(matched)} of {len(relevance_df)} backlog items match feedback text; most relevant: "
+            f"{', '.join(matched['ticket_id'].head(5).astype(str))}"
+        )
+        return relevance_df
+
+    def visualise(impact_df):
+        DevelopmentVisualizer().create_visualizations(impact_df)
+
+    stages = [
+        Stage('preprocess', preprocess, outputs=('processed_dir',)),
+        Stage('ingest', ingest, inputs=('processed_dir',),
+              outputs=('csat_df', 'tickets_df', 'dev_tickets_df')),
+        Stage('sentiment', sentiment, inputs=('csat_df', 'tickets_df'),
+              outputs=('analysis_results', 'text_analyzer')),
+        Stage('impact', impact, inputs=('tickets_df', 'dev_tickets_df', 'analysis_results', 'text_analyzer'),
+              outputs=('impact_df',)),
+        Stage('releases', releases,
+              inputs=('csat_df', 'tickets_df', 'dev_tickets_df', 'analysis_results', 'text_analyzer'),
+              outputs=('release_impact',)),
+        Stage('visualise', visualise, inputs=('impact_df',)),
+    ]
+    if discover_themes:
+        stages.append(Stage('discovery', discovery,
+                            inputs=('csat_df', 'tickets_df', 'dev_tickets_df', 'analysis_results', 'text_analyzer'),
+                            outputs=('theme_discovery',)))
+    if relevance:
+        stages.append(Stage('relevance', score_relevance,
+                            inputs=('csat_df', 'tickets_df', 'dev_tickets_df', 'analysis_results', 'text_analyzer'),
+                            outputs=('relevance_df',)))
+    return PipelineRunner(stages)
+
+def run_pipeline(discover_themes: bool = False, relevance: bool = False):
+    """Run the complete analysis pipeline
+
+    Each stage runs once and hands its results to the next in memory, so data
+    is loaded and analysed a single time per run.
+    """
+    registry = get_registry()
+    try:
+        logger.info("Starting analysis pipeline...")
+        results = build_pipeline(discover_themes, relevance).run()
         logger.info("Pipeline completed successfully!")
+        return results
         
     except Exception as e:
         logger.error(f"Pipeline failed: {str(e)}")
         raise
+    finally:
+        registry.log_stats()
+        registry.release()
 
 if __name__ == "__main__":
-    run_pipeline() 
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline")
+    parser.add_argument('--discover-themes', action='store_true',
+                        help="also cluster feedback embeddings to find new themes")
+    parser.add_argument('--relevance', action='store_true',
+                        help="also score backlog items against the feedback text with TF-IDF")
+    args = parser.parse_args()
+    run_pipeline(discover_themes=args.discover_themes, relevance=args.relevance) 
\ No newline at end of file
@@ -7,11 +7,17 @@ setup(
     install_requires=[
         'pandas',
         'numpy',
+        'pyarrow',  # Parquet storage for processed data
         'scikit-learn',
+        'scipy',
         'transformers',
         'plotly',
         'matplotlib',
         'torch',
         'seaborn',  # Also commonly used with matplotlib
     ],
+    extras_require={
+        'yaml': ['pyyaml'],  # YAML theme taxonomies
+        'onnx': ['optimum[onnxruntime]'],  # ONNX Runtime sentiment backend
+    },
 ) 
\ No newline at end of file
@@ -0,0 +1,86 @@
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Batched inference for transformers text-classification pipelines.
+#
+# Usage:
+#   from src.batch_inference import BatchInferenceEngine
+#
+#   engine = BatchInferenceEngine(pipeline("sentiment-analysis"), batch_size=64)
+#   results = engine.run(texts)   # one result (or None) per input text, in input order
+#   engine.stats                  # {'texts': ..., 'seconds': ..., 'texts_per_second': ...}
+#
+# Texts are sorted by token length and cut into batches, so each batch holds
+# texts of similar length and padding stays small. Truncation is done by the
+# tokenizer at `max_length` tokens rather than by slicing characters.
+
+
+class BatchInferenceEngine:
+    def __init__(self, pipe, batch_size: int = 32, max_length: int = 512):
+        """Initialize the engine around an already loaded pipeline
+
+        Args:
+            pipe: transformers pipeline (or any callable taking a list of texts)
+            batch_size (int): Number of texts per forward pass
+            max_length (int): Maximum number of tokens per text
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        self.pipe = pipe
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.stats = {'texts': 0, 'seconds': 0.0, 'texts_per_second': 0.0}
+
+    def run(self, texts: Sequence[str]) -> List[Optional[Dict]]:
+        """Score texts in length-bucketed batches
+
+        Returns:
+            list: One pipeline result per input text in the original order.
+                  Entries for empty or non-string texts are None.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if not valid:
+            return results
+
+        start = time.perf_counter()
+
+        # Group texts of similar token length together to minimise padding
+        lengths = self.token_lengths([texts[i] for i in valid])
+        for batch_idx in self.plan_batches(valid, lengths, self.batch_size):
+            outputs = self.score_batch([texts[i] for i in batch_idx])
+            for i, output in zip(batch_idx, outputs):
+                results[i] = output
+
+        self._record(len(valid), time.perf_counter() - start)
+        return results
+
+    @staticmethod
+    def plan_batches(positions: List[int], lengths: List[int], batch_size: int) -> List[List[int]]:
+        """Cut positions, ordered by token length, into batches of batch_size"""
+        order = [positions[j] for j in sorted(range(len(positions)), key=lengths.__getitem__)]
+        return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+    def score_batch(self, texts: List[str]) -> List[Dict]:
+        """One forward pass over texts, truncated to max_length tokens"""
+        return self.pipe(texts, batch_size=len(texts), truncation=True, max_length=self.max_length)
+
+    def _record(self, count: int, elapsed: float):
+        throughput = count / elapsed if elapsed > 0 else float('inf')
+        self.stats = {'texts': count, 'seconds': elapsed, 'texts_per_second': throughput}
+        logger.info(
+            f"Scored {count} texts in {elapsed:.2f}s "
+            f"({throughput:.1f} texts/sec, batch size {self.batch_size})"
+        )
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count of each text after truncation, falling back to characters"""
+        tokenizer = getattr(self.pipe, 'tokenizer', None)
+        if tokenizer is None:
+            return [min(len(text), self.max_length) for text in texts]
+        encoded = tokenizer(texts, truncation=True, max_length=self.max_length)
+        return [len(ids) for ids in encoded['input_ids']]
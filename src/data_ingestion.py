@@ -1,8 +1,9 @@
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import logging
-from typing import Optional
+from typing import Iterator, List, Optional
+from src.partitions import read_range, select_files
+from src.schema import CSAT_SCHEMA, DEV_SCHEMA, TICKET_SCHEMA, compact_frame, csv_read_options, log_memory
 
 # Data ingestion module for loading and processing customer satisfaction (CSAT) surveys
 # and support ticket data.
@@ -23,9 +24,23 @@ from typing import Optional
 #   csat_df = ingestion.load_csat_data()
 #   tickets_df = ingestion.load_support_tickets()
 #
+#   # Only read some columns (memory-mapped when the file is Parquet)
+#   scores_df = ingestion.load_csat_data(columns=['survey_date', 'satisfaction_score'])
+#
+#   # Stream files larger than memory as typed chunks
+#   for chunk in ingestion.iter_csat_chunks(chunksize=100_000):
+#       ...
+#
+#   # Only feedback in [start, end); with month/quarter partitioned Parquet
+#   # (DataPreprocessor(partition_by='month')) only the overlapping partitions are read
+#   before_df = ingestion.load_csat_data(start='2024-02-01', end='2024-03-01')
+#   after_df = ingestion.load_support_tickets(start='2024-03-01', end='2024-04-01')
+#
 # Input file requirements:
 #   - CSAT CSV file should contain: satisfaction_score, survey_date
 #   - Support tickets file format TBD
+#   - Processed files may be CSV or Parquet; Parquet is preferred when both
+#     exist because it keeps the column types written by DataPreprocessor
 #
 
 # Set up logging
@@ -52,14 +67,12 @@ class DataIngestion:
         
         # If no paths provided, look for files in data/output
         if not csat_path:
-            csat_files = list(output_dir.glob('*csat*.csv'))
-            self.csat_path = csat_files[0] if csat_files else None
+            self.csat_path = self._find_processed_file(output_dir, '*csat*')
         else:
             self.csat_path = Path(csat_path)
             
         if not tickets_path:
-            ticket_files = list(output_dir.glob('*ticket*.csv'))
-            self.tickets_path = ticket_files[0] if ticket_files else None
+            self.tickets_path = self._find_processed_file(output_dir, '*ticket*')
         else:
             self.tickets_path = Path(tickets_path)
             
@@ -89,26 +102,141 @@ class DataIngestion:
             self.load_dev_tickets()
         )
     
-    def load_csat_data(self) -> Optional[pd.DataFrame]:
-        """Load CSAT survey data"""
+    @staticmethod
+    def _find_processed_file(directory: Path, pattern: str) -> Optional[Path]:
+        """First Parquet file matching pattern, else the first CSV file"""
+        for suffix in ('.parquet', '.csv'):
+            files = list(directory.glob(pattern + suffix))
+            if files:
+                return files[0]
+        return None
+    
+    @staticmethod
+    def _csv_options(path: Path, schema: Optional[dict], columns: Optional[List[str]] = None) -> dict:
+        """read_csv options typing the schema columns found in the file's header"""
+        header = pd.read_csv(path, nrows=0).columns
+        return csv_read_options(schema or {}, columns, header)
+    
+    @staticmethod
+    def _read_table(path: Path, columns: Optional[List[str]] = None,
+                    schema: Optional[dict] = None, date_column: Optional[str] = None,
+                    start=None, end=None) -> pd.DataFrame:
+        """Read a processed CSV or Parquet file into compact types
+
+        Parquet files (or directories of part files) are memory-mapped and keep
+        their stored types; only columns without their schema type are
+        converted. CSV files are parsed straight into the schema's types.
+        Columns outside the schema are downcast or made categorical, and the
+        memory before and after that step is logged.
+        Only rows with date_column in [start, end) are kept; date-partitioned
+        Parquet datasets skip the partitions outside that range unread.
+        """
+        if path.suffix == '.parquet':
+            df = read_range(path, date_column, start, end, columns, schema)
+        else:
+            read_columns = columns
+            if columns is not None and date_column and date_column not in columns:
+                read_columns = list(columns) + [date_column]
+            df = pd.read_csv(path, **DataIngestion._csv_options(path, schema, read_columns))
+            if date_column and (start is not None or end is not None):
+                df = df[DataIngestion._in_range(df[date_column], start, end)].reset_index(drop=True)
+            if read_columns is not columns:
+                df = df.drop(columns=date_column)
+        compacted = compact_frame(df, schema)
+        log_memory(path.name, compacted, df)
+        return compacted
+    
+    @staticmethod
+    def _in_range(dates: pd.Series, start=None, end=None) -> pd.Series:
+        """Mask of dates in [start, end)"""
+        dates = pd.to_datetime(dates, errors='coerce')
+        mask = pd.Series(True, index=dates.index)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates < pd.Timestamp(end)
+        return mask
+    
+    def load_csat_data(self, columns: Optional[List[str]] = None,
+                       start=None, end=None) -> Optional[pd.DataFrame]:
+        """Load CSAT survey data
+
+        Args:
+            columns (list, optional): Only load these columns
+            start, end (optional): Only load surveys with survey_date in [start, end)
+        """
         if not self.csat_path or not self.csat_path.exists():
             logger.warning("No CSAT data file found")
             return None
             
         logger.info(f"Loading CSAT data from {self.csat_path}")
-        self.csat_data = pd.read_csv(self.csat_path)
+        self.csat_data = self._read_table(self.csat_path, columns, CSAT_SCHEMA, 'survey_date', start, end)
         return self.csat_data
     
-    def load_support_tickets(self) -> Optional[pd.DataFrame]:
-        """Load support ticket data"""
+    def load_support_tickets(self, columns: Optional[List[str]] = None,
+                             start=None, end=None) -> Optional[pd.DataFrame]:
+        """Load support ticket data
+
+        Args:
+            columns (list, optional): Only load these columns
+            start, end (optional): Only load tickets with created_date in [start, end)
+        """
         if not self.tickets_path or not self.tickets_path.exists():
             logger.warning("No support tickets file found")
             return None
             
         logger.info(f"Loading support tickets from {self.tickets_path}")
-        self.tickets_data = pd.read_csv(self.tickets_path)
+        self.tickets_data = self._read_table(self.tickets_path, columns, TICKET_SCHEMA, 'created_date', start, end)
         return self.tickets_data
     
+    def iter_csat_chunks(self, chunksize: int = 100_000,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Stream CSAT survey data as typed chunks of at most chunksize rows"""
+        if not self.csat_path or not self.csat_path.exists():
+            logger.warning("No CSAT data file found")
+            return iter(())
+        logger.info(f"Streaming CSAT data from {self.csat_path} in chunks of {chunksize}")
+        return self._iter_table(self.csat_path, chunksize, columns, CSAT_SCHEMA)
+    
+    def iter_support_ticket_chunks(self, chunksize: int = 100_000,
+                                   columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Stream support ticket data as typed chunks of at most chunksize rows"""
+        if not self.tickets_path or not self.tickets_path.exists():
+            logger.warning("No support tickets file found")
+            return iter(())
+        logger.info(f"Streaming support tickets from {self.tickets_path} in chunks of {chunksize}")
+        return self._iter_table(self.tickets_path, chunksize, columns, TICKET_SCHEMA)
+    
+    @staticmethod
+    def _iter_table(path: Path, chunksize: int, columns: Optional[List[str]] = None,
+                    schema: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        """Yield a processed CSV or Parquet file chunk by chunk
+
+        Chunks carry a running row index across the whole file, so per-chunk
+        results can be told apart and joined back. Both formats are typed with
+        compact_frame, as _read_table does.
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be positive, got {chunksize}")
+        
+        if path.suffix == '.parquet':
+            import pyarrow.parquet as pq
+            
+            # A directory is a dataset of part files (streamed or date-partitioned)
+            files = select_files(path)
+            offset = 0
+            for file in files:
+                parquet_file = pq.ParquetFile(file, memory_map=True)
+                for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+                    chunk = batch.to_pandas()
+                    chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                    offset += len(chunk)
+                    yield compact_frame(chunk, schema)
+            return
+        
+        for chunk in pd.read_csv(path, chunksize=chunksize, **DataIngestion._csv_options(path, schema, columns)):
+            yield compact_frame(chunk, schema)
+    
     def load_dev_tickets(self) -> Optional[pd.DataFrame]:
         """Load development backlog tickets
         
@@ -126,7 +254,7 @@ class DataIngestion:
             return None
             
         logger.info(f"Loading development tickets from {self.dev_tickets_path}")
-        self.dev_tickets_data = pd.read_csv(self.dev_tickets_path)
+        self.dev_tickets_data = self._read_table(self.dev_tickets_path, schema=DEV_SCHEMA)
         
         # Validate required columns
         required_cols = [
@@ -138,12 +266,6 @@ class DataIngestion:
         if missing_cols:
             logger.warning(f"Development tickets missing columns: {missing_cols}")
         
-        # Convert dates to datetime
-        date_columns = ['created_date', 'target_release_date']
-        for col in date_columns:
-            if col in self.dev_tickets_data.columns:
-                self.dev_tickets_data[col] = pd.to_datetime(self.dev_tickets_data[col])
-        
         return self.dev_tickets_data
 
     def get_combined_data(self) -> tuple:
@@ -0,0 +1,114 @@
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Hash-based de-duplication across files, chunks and runs.
+#
+# Usage:
+#   from src.dedup import HashDeduplicator
+#
+#   dedup = HashDeduplicator('data/output/dedup/tickets.npz', key_columns=['ticket_id'])
+#   for chunk in chunks:
+#       unique = dedup.filter(chunk)      # rows/keys never seen before (first one wins)
+#       ...append unique to the output...
+#   dedup.save()
+#
+# Every row is reduced to a 64-bit hash of all its values, and optionally a
+# second hash of its key columns. Only these hashes are kept, as sorted
+# uint64 arrays saved to disk, so memory is 8-16 bytes per distinct row
+# however wide the data is. Without a path the index lives for one pass only.
+
+
+class _SortedHashSet:
+    """Set of uint64 hashes kept as a few sorted runs, merged when there are too many"""
+
+    def __init__(self, values: Optional[np.ndarray] = None, max_runs: int = 8):
+        self.runs: List[np.ndarray] = [np.unique(values.astype(np.uint64))] if values is not None and len(values) else []
+        self.max_runs = max_runs
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(values), dtype=bool)
+        for run in self.runs:
+            positions = np.searchsorted(run, values)
+            positions[positions == len(run)] = 0
+            found |= run[positions] == values
+        return found
+
+    def add(self, values: np.ndarray):
+        """Add hashes that are known not to be present yet"""
+        if len(values):
+            self.runs.append(np.sort(values.astype(np.uint64)))
+        if len(self.runs) > self.max_runs:
+            self.runs = [np.sort(np.concatenate(self.runs))]
+
+    def to_array(self) -> np.ndarray:
+        return np.sort(np.concatenate(self.runs)) if self.runs else np.empty(0, dtype=np.uint64)
+
+
+class HashDeduplicator:
+    def __init__(self, path=None, key_columns: Optional[List[str]] = None):
+        """Open (or start) a hash index
+
+        Args:
+            path (str, optional): .npz file persisting the index across runs;
+                None keeps it in memory only
+            key_columns (list, optional): Columns identifying a record (e.g.
+                ticket_id); later rows with an already seen key are dropped
+        """
+        self.path = Path(path) if path else None
+        self.key_columns = list(key_columns or [])
+        self.dropped = 0
+
+        rows, keys = None, None
+        if self.path is not None and self.path.exists():
+            with np.load(self.path) as stored:
+                rows, keys = stored['rows'], stored['keys']
+            logger.info(f"Loaded {len(rows)} row hashes and {len(keys)} key hashes from {self.path}")
+        self._rows = _SortedHashSet(rows)
+        self._keys = _SortedHashSet(keys)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the rows of df whose row hash and key hash were not seen before
+
+        Within df the first occurrence wins, matching drop_duplicates(keep='first').
+        """
+        if df is None or df.empty:
+            return df
+
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(np.uint64)
+        keep = ~self._rows.contains(row_hashes) & ~pd.Series(row_hashes).duplicated().to_numpy()
+
+        key_columns = [col for col in self.key_columns if col in df.columns]
+        if key_columns:
+            key_hashes = pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy(np.uint64)
+            keep &= ~self._keys.contains(key_hashes)
+
+            # Among the remaining rows, the first occurrence of each key wins
+            kept = np.flatnonzero(keep)
+            keep[kept[pd.Series(key_hashes[kept]).duplicated().to_numpy()]] = False
+            self._keys.add(key_hashes[keep])
+
+        self._rows.add(row_hashes[keep])
+        self.dropped += int(len(df) - keep.sum())
+        return df[keep]
+
+    def save(self):
+        """Persist the index (no-op for in-memory indexes)"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, rows=self._rows.to_array(), keys=self._keys.to_array())
+        tmp_path.replace(self.path)
@@ -1,11 +1,16 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
-from typing import Dict, List, NamedTuple
+from typing import Dict, List, NamedTuple, Optional
+import copy
 import logging
 from pathlib import Path
 from src.data_ingestion import DataIngestion
+from src.incremental_ranking import IncrementalRanker
+from src.relevance import DEFAULT_INDEX_PATH, RelevanceIndex
+from src.release_impact import ReleaseImpact, ReleaseImpactEngine
 from src.sentiment_analysis import TextAnalyzer
+from src.theme_discovery import ThemeDiscovery, ThemeDiscoveryResult
+from src.scoring import BacklogScorer, ScoringWeights
+from src.theme_stats import ThemeStatistics
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
@@ -21,18 +26,52 @@ class ImpactMetrics(NamedTuple):
     p_value: float  # Statistical significance of sentiment change
 
 class ImpactAnalyzer:
-    def __init__(self):
-        self.data_ingestion = DataIngestion()
-        self.text_analyzer = TextAnalyzer()
+    def __init__(self, data_ingestion: Optional[DataIngestion] = None,
+                 text_analyzer: Optional[TextAnalyzer] = None,
+                 weights: Optional[ScoringWeights] = None):
+        """Initialize the analyzer
+
+        Data ingestion and the text analyzer are only created when needed, so
+        callers that pass precomputed data never load files or models here.
+
+        Args:
+            weights (ScoringWeights, optional): Composite score weights; defaults
+                to priority 40%, story points 30%, theme relevance 30%
+        """
+        self.weights = weights or ScoringWeights()
+        self._data_ingestion = data_ingestion
+        self._text_analyzer = text_analyzer
+
+    @property
+    def data_ingestion(self) -> DataIngestion:
+        if self._data_ingestion is None:
+            self._data_ingestion = DataIngestion()
+        return self._data_ingestion
+
+    @property
+    def text_analyzer(self) -> TextAnalyzer:
+        if self._text_analyzer is None:
+            self._text_analyzer = TextAnalyzer()
+        return self._text_analyzer
         
-    def analyze_impact(self, cutoff_date):
-        """Analyze the impact of development items"""
+    def analyze_impact(self, cutoff_date, tickets_df: Optional[pd.DataFrame] = None,
+                       dev_tickets_df: Optional[pd.DataFrame] = None,
+                       sentiment_results: Optional[Dict] = None):
+        """Analyze the impact of development items
+
+        Any of tickets_df, dev_tickets_df and sentiment_results that are passed
+        in are used as-is instead of being loaded or recomputed.
+        """
         try:
             # Get the data
-            csat_df, tickets_df, dev_tickets_df = self.data_ingestion.get_combined_data()
-            
-            # Get sentiment and themes
-            sentiment_results = self.text_analyzer.analyze_all(csat_df, tickets_df)
+            if tickets_df is None or dev_tickets_df is None or sentiment_results is None:
+                csat_df, loaded_tickets_df, loaded_dev_tickets_df = self.data_ingestion.get_combined_data()
+                tickets_df = loaded_tickets_df if tickets_df is None else tickets_df
+                dev_tickets_df = loaded_dev_tickets_df if dev_tickets_df is None else dev_tickets_df
+                
+                # Get sentiment and themes
+                if sentiment_results is None:
+                    sentiment_results = self.text_analyzer.analyze_all(csat_df, tickets_df)
             
             # Calculate impact metrics
             impact_metrics = self._calculate_impact(
@@ -47,39 +86,58 @@ class ImpactAnalyzer:
             logger.error(f"Error in impact analysis: {str(e)}")
             raise
     
-    def _calculate_theme_frequency(self, tickets_df: pd.DataFrame, sentiment_results: Dict) -> Dict[str, float]:
-        """Calculate normalized frequency and sentiment impact of each theme"""
-        theme_stats = {}
-        themes = sentiment_results.get('themes', {})
-        
-        for theme, theme_data in themes.items():
-            # Calculate theme frequency
-            frequency = len(theme_data['occurrences']) / len(tickets_df)
-            
-            # Calculate average sentiment for this theme
-            theme_sentiment = np.mean(theme_data['sentiments'])
-            
-            # Themes with negative sentiment get higher weight
-            sentiment_weight = 2.0 if theme_sentiment < 0 else 1.0
-            
-            theme_stats[theme] = frequency * sentiment_weight
-            
-        return theme_stats
+    def _resolve_inputs(self, csat_df: Optional[pd.DataFrame], tickets_df: Optional[pd.DataFrame],
+                        dev_tickets_df: Optional[pd.DataFrame], sentiment_results: Optional[Dict]):
+        """Load whichever frames were not passed in, then analyse them if sentiment_results is missing
+
+        Returns:
+            tuple: (csat_df, tickets_df, dev_tickets_df, sentiment_results)
+        """
+        if csat_df is None or tickets_df is None or dev_tickets_df is None:
+            loaded = self.data_ingestion.get_combined_data()
+            csat_df, tickets_df, dev_tickets_df = (
+                given if given is not None else frame
+                for given, frame in zip((csat_df, tickets_df, dev_tickets_df), loaded)
+            )
+        if sentiment_results is None:
+            sentiment_results = self.text_analyzer.analyze_all(csat_df, tickets_df)
+        return csat_df, tickets_df, dev_tickets_df, sentiment_results
     
-    def _calculate_theme_score(self, dev_item: pd.Series, theme_stats: Dict[str, float]) -> float:
-        """Calculate theme relevance score for a development item"""
-        # Extract themes from development item title and description
-        item_text = f"{dev_item['title']} {dev_item.get('description', '')}"
-        item_themes = self.text_analyzer.extract_themes(item_text)
+    def _theme_statistics(self, sentiment_results: Dict) -> Optional[ThemeStatistics]:
+        """Theme statistics of the analysed feedback, or None without theme results"""
+        theme_stats = sentiment_results.get('theme_stats')
         
-        # Sum the importance scores of matching themes
-        theme_score = sum(theme_stats.get(theme, 0) for theme in item_themes)
-        
-        # Normalize to 0-1 range
-        max_possible_score = max(theme_stats.values()) if theme_stats else 1
-        normalized_score = theme_score / max_possible_score if max_possible_score > 0 else 0
+        # Older results without the index: build it from the ticket memberships
+        if theme_stats is None:
+            memberships = sentiment_results.get('ticket_themes')
+            if memberships is None:
+                return None
+            sentiment = sentiment_results.get('ticket_sentiment')
+            theme_stats = ThemeStatistics(memberships.columns).add(
+                memberships,
+                sentiment['sentiment_score'] if sentiment is not None else None
+            )
+        return theme_stats
+
+    def _calculate_theme_frequency(self, tickets_df: pd.DataFrame, sentiment_results: Dict) -> Dict[str, float]:
+        """Calculate normalized frequency and sentiment impact of each theme"""
+        theme_stats = self._theme_statistics(sentiment_results)
+        if theme_stats is None:
+            return {}
         
-        return normalized_score
+        # Themes with negative sentiment get double weight
+        return theme_stats.weights()
+
+    def build_ranker(self, dev_tickets_df: pd.DataFrame, sentiment_results: Dict) -> IncrementalRanker:
+        """Ranking of the backlog that can be updated as feedback and items change
+
+        Starts from the same ranking as analyze_impact. The ranker works on a copy
+        of the theme statistics, so sentiment_results is left unchanged.
+        """
+        matcher = self.text_analyzer.theme_matcher
+        theme_stats = self._theme_statistics(sentiment_results)
+        theme_stats = ThemeStatistics(matcher.themes) if theme_stats is None else copy.deepcopy(theme_stats)
+        return IncrementalRanker(dev_tickets_df, matcher, theme_stats, self.weights)
 
     def _calculate_impact(self, tickets_df, dev_tickets_df, sentiment_results):
         """Calculate impact metrics for development items"""
@@ -87,57 +145,138 @@ class ImpactAnalyzer:
             # Calculate theme statistics
             theme_stats = self._calculate_theme_frequency(tickets_df, sentiment_results)
             
-            impact_scores = []
+            # Score every item at once: priority 40%, story points 30%, theme relevance 30%
+            scorer = BacklogScorer(dev_tickets_df, self.text_analyzer.theme_matcher)
+            return scorer.rank(theme_stats, self.weights)
             
-            for _, dev_item in dev_tickets_df.iterrows():
-                score = {
-                    'ticket_id': dev_item['ticket_id'],
-                    'title': dev_item['title'],
-                    'priority': dev_item['priority'],
-                    'story_points': dev_item['story_points']
-                }
-                
-                # Calculate priority score
-                priority_score = {
-                    'High': 3,
-                    'Medium': 2,
-                    'Low': 1
-                }.get(dev_item['priority'], 1)
-                
-                # Normalize story points (assuming 34 is max story points)
-                story_points_score = dev_item['story_points'] / 34
-                
-                # Calculate theme relevance score
-                theme_score = self._calculate_theme_score(dev_item, theme_stats)
-                
-                # Calculate composite score with three components
-                score['composite_score'] = (
-                    (priority_score / 3 * 0.4) +      # Priority (normalized to 0-1) is 40%
-                    (story_points_score * 0.3) +      # Story points is 30%
-                    (theme_score * 0.3)               # Theme relevance is 30%
-                )
-                
-                # Add theme analysis details for transparency
-                score['theme_score'] = theme_score
-                score['relevant_themes'] = self.text_analyzer.extract_themes(dev_item['title'])
-                
-                impact_scores.append(score)
+        except Exception as e:
+            logger.error(f"Error calculating impact: {str(e)}")
+            raise
+
+    def analyze_releases(self, csat_df: Optional[pd.DataFrame] = None,
+                         tickets_df: Optional[pd.DataFrame] = None,
+                         dev_tickets_df: Optional[pd.DataFrame] = None,
+                         sentiment_results: Optional[Dict] = None,
+                         before_days: float = 30, after_days: float = 30, **options) -> ReleaseImpact:
+        """Before/after sentiment and theme changes around every dev item's target_release_date
+
+        Frames that are not passed in are loaded (and analysed) as in analyze_impact.
+        Other keyword arguments (rank_tests, bootstrap, seed, ...) go to
+        ReleaseImpactEngine.evaluate.
+        """
+        try:
+            csat_df, tickets_df, dev_tickets_df, sentiment_results = self._resolve_inputs(
+                csat_df, tickets_df, dev_tickets_df, sentiment_results
+            )
             
-            # Convert to DataFrame and sort by composite score
-            impact_df = pd.DataFrame(impact_scores)
-            impact_df = impact_df.sort_values('composite_score', ascending=False)
+            engine = ReleaseImpactEngine.from_results(sentiment_results, csat_df, tickets_df)
+            return engine.evaluate(dev_tickets_df, before_days, after_days, **options)
             
-            return impact_df
+        except Exception as e:
+            logger.error(f"Error in release impact analysis: {str(e)}")
+            raise
+    
+    def discover_themes(self, csat_df: Optional[pd.DataFrame] = None,
+                        tickets_df: Optional[pd.DataFrame] = None,
+                        dev_tickets_df: Optional[pd.DataFrame] = None,
+                        sentiment_results: Optional[Dict] = None,
+                        n_clusters: Optional[int] = None, n_matches: int = 3,
+                        discovery: Optional[ThemeDiscovery] = None) -> ThemeDiscoveryResult:
+        """Cluster feedback embeddings and match each backlog item to its nearest clusters
+
+        Args:
+            n_clusters (int, optional): Clusters to look for; None derives it from the
+                number of texts (ignored if discovery is given)
+            n_matches (int): Clusters reported per backlog item
+            discovery (ThemeDiscovery, optional): Configured discovery, e.g. with
+                its own embedder
+        """
+        try:
+            csat_df, tickets_df, dev_tickets_df, sentiment_results = self._resolve_inputs(
+                csat_df, tickets_df, dev_tickets_df, sentiment_results
+            )
+            
+            discovery = discovery or ThemeDiscovery(n_clusters=n_clusters)
+            clusters = discovery.fit(
+                self.text_analyzer.feedback_text(csat_df, tickets_df),
+                self._feedback_sentiment(sentiment_results),
+                self._combined_results(sentiment_results, 'csat_themes', 'ticket_themes')
+            )
+            return ThemeDiscoveryResult(clusters, discovery.match_items(dev_tickets_df, n_matches))
             
         except Exception as e:
-            logger.error(f"Error calculating impact: {str(e)}")
+            logger.error(f"Error in theme discovery: {str(e)}")
+            raise
+    
+    def analyze_relevance(self, csat_df: Optional[pd.DataFrame] = None,
+                          tickets_df: Optional[pd.DataFrame] = None,
+                          dev_tickets_df: Optional[pd.DataFrame] = None,
+                          sentiment_results: Optional[Dict] = None,
+                          index_path=DEFAULT_INDEX_PATH, threshold: float = 0.1) -> pd.DataFrame:
+        """TF-IDF relevance of each backlog item to all feedback text
+
+        Complements the keyword theme score with matches on any wording. The
+        TF-IDF index is saved under index_path and reused while the feedback
+        text is unchanged.
+
+        Returns:
+            pd.DataFrame: ticket_id, matching_feedback, relevance,
+                weighted_relevance and mean_sentiment, highest weighted_relevance first
+        """
+        try:
+            csat_df, tickets_df, dev_tickets_df, sentiment_results = self._resolve_inputs(
+                csat_df, tickets_df, dev_tickets_df, sentiment_results
+            )
+            
+            index = RelevanceIndex.load_or_build(
+                index_path,
+                self.text_analyzer.feedback_text(csat_df, tickets_df),
+                self._feedback_sentiment(sentiment_results)
+            )
+            relevance_df = index.score(dev_tickets_df, threshold)
+            return relevance_df.sort_values('weighted_relevance', ascending=False, kind='stable')
+            
+        except Exception as e:
+            logger.error(f"Error in relevance analysis: {str(e)}")
             raise
+    
+    @staticmethod
+    def _combined_results(sentiment_results: Dict, csat_key: str, ticket_key: str) -> Optional[pd.DataFrame]:
+        """CSAT and ticket results aligned with TextAnalyzer.feedback_text, or None"""
+        # Chunked analysis keeps no per-row results
+        csat, tickets = sentiment_results.get(csat_key), sentiment_results.get(ticket_key)
+        if csat is None or tickets is None:
+            return None
+        return pd.concat([csat, tickets], keys=['csat', 'tickets'])
+    
+    def _feedback_sentiment(self, sentiment_results: Dict) -> Optional[pd.Series]:
+        sentiment = self._combined_results(sentiment_results, 'csat_sentiment', 'ticket_sentiment')
+        return sentiment['sentiment_score'] if sentiment is not None else None
+    
+    @staticmethod
+    def release_metrics(release_impact: ReleaseImpact, alpha: float = 0.05) -> Dict[str, ImpactMetrics]:
+        """ImpactMetrics per ticket_id
 
-    def _calculate_impact_old(self, development_date: datetime) -> ImpactMetrics:
+        Significant themes are those whose prevalence change has a
+        Benjamini-Hochberg adjusted p-value below alpha across all releases and themes.
+        """
+        significant = release_impact.theme_q_values < alpha
+        metrics = {}
+        for ticket_id, row in release_impact.summary.iterrows():
+            changes = release_impact.theme_changes.loc[ticket_id]
+            metrics[ticket_id] = ImpactMetrics(
+                sentiment_change=row['sentiment_change'],
+                theme_changes=changes.dropna().to_dict(),
+                significant_themes=list(changes.index[significant.loc[ticket_id].to_numpy()]),
+                p_value=row['p_value'],
+            )
+        return metrics
+    
+    def _calculate_impact_old(self, development_date: datetime, window_days: float = 30) -> ImpactMetrics:
         """Calculate impact metrics before and after development change"""
         # Load and analyze data
-        ingestion = DataIngestion()
-        analyzer = TextAnalyzer()
+        ingestion = self.data_ingestion
+        analyzer = self.text_analyzer
         
         csat_df = ingestion.load_csat_data()
         tickets_df = ingestion.load_support_tickets()
@@ -145,65 +284,20 @@ class ImpactAnalyzer:
         analysis_results = analyzer.analyze_all(csat_df, tickets_df)
         
         # Combine analyses for overall impact
-        impact_metrics = self._calculate_impact(
-            analysis_results.ticket_analysis,
-            development_date
+        release = pd.DataFrame({'ticket_id': ['development'], 'target_release_date': [development_date]})
+        release_impact = self.analyze_releases(
+            csat_df, tickets_df, release, analysis_results, window_days, window_days
         )
+        impact_metrics = self.release_metrics(release_impact)['development']
         
         # Visualize results
         self._plot_impact(
-            analysis_results.ticket_analysis,
+            tickets_df.join(analysis_results['ticket_sentiment']['sentiment_score']),
             development_date
         )
         
         return impact_metrics
     
-    def _calculate_impact(
-        self,
-        tickets_df: pd.DataFrame,
-        dev_tickets_df: pd.DataFrame,
-        sentiment_results: Dict[str, pd.DataFrame]
-    ) -> ImpactMetrics:
-        """Calculate impact metrics for development items"""
-        try:
-            # Extract themes from sentiment results
-            themes = sentiment_results.get('themes', [])
-            
-            impact_scores = []
-            
-            for _, dev_item in dev_tickets_df.iterrows():
-                score = {
-                    'ticket_id': dev_item['ticket_id'],
-                    'title': dev_item['title'],
-                    'priority': dev_item['priority'],
-                    'story_points': dev_item['story_points']
-                }
-                
-                # Calculate priority score
-                priority_score = {
-                    'High': 3,
-                    'Medium': 2,
-                    'Low': 1
-                }.get(dev_item['priority'], 1)
-                
-                # Calculate composite score using themes and priority
-                score['composite_score'] = (
-                    (priority_score * 0.6) +
-                    (dev_item['story_points'] / 34 * 0.4)  # Normalize story points
-                )
-                
-                impact_scores.append(score)
-            
-            # Convert to DataFrame and sort by composite score
-            impact_df = pd.DataFrame(impact_scores)
-            impact_df = impact_df.sort_values('composite_score', ascending=False)
-            
-            return impact_df
-            
-        except Exception as e:
-            logger.error(f"Error calculating impact: {str(e)}")
-            raise
-    
     def _plot_impact(
         self,
         tickets_df: pd.DataFrame,
@@ -276,7 +370,7 @@ if __name__ == "__main__":
                 f"<td>{row['composite_score']:.2f}</td>"
                 f"<td>{', '.join(row['relevant_themes'])}</td>"
                 "</tr>"
-                for _, row in impact_df.head(10).iterrows()  # Show top 10 items
+                for _, row in impact_df.head(10).iterrows()
             )}
         </table>
         
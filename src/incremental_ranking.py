@@ -0,0 +1,233 @@
+import logging
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.scoring import BacklogScorer, ScoringWeights
+from src.theme_matcher import ThemeMatcher
+from src.theme_stats import ThemeStatistics
+
+logger = logging.getLogger(__name__)
+
+# Backlog ranking kept up to date as feedback arrives and items change.
+#
+# Usage:
+#   from src.incremental_ranking import IncrementalRanker
+#
+#   ranker = IncrementalRanker(dev_tickets_df, matcher, analysis_results['theme_stats'])
+#   ranker.top(10)                               # same rows and order as BacklogScorer.rank
+#   ranker.add_feedback(new_memberships, new_sentiment)   # only items on changed themes move
+#   ranker.upsert_item({'ticket_id': 'DEV-123', 'title': ..., 'priority': 'High', 'story_points': 5})
+#   ranker.remove_item('DEV-007')
+#   ranker.rank_of('DEV-123'), ranker.item('DEV-123')
+#
+# An item's theme score is the sum of its themes' weights divided by the
+# largest weight, and a theme's weight is its mention count (doubled for
+# negative mean sentiment) over the number of feedback rows. The row count
+# cancels in that ratio, so new feedback only changes the scores of items
+# referencing a theme whose count or sentiment sign changed, found through a
+# theme -> items reverse index. Only when the largest weight itself changes
+# are all items rescored. The ranking is a list of (-score, position, id)
+# kept sorted with bisect, so top-k is a slice and ties keep backlog order
+# as in BacklogScorer.rank. Items are keyed by ticket_id.
+
+
+class IncrementalRanker:
+    def __init__(self, dev_tickets_df: pd.DataFrame, theme_matcher: ThemeMatcher,
+                 theme_stats: ThemeStatistics, weights: Optional[ScoringWeights] = None):
+        """Score the backlog once and index it by theme
+
+        Args:
+            dev_tickets_df (pd.DataFrame): Backlog with ticket_id, title, priority,
+                story_points and optionally description; only the first row of
+                each ticket_id is kept
+            theme_matcher (ThemeMatcher): Matcher used to find each item's themes
+            theme_stats (ThemeStatistics): Feedback statistics; updated in place
+                by add_feedback
+            weights (ScoringWeights, optional): Composite score weights
+        """
+        self.matcher = theme_matcher
+        self.theme_stats = theme_stats
+        self.weights = weights or ScoringWeights()
+        self._theme_index = {theme: i for i, theme in enumerate(theme_stats.themes)}
+        self._raw = self._raw_weights()
+        self._max = self._max_weight(self._raw)
+
+        self._items: Dict[str, Dict] = {}
+        self._by_theme: Dict[str, Set[str]] = defaultdict(set)
+        self._order: List[Tuple[float, int, str]] = []
+        self._next_position = 0
+        duplicated = dev_tickets_df['ticket_id'].duplicated()
+        if duplicated.any():
+            logger.warning(f"Ignoring {int(duplicated.sum())} backlog rows repeating an earlier ticket_id")
+            dev_tickets_df = dev_tickets_df[~duplicated.to_numpy()]
+        for item in self._score_items(dev_tickets_df):
+            self._index(item)
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _raw_weights(self) -> np.ndarray:
+        """Theme weights before dividing by the row count: count, doubled for negative sentiment"""
+        sentiment_weight = np.where(self.theme_stats.mean_sentiment.to_numpy() < 0, 2.0, 1.0)
+        return self.theme_stats.counts * sentiment_weight
+
+    @staticmethod
+    def _max_weight(raw: np.ndarray) -> float:
+        return float(raw.max()) if len(raw) else 0.0
+
+    def _score_items(self, items_df: pd.DataFrame) -> List[Dict]:
+        """Theme-independent part of the score and the themes of each item"""
+        scorer = BacklogScorer(items_df, self.matcher)
+        base = scorer.composite_scores({}, self.weights)['composite_score']
+        records = scorer.items.to_dict('records')
+        return [
+            {'row': record, 'themes': themes, 'base': float(score)}
+            for record, themes, score in zip(records, scorer.relevant_themes, base)
+        ]
+
+    def _theme_score(self, item: Dict) -> float:
+        if self._max <= 0:
+            return 0.0
+        indices = [self._theme_index[theme] for theme in item['themes'] if theme in self._theme_index]
+        return float(self._raw[indices].sum() / self._max)
+
+    def _index(self, item: Dict, position: Optional[int] = None):
+        ticket_id = item['row']['ticket_id']
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+        item['position'] = position
+        self._items[ticket_id] = item
+        for theme in item['themes']:
+            self._by_theme[theme].add(ticket_id)
+
+    def _unindex(self, ticket_id: str) -> Dict:
+        item = self._items.pop(ticket_id)
+        for theme in item['themes']:
+            self._by_theme[theme].discard(ticket_id)
+        key = item.get('key')
+        if key is not None:
+            del self._order[bisect_left(self._order, key)]
+        return item
+
+    def _rescore(self, item: Dict):
+        item['theme_score'] = self._theme_score(item)
+        item['composite_score'] = item['base'] + self.weights.theme * item['theme_score']
+        item['key'] = (-item['composite_score'], item['position'], item['row']['ticket_id'])
+
+    def _reposition(self, ticket_id: str):
+        item = self._items[ticket_id]
+        del self._order[bisect_left(self._order, item['key'])]
+        self._rescore(item)
+        insort(self._order, item['key'])
+
+    def _rebuild(self):
+        for item in self._items.values():
+            self._rescore(item)
+        self._order = sorted(item['key'] for item in self._items.values())
+
+    def add_feedback(self, memberships: pd.DataFrame, sentiment: Optional[pd.Series] = None,
+                     dates: Optional[pd.Series] = None) -> int:
+        """Add new feedback rows to the theme statistics and move the affected items
+
+        Returns:
+            int: Number of items rescored
+        """
+        start = time.perf_counter()
+        self.theme_stats.add(memberships, sentiment, dates)
+        raw = self._raw_weights()
+        changed = [theme for theme, i in self._theme_index.items() if raw[i] != self._raw[i]]
+        new_max = self._max_weight(raw)
+        self._raw = raw
+
+        if new_max != self._max:
+            # Every theme score is relative to the largest weight
+            self._max = new_max
+            self._rebuild()
+            updated = len(self._items)
+        else:
+            affected = set().union(*(self._by_theme[theme] for theme in changed)) if changed else set()
+            for ticket_id in affected:
+                self._reposition(ticket_id)
+            updated = len(affected)
+
+        logger.info(
+            f"Added {len(memberships)} feedback rows: {len(changed)} themes changed, "
+            f"{updated} of {len(self._items)} items rescored in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return updated
+
+    def upsert_item(self, item) -> int:
+        """Add or replace one backlog item (dict or Series with the backlog columns)
+
+        Returns:
+            int: The item's new rank (1 is highest)
+        """
+        scored = self._score_items(pd.DataFrame([dict(item)]))[0]
+        ticket_id = scored['row']['ticket_id']
+        position = self._unindex(ticket_id)['position'] if ticket_id in self._items else None
+        self._index(scored, position)
+        self._rescore(scored)
+        insort(self._order, scored['key'])
+        return self.rank_of(ticket_id)
+
+    def remove_item(self, ticket_id: str) -> bool:
+        """Drop a backlog item; returns whether it was present"""
+        if ticket_id not in self._items:
+            return False
+        self._unindex(ticket_id)
+        return True
+
+    def rank_of(self, ticket_id: str) -> Optional[int]:
+        """Rank of an item (1 is highest), or None if unknown"""
+        item = self._items.get(ticket_id)
+        return None if item is None else bisect_left(self._order, item['key']) + 1
+
+    def item(self, ticket_id: str) -> Optional[Dict]:
+        """One item's row with its scores, themes and rank"""
+        item = self._items.get(ticket_id)
+        if item is None:
+            return None
+        return {
+            **item['row'],
+            'composite_score': item['composite_score'],
+            'theme_score': item['theme_score'],
+            'relevant_themes': list(item['themes']),
+            'rank': self.rank_of(ticket_id),
+        }
+
+    def items_for_themes(self, themes: Iterable[str]) -> Set[str]:
+        """ticket_ids of items referencing any of themes"""
+        return set().union(*(self._by_theme.get(theme, set()) for theme in themes))
+
+    def top(self, k: Optional[int] = 10, theme: Optional[str] = None) -> pd.DataFrame:
+        """Highest ranked k items (all when k is None), optionally only those with theme
+
+        Columns match BacklogScorer.rank.
+        """
+        keys = self._order
+        if theme is not None:
+            members = self._by_theme.get(theme, set())
+            keys = [key for key in keys if key[2] in members]
+        rows = []
+        for _, _, ticket_id in keys[:k] if k is not None else keys:
+            item = self._items[ticket_id]
+            rows.append({
+                **item['row'],
+                'composite_score': item['composite_score'],
+                'theme_score': item['theme_score'],
+                'relevant_themes': list(item['themes']),
+            })
+        columns = ['ticket_id', 'title', 'priority', 'story_points',
+                   'composite_score', 'theme_score', 'relevant_themes']
+        return pd.DataFrame(rows, columns=columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The whole ranking, like BacklogScorer.rank"""
+        return self.top(None)
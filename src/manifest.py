@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Manifest of raw files that have already been preprocessed.
+#
+# Usage:
+#   from src.manifest import ProcessingManifest
+#
+#   manifest = ProcessingManifest('data/output/manifest.json')
+#   if manifest.has_changed('csat', path):
+#       ...clean the file...
+#       manifest.record('csat', path)
+#   manifest.save()
+#
+# A file counts as unchanged when its size and mtime match the manifest. If
+# either differs, the SHA-256 content hash decides, so a touched but
+# identical file is not reprocessed.
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProcessingManifest:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Dict]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text()).get('datasets', {})
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable manifest {self.path}: {str(e)}")
+
+    def get(self, dataset: str, path: Path) -> Optional[Dict]:
+        return self.entries.get(dataset, {}).get(Path(path).name)
+
+    def has_changed(self, dataset: str, path: Path) -> bool:
+        """Whether path is new or differs from its recorded fingerprint"""
+        path = Path(path)
+        entry = self.get(dataset, path)
+        if entry is None:
+            return True
+
+        stat = path.stat()
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return False
+        if stat.st_size != entry['size'] or file_sha256(path) != entry['sha256']:
+            return True
+
+        # Same content with a new mtime: refresh the fingerprint only
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return False
+
+    def record(self, dataset: str, path: Path):
+        """Store the current fingerprint of path"""
+        path = Path(path)
+        stat = path.stat()
+        self.entries.setdefault(dataset, {})[path.name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(path),
+        }
+
+    def forget(self, dataset: str, name: str) -> Optional[Dict]:
+        return self.entries.get(dataset, {}).pop(name, None)
+
+    def removed_files(self, dataset: str, current: Iterable[Path]) -> List[str]:
+        """Names recorded in the manifest that are no longer present"""
+        current_names = {Path(path).name for path in current}
+        return [name for name in self.entries.get(dataset, {}) if name not in current_names]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'datasets': self.entries}, indent=2, sort_keys=True))
+        tmp_path.replace(self.path)
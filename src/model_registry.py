@@ -0,0 +1,253 @@
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+from src.batch_inference import BatchInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+# Process-wide registry of transformers pipelines.
+#
+# Usage:
+#   from src.model_registry import get_registry
+#
+#   registry = get_registry()
+#   registry.warm_up("sentiment-analysis")            # optional: load before first use
+#   analyzer = registry.get("sentiment-analysis")     # loaded once, shared afterwards
+#   registry.stats()                                  # load time and resident memory per model
+#   registry.release()                                # drop all loaded models
+#
+# Every TextAnalyzer asks the registry for its pipeline, so building several
+# analyzers (directly or via ImpactAnalyzer) no longer loads the model again.
+#
+# CPU inference backends for the same model:
+#   registry.get("sentiment-analysis", backend="quantized")   # PyTorch with dynamic int8 Linear layers
+#   registry.get("sentiment-analysis", backend="onnx")        # ONNX Runtime, needs optimum[onnxruntime]
+#
+#   report = registry.parity_check(sample_texts, backend="quantized")
+#   report.label_agreement, report.speedup                    # against the full-precision PyTorch model
+#
+# The ONNX export is written once to data/cache/onnx/<model> and reused.
+
+BACKENDS = ('pytorch', 'quantized', 'onnx')
+
+# Model used when a backend needs an explicit model id (the transformers default for the task)
+DEFAULT_MODELS = {
+    'sentiment-analysis': 'distilbert/distilbert-base-uncased-finetuned-sst-2-english',
+    'text-classification': 'distilbert/distilbert-base-uncased-finetuned-sst-2-english',
+}
+
+ONNX_EXPORT_DIR = Path('data/cache/onnx')
+
+
+class ParityReport(NamedTuple):
+    """Agreement and speed of a backend against a baseline on the same texts"""
+    backend: str
+    baseline: str
+    texts: int
+    label_agreement: float  # Share of texts given the same label
+    max_score_diff: float  # Largest score difference among texts with the same label
+    mean_score_diff: float
+    baseline_texts_per_sec: float
+    backend_texts_per_sec: float
+    speedup: float
+    passed: bool  # label_agreement reached the required minimum
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Resident memory of the current process in MB, or None if unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; ru_maxrss is bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._pipelines: Dict[Tuple[str, Optional[str], str], object] = {}
+        self._stats: Dict[Tuple[str, Optional[str], str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, task: str = "sentiment-analysis", model: Optional[str] = None, backend: str = 'pytorch'):
+        """Return the pipeline for task/model/backend, loading it on first use
+
+        Args:
+            task (str): transformers pipeline task
+            model (str, optional): Model name or path; None uses the task default
+            backend (str): 'pytorch' (full precision), 'quantized' (dynamic int8
+                quantization of the PyTorch model) or 'onnx' (ONNX Runtime export)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        key = (task, model, backend)
+        with self._lock:
+            if key not in self._pipelines:
+                self._pipelines[key] = self._load(task, model, backend)
+            return self._pipelines[key]
+
+    def warm_up(self, task: str = "sentiment-analysis", model: Optional[str] = None,
+                sample_text: str = "warm up", backend: str = 'pytorch'):
+        """Load the pipeline and run one inference so the first real call is not slow"""
+        pipe = self.get(task, model, backend)
+        pipe(sample_text)
+        return pipe
+
+    def release(self, task: Optional[str] = None, model: Optional[str] = None, backend: str = 'pytorch'):
+        """Drop a loaded pipeline, or every pipeline when no task is given"""
+        with self._lock:
+            if task is None:
+                keys = list(self._pipelines)
+            else:
+                keys = [(task, model, backend)] if (task, model, backend) in self._pipelines else []
+            for key in keys:
+                del self._pipelines[key]
+                logger.info(f"Released model {self._describe(key)}")
+        gc.collect()
+
+    def is_loaded(self, task: str = "sentiment-analysis", model: Optional[str] = None,
+                  backend: str = 'pytorch') -> bool:
+        return (task, model, backend) in self._pipelines
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Load time and resident memory recorded for each model loaded so far"""
+        return {
+            self._describe(key): {**value, 'loaded': key in self._pipelines}
+            for key, value in self._stats.items()
+        }
+
+    def log_stats(self):
+        """Log load time and resident memory for every model loaded so far"""
+        for name, stats in self.stats().items():
+            rss = stats['rss_mb_after']
+            rss_note = f", resident memory {rss:.0f} MB after load" if rss is not None else ""
+            logger.info(f"Model {name}: loaded in {stats['load_seconds']:.2f}s{rss_note}")
+
+    def parity_check(self, texts: Sequence[str], backend: str = 'quantized',
+                     task: str = "sentiment-analysis", model: Optional[str] = None,
+                     baseline: str = 'pytorch', batch_size: int = 32,
+                     min_agreement: float = 0.99) -> ParityReport:
+        """Score texts with backend and baseline and compare labels, scores and throughput
+
+        Both pipelines are warmed up first so loading is not timed.
+
+        Args:
+            texts: Representative sample of the texts to be scored
+            min_agreement (float): Share of identical labels required to pass
+        """
+        runs = {}
+        for name in (baseline, backend):
+            engine = BatchInferenceEngine(self.warm_up(task, model, backend=name), batch_size=batch_size)
+            runs[name] = (engine.run(texts), engine.stats['texts_per_second'])
+
+        (expected, baseline_speed), (actual, backend_speed) = runs[baseline], runs[backend]
+        pairs = [(a, b) for a, b in zip(expected, actual) if a is not None and b is not None]
+        same_label = [abs(a['score'] - b['score']) for a, b in pairs if a['label'] == b['label']]
+        agreement = len(same_label) / len(pairs) if pairs else 1.0
+
+        report = ParityReport(
+            backend=backend,
+            baseline=baseline,
+            texts=len(pairs),
+            label_agreement=agreement,
+            max_score_diff=max(same_label, default=0.0),
+            mean_score_diff=sum(same_label) / len(same_label) if same_label else 0.0,
+            baseline_texts_per_sec=baseline_speed,
+            backend_texts_per_sec=backend_speed,
+            speedup=backend_speed / baseline_speed if baseline_speed else float('nan'),
+            passed=agreement >= min_agreement,
+        )
+        log = logger.info if report.passed else logger.warning
+        log(
+            f"Parity {backend} vs {baseline} on {report.texts} texts: "
+            f"{agreement:.1%} same labels, max score diff {report.max_score_diff:.4f}, "
+            f"{report.speedup:.1f}x throughput"
+        )
+        return report
+
+    def _load(self, task: str, model: Optional[str], backend: str = 'pytorch'):
+        """Load a pipeline and record how long it took and how much memory it added"""
+        # Imported here so modules using the registry load without transformers installed
+        from transformers import pipeline
+
+        rss_before = resident_memory_mb()
+        start = time.perf_counter()
+
+        if backend == 'onnx':
+            pipe = self._load_onnx(task, model)
+        else:
+            pipe = pipeline(task, model=model) if model else pipeline(task)
+            if backend == 'quantized':
+                pipe = self._quantize(pipe)
+
+        load_seconds = time.perf_counter() - start
+        rss_after = resident_memory_mb()
+        self._stats[(task, model, backend)] = {
+            'load_seconds': load_seconds,
+            'rss_mb_before': rss_before,
+            'rss_mb_after': rss_after,
+        }
+        rss_note = f", resident memory {rss_after:.0f} MB" if rss_after is not None else ""
+        logger.info(f"Loaded model {self._describe((task, model, backend))} in {load_seconds:.2f}s{rss_note}")
+        return pipe
+
+    @staticmethod
+    def _quantize(pipe):
+        """Swap the pipeline's Linear layers for dynamically quantized int8 ones"""
+        import torch
+
+        pipe.model = torch.ao.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+
+    @staticmethod
+    def _load_onnx(task: str, model: Optional[str]):
+        """Pipeline running an ONNX Runtime export of the model, exported on first use"""
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend needs optimum[onnxruntime] (pip install -e .[onnx])") from e
+        from transformers import AutoTokenizer, pipeline
+
+        model_id = model or DEFAULT_MODELS.get(task)
+        if task not in DEFAULT_MODELS or model_id is None:
+            raise ValueError(f"The 'onnx' backend supports {list(DEFAULT_MODELS)}, got {task!r}")
+
+        export_dir = ONNX_EXPORT_DIR / model_id.replace('/', '--')
+        if (export_dir / 'model.onnx').exists():
+            ort_model = ORTModelForSequenceClassification.from_pretrained(export_dir)
+            tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        else:
+            logger.info(f"Exporting {model_id} to ONNX in {export_dir}")
+            ort_model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+            ort_model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+        return pipeline(task, model=ort_model, tokenizer=tokenizer)
+
+    @staticmethod
+    def _describe(key: Tuple[str, Optional[str], str]) -> str:
+        task, model, backend = key
+        name = f"{task}:{model or 'default'}"
+        return name if backend == 'pytorch' else f"{name}[{backend}]"
+
+
+_default_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry"""
+    return _default_registry
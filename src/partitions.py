@@ -0,0 +1,164 @@
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from src.schema import apply_schema
+
+logger = logging.getLogger(__name__)
+
+# Date-partitioned Parquet datasets.
+#
+# Usage:
+#   from src.partitions import write_partitions, select_files, read_range
+#
+#   write_partitions(csat_df, Path('data/output/csat_processed.parquet'), 'survey_date', 'month')
+#   #   csat_processed.parquet/month=2024-01/part-00000.parquet
+#   #   csat_processed.parquet/month=2024-02/part-00000.parquet
+#
+#   merge_partitions(new_rows, path, 'survey_date', 'month')   # rewrites only the months in new_rows
+#
+#   files = select_files(path, start='2024-01-15', end='2024-03-01')   # only month=2024-01 and 2024-02
+#   df = read_range(path, 'survey_date', start='2024-01-15', end='2024-03-01')
+#
+# Partition directories are named '<granularity>=<period>' (hive style), with
+# rows lacking a date under '<granularity>=unknown'. Ranges are half-open,
+# [start, end), and either bound may be None. Partitions entirely outside the
+# range are never opened; within the remaining files the exact bounds are
+# applied as a row filter. Part files outside any partition directory (an
+# unpartitioned dataset or an older single-file output) are always read.
+
+PARTITION_FREQS = {'month': 'M', 'quarter': 'Q'}
+UNKNOWN_PERIOD = 'unknown'
+
+
+def _check_granularity(granularity: str) -> str:
+    if granularity not in PARTITION_FREQS:
+        raise ValueError(f"partition_by must be one of {list(PARTITION_FREQS)}, got {granularity!r}")
+    return PARTITION_FREQS[granularity]
+
+
+def _by_period(df: pd.DataFrame, date_column: str, granularity: str):
+    """(period label, rows) pairs of df, in period order"""
+    periods = pd.to_datetime(df[date_column], errors='coerce').dt.to_period(_check_granularity(granularity))
+    labels = periods.astype(str).where(periods.notna(), UNKNOWN_PERIOD)
+    return df.groupby(labels.to_numpy(), sort=True)
+
+
+def write_partitions(df: pd.DataFrame, path: Path, date_column: str, granularity: str = 'month') -> int:
+    """Append df to the partitioned dataset at path, one new part file per period
+
+    Returns:
+        int: Number of partitions written to
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for label, part in _by_period(df, date_column, granularity):
+        partition_dir = path / f"{granularity}={label}"
+        partition_dir.mkdir(exist_ok=True)
+        part_number = len(list(partition_dir.glob('part-*.parquet')))
+        part.to_parquet(partition_dir / f"part-{part_number:05d}.parquet", index=False)
+        written += 1
+    return written
+
+
+def merge_partitions(df: pd.DataFrame, path: Path, date_column: str, granularity: str = 'month',
+                     schema: Optional[dict] = None) -> int:
+    """Merge df into the partitioned dataset at path, rewriting only the partitions it falls in
+
+    Each of those partitions is read, combined with its new rows (typed with
+    schema, if given) and written back as a single part file.
+
+    Returns:
+        int: Number of partitions rewritten
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    rewritten = 0
+    for label, part in _by_period(df, date_column, granularity):
+        partition_dir = path / f"{granularity}={label}"
+        partition_dir.mkdir(exist_ok=True)
+        existing = sorted(partition_dir.glob('part-*.parquet'))
+        merged = pd.concat([pd.read_parquet(file) for file in existing] + [part], ignore_index=True)
+        if schema:
+            merged = apply_schema(merged, schema)
+        tmp_path = partition_dir / 'part-00000.parquet.tmp'
+        merged.to_parquet(tmp_path, index=False)
+        for file in existing:
+            file.unlink()
+        tmp_path.replace(partition_dir / 'part-00000.parquet')
+        rewritten += 1
+    return rewritten
+
+
+def _partition_period(directory: Path) -> Optional[pd.Period]:
+    """Period of a '<granularity>=<period>' directory, or None for unknown dates"""
+    granularity, _, label = directory.name.partition('=')
+    if label == UNKNOWN_PERIOD:
+        return None
+    return pd.Period(label, freq=_check_granularity(granularity))
+
+
+def select_files(path: Path, start=None, end=None) -> List[Path]:
+    """Parquet files of the dataset at path that can hold rows in [start, end)"""
+    path = Path(path)
+    if not path.is_dir():
+        return [path]
+
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    bounded = start is not None or end is not None
+
+    files, skipped = [], 0
+    for file in sorted(path.rglob('*.parquet')):
+        directory = file.parent
+        if directory != path and '=' in directory.name:
+            period = _partition_period(directory)
+            if period is None:
+                keep = not bounded
+            else:
+                keep = ((end is None or period.start_time < end) and
+                        (start is None or (period + 1).start_time > start))
+            if not keep:
+                skipped += 1
+                continue
+        files.append(file)
+
+    if bounded:
+        logger.info(f"Reading {len(files)} of {len(files) + skipped} part files of {path.name} for [{start}, {end})")
+    return files
+
+
+def range_filter(date_column: str, start=None, end=None) -> Optional[ds.Expression]:
+    """Arrow row filter for date_column in [start, end), or None when unbounded"""
+    expression = None
+    if start is not None:
+        expression = ds.field(date_column) >= pd.Timestamp(start)
+    if end is not None:
+        upper = ds.field(date_column) < pd.Timestamp(end)
+        expression = upper if expression is None else expression & upper
+    return expression
+
+
+def read_range(path: Path, date_column: Optional[str] = None, start=None, end=None,
+               columns: Optional[List[str]] = None, schema: Optional[dict] = None) -> pd.DataFrame:
+    """Read the rows of a Parquet file or dataset directory with date_column in [start, end)
+
+    Only the files selected by select_files are opened, memory-mapped. When no
+    file can hold such rows the result is empty, with the columns and types of
+    schema (restricted to columns, if given).
+    """
+    files = select_files(path, start, end)
+    if not files:
+        empty = pd.DataFrame(columns=columns if columns is not None else list(schema or {}))
+        return apply_schema(empty, schema) if schema else empty
+    dataset = ds.dataset([str(file) for file in files], format='parquet',
+                         filesystem=fs.LocalFileSystem(use_mmap=True))
+    row_filter = range_filter(date_column, start, end) if date_column else None
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
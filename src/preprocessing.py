@@ -1,16 +1,90 @@
 from pathlib import Path
 import pandas as pd
 import logging
-from typing import List, Optional
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from src.dedup import HashDeduplicator
+from src.manifest import ProcessingManifest
+from src.partitions import PARTITION_FREQS, merge_partitions, write_partitions
+from src.schema import CSAT_SCHEMA, TICKET_SCHEMA, apply_schema
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+class DatasetSpec(NamedTuple):
+    """How one processed dataset is found, cleaned, typed and de-duplicated"""
+    label: str  # Name used in log messages
+    pattern: str  # Raw file glob
+    clean: Callable[[pd.DataFrame], pd.DataFrame]
+    schema: dict
+    key_columns: List[str]  # Record identity across files, besides whole-row equality
+    date_column: str  # Column the output is partitioned on
+
+def _clean_file(file: Path, clean: Callable[[pd.DataFrame], pd.DataFrame],
+                schema: dict) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Read, clean and type one raw file
+
+    Errors are returned rather than raised so that one bad file (possibly in a
+    worker process) never stops the others.
+    """
+    try:
+        return apply_schema(clean(pd.read_csv(file)), schema), None
+    except Exception as e:
+        return None, str(e)
+
 class DataPreprocessor:
-    def __init__(self):
+    def __init__(self, incremental: bool = False, output_format: str = 'csv', workers: Optional[int] = 1,
+                 streaming: bool = False, chunksize: int = 100_000, partition_by: Optional[str] = None):
+        """Initialize the preprocessor
+
+        Args:
+            incremental (bool): Only clean raw files that are new or changed since
+                the last run (tracked in data/output/manifest.json). Rows of new
+                files not already in the output (per the hash index in
+                data/output/dedup) are merged into it, rewriting only the
+                partitions they fall in; changed or removed files rebuild the
+                output from the per-file cleaned parts kept in data/output/parts
+            output_format (str): 'csv' or 'parquet'; Parquet keeps the schema
+                (dates, categoricals, integer scores) for DataIngestion
+            workers (int, optional): Number of processes reading and cleaning raw
+                files concurrently; 1 runs serially, None uses every CPU. The
+                output is identical to a serial run.
+            streaming (bool): Stream only new or changed raw files in chunks of
+                chunksize rows, drop rows (and ticket ids) already seen in any
+                file or earlier run using the hash index in data/output/dedup,
+                and append the rest to the existing output. Memory stays bounded
+                by the chunk size and the hash index.
+            chunksize (int): Rows per chunk in streaming mode
+            partition_by (str, optional): 'month' or 'quarter' writes each Parquet
+                output as a directory with one partition per period of
+                survey_date / created_date, so DataIngestion time-range queries
+                only read the partitions they need
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+        if partition_by is not None:
+            if partition_by not in PARTITION_FREQS:
+                raise ValueError(f"partition_by must be one of {list(PARTITION_FREQS)}, got {partition_by!r}")
+            if output_format != 'parquet':
+                raise ValueError("partition_by requires output_format='parquet'")
+        self.partition_by = partition_by
+        self.output_format = output_format
+        self.workers = workers or os.cpu_count() or 1
         self.raw_dir = Path('data/raw')
         self.output_dir = Path('data/output')
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.incremental = incremental
+        self.streaming = streaming
+        self.chunksize = chunksize
+        self.parts_dir = self.output_dir / 'parts'
+        self.dedup_dir = self.output_dir / 'dedup'
+        tracked = incremental or streaming
+        self.manifest = ProcessingManifest(self.output_dir / 'manifest.json') if tracked else None
         
     def process_all(self):
         """Process both CSAT and support ticket data"""
@@ -19,75 +93,300 @@ class DataPreprocessor:
     
     def process_csat_data(self):
         """Process all CSAT files from raw directory and output a single cleaned file"""
-        # Find all CSAT files
-        csat_files = list(self.raw_dir.glob('*csat*.csv'))
-        if not csat_files:
-            logger.warning("No CSAT files found in raw directory")
+        self._process_dataset('csat')
+    
+    def process_ticket_data(self):
+        """Process all support ticket files from raw directory and output a single cleaned file"""
+        self._process_dataset('tickets')
+    
+    def stream_dataset(self, dataset: str, chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Read raw files for dataset ('csat' or 'tickets') as cleaned, typed chunks
+
+        Only one chunk is held in memory at a time. Ticket de-duplication and
+        sorting apply within each chunk. chunksize defaults to self.chunksize.
+        """
+        spec = self._dataset_spec(dataset)
+        chunksize = chunksize or self.chunksize
+        for file in sorted(self.raw_dir.glob(spec.pattern)):
+            logger.info(f"Streaming {spec.label} file: {file.name}")
+            yield from self.clean_chunks(dataset, pd.read_csv(file, chunksize=chunksize))
+    
+    def clean_chunks(self, dataset: str, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Clean and type raw chunks of dataset ('csat' or 'tickets') one at a time"""
+        spec = self._dataset_spec(dataset)
+        for chunk in chunks:
+            yield apply_schema(spec.clean(chunk), spec.schema)
+    
+    def _dataset_spec(self, dataset: str) -> DatasetSpec:
+        # The cleaners are static so worker processes receive them by name, not a pickled preprocessor
+        specs = {
+            'csat': DatasetSpec('CSAT', '*csat*.csv', self._clean_csat_data, CSAT_SCHEMA, [], 'survey_date'),
+            'tickets': DatasetSpec('ticket', '*ticket*.csv', self._clean_ticket_data, TICKET_SCHEMA,
+                                   ['ticket_id'], 'created_date'),
+        }
+        if dataset not in specs:
+            raise ValueError(f"Unknown dataset {dataset!r}, expected one of {list(specs)}")
+        return specs[dataset]
+    
+    def _process_dataset(self, dataset: str):
+        """Clean every raw file of dataset and write the combined output"""
+        spec = self._dataset_spec(dataset)
+        label, clean, schema = spec.label, spec.clean, spec.schema
+        
+        # Find all raw files for this dataset
+        files = sorted(self.raw_dir.glob(spec.pattern))
+        if not files:
+            logger.warning(f"No {label} files found in raw directory")
             return
         
-        # Read and combine all CSAT files
-        dfs = []
-        for file in csat_files:
-            logger.info(f"Processing CSAT file: {file.name}")
-            try:
-                df = pd.read_csv(file)
-                df = self._clean_csat_data(df)
-                dfs.append(df)
-            except Exception as e:
-                logger.error(f"Error processing {file.name}: {str(e)}")
-                continue
+        output_path = self.output_dir / f"{dataset}_processed.{self.output_format}"
+        if self.streaming:
+            self._process_streaming(dataset, spec, files, output_path)
+            return
+        if self.incremental:
+            self._process_incremental(dataset, spec, files, output_path)
+            return
         
+        # Read and clean all files
+        dfs = [df for df in self._clean_files(files, label, clean, schema) if df is not None]
         if not dfs:
-            logger.error("No valid CSAT data to process")
+            logger.error(f"No valid {label} data to process")
             return
-            
-        # Combine all dataframes
-        combined_df = pd.concat(dfs, ignore_index=True)
-        
-        # Remove duplicates
-        combined_df = combined_df.drop_duplicates()
+        self._write_output(spec, dfs, output_path, HashDeduplicator(key_columns=spec.key_columns))
+    
+    def _write_output(self, spec: DatasetSpec, dfs: List[pd.DataFrame], output_path: Path,
+                      dedup: HashDeduplicator):
+        """De-duplicate cleaned frames through dedup and replace the output with them"""
+        # Remove duplicate rows and keys within and across files, file by file
+        dfs = [dedup.filter(apply_schema(df, spec.schema)) for df in dfs]
+        combined_df = apply_schema(pd.concat(dfs, ignore_index=True), spec.schema)
+        if dedup.dropped:
+            logger.info(f"Dropped {dedup.dropped} duplicate {spec.label} rows")
         
         # Save to output
-        output_path = self.output_dir / 'csat_processed.csv'
-        combined_df.to_csv(output_path, index=False)
-        logger.info(f"Saved processed CSAT data to {output_path}")
+        self._remove_output(output_path)
+        if self.partition_by:
+            partitions = write_partitions(combined_df, output_path, spec.date_column, self.partition_by)
+            logger.info(
+                f"Saved processed {spec.label} data to {output_path} in {partitions} {self.partition_by} partitions"
+            )
+        else:
+            self._write_table(combined_df, output_path)
+            logger.info(f"Saved processed {spec.label} data to {output_path}")
+        dedup.save()
     
-    def process_ticket_data(self):
-        """Process all support ticket files from raw directory and output a single cleaned file"""
-        # Find all ticket files
-        ticket_files = list(self.raw_dir.glob('*ticket*.csv'))
-        if not ticket_files:
-            logger.warning("No ticket files found in raw directory")
+    def _clean_files(self, files: List[Path], label: str,
+                     clean: Callable[[pd.DataFrame], pd.DataFrame],
+                     schema: dict) -> List[Optional[pd.DataFrame]]:
+        """Read and clean files, in parallel when workers > 1
+
+        Returns:
+            list: One cleaned DataFrame per file in the given order, None for
+                  files that failed (the error is logged)
+        """
+        for file in files:
+            logger.info(f"Processing {label} file: {file.name}")
+        
+        if self.workers > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(files))) as pool:
+                # map() yields in submission order, so the combined output is deterministic
+                outcomes = list(pool.map(_clean_file, files, repeat(clean), repeat(schema)))
+        else:
+            outcomes = [_clean_file(file, clean, schema) for file in files]
+        
+        results = []
+        for file, (df, error) in zip(files, outcomes):
+            if error is not None:
+                logger.error(f"Error processing {file.name}: {error}")
+            results.append(df)
+        return results
+    
+    def _process_incremental(self, dataset: str, spec: DatasetSpec, files: List[Path], output_path: Path):
+        """Clean only new or changed files and merge their rows into the output
+
+        Rows of new files are de-duplicated against the persistent hash index
+        and merged into the existing output, rewriting only the partitions they
+        fall in. A changed or removed file (whose old rows would have to be
+        taken out), a missing output or index, or an output in another layout
+        rebuilds the output from the stored per-file parts instead.
+        """
+        # Tracked per output layout so switching format or partitioning rebuilds
+        tracked_as = f"{dataset}.{self.output_format}.{self.partition_by or 'single'}"
+        parts_dir = self.parts_dir / dataset
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.dedup_dir / f"{output_path.name}.npz"
+        
+        # Drop parts of raw files that have disappeared
+        removed = self.manifest.removed_files(tracked_as, files)
+        for name in removed:
+            self.manifest.forget(tracked_as, name)
+            self._part_path(parts_dir, Path(name)).unlink(missing_ok=True)
+        
+        new, modified = [], []
+        for file in files:
+            if self.manifest.get(tracked_as, file) is None:
+                new.append(file)
+            elif self.manifest.has_changed(tracked_as, file) or not self._part_path(parts_dir, file).exists():
+                modified.append(file)
+        if not new and not modified and not removed and output_path.exists():
+            self.manifest.save()
+            logger.info(f"No new or changed {spec.label} files; {output_path} is up to date")
             return
         
-        # Read and combine all ticket files
-        dfs = []
-        for file in ticket_files:
-            logger.info(f"Processing ticket file: {file.name}")
+        changed = [file for file in files if file in new or file in modified]
+        logger.info(f"{len(changed)} of {len(files)} {spec.label} files are new or changed")
+        cleaned = {}
+        for file, df in zip(changed, self._clean_files(changed, spec.label, spec.clean, spec.schema)):
+            if df is None:
+                # Left out of the manifest so it is retried on the next run
+                self.manifest.forget(tracked_as, file.name)
+                self._part_path(parts_dir, file).unlink(missing_ok=True)
+                continue
+            self._write_table(df, self._part_path(parts_dir, file))
+            self.manifest.record(tracked_as, file)
+            cleaned[file] = df
+        
+        rebuild = (modified or removed or not output_path.exists() or not index_path.exists()
+                   or output_path.is_dir() != bool(self.partition_by))
+        if rebuild:
+            # Combine the stored parts in raw file order
+            parts = [file for file in files if self._part_path(parts_dir, file).exists()]
+            if not parts:
+                logger.error(f"No valid {spec.label} data to process")
+            else:
+                logger.info(f"Rebuilding {output_path} from {len(parts)} stored {spec.label} parts")
+                index_path.unlink(missing_ok=True)
+                dfs = [cleaned[file] if file in cleaned else self._read_table(self._part_path(parts_dir, file))
+                       for file in parts]
+                self._write_output(spec, dfs, output_path, HashDeduplicator(index_path, spec.key_columns))
+        elif cleaned:
+            dedup = HashDeduplicator(index_path, key_columns=spec.key_columns)
+            unique = [dedup.filter(apply_schema(df, spec.schema)) for df in cleaned.values()]
+            self._merge_output(spec, apply_schema(pd.concat(unique, ignore_index=True), spec.schema), output_path)
+            dedup.save()
+            logger.info(f"Dropped {dedup.dropped} duplicate {spec.label} rows")
+        self.manifest.save()
+    
+    def _merge_output(self, spec: DatasetSpec, df: pd.DataFrame, output_path: Path):
+        """Add rows to the existing output, rewriting as little of it as the format allows"""
+        if df.empty:
+            logger.info(f"No new {spec.label} rows for {output_path}")
+            return
+        if self.partition_by:
+            partitions = merge_partitions(df, output_path, spec.date_column, self.partition_by, spec.schema)
+            logger.info(f"Merged {len(df)} new {spec.label} rows into {partitions} partitions of {output_path}")
+            return
+        if self.output_format == 'csv':
+            df.to_csv(output_path, mode='a', header=False, index=False)
+        else:
+            # A single Parquet file cannot be appended to, so it is rewritten whole
+            combined = apply_schema(pd.concat([pd.read_parquet(output_path), df], ignore_index=True), spec.schema)
+            tmp_path = output_path.with_name(output_path.name + '.tmp')
+            combined.to_parquet(tmp_path, index=False)
+            tmp_path.replace(output_path)
+        logger.info(f"Merged {len(df)} new {spec.label} rows into {output_path}")
+    
+    def _process_streaming(self, dataset: str, spec: DatasetSpec, files: List[Path], output_path: Path):
+        """Stream new or changed raw files through the persistent hash index and append new rows"""
+        # Tracked per output so switching format or mode starts from scratch
+        tracked_as = output_path.name
+        changed = [file for file in files if self.manifest.has_changed(tracked_as, file)]
+        if not changed and output_path.exists():
+            self.manifest.save()
+            logger.info(f"No new or changed {spec.label} files; {output_path} is up to date")
+            return
+        
+        index_path = self.dedup_dir / f"{output_path.name}.npz"
+        dedup = HashDeduplicator(index_path, key_columns=spec.key_columns)
+        if not index_path.exists() and output_path.exists():
+            # Index rows written before the index existed so they are not appended twice
+            for chunk in self._iter_output(output_path):
+                dedup.filter(apply_schema(chunk, spec.schema))
+            dedup.dropped = 0
+        
+        appended = 0
+        for file in changed:
+            logger.info(f"Streaming {spec.label} file: {file.name}")
             try:
-                df = pd.read_csv(file)
-                df = self._clean_ticket_data(df)
-                dfs.append(df)
+                for chunk in self.clean_chunks(dataset, pd.read_csv(file, chunksize=self.chunksize)):
+                    unique = dedup.filter(chunk)
+                    if len(unique):
+                        self._append_table(unique, output_path, spec.date_column)
+                        appended += len(unique)
             except Exception as e:
+                # Not recorded, so the file is retried; rows already appended are in the index
                 logger.error(f"Error processing {file.name}: {str(e)}")
-                continue
+            else:
+                self.manifest.record(tracked_as, file)
+            finally:
+                dedup.save()
+                self.manifest.save()
         
-        if not dfs:
-            logger.error("No valid ticket data to process")
+        logger.info(
+            f"Appended {appended} new {spec.label} rows to {output_path} "
+            f"({dedup.dropped} duplicates dropped, {len(dedup)} distinct rows indexed)"
+        )
+    
+    def _append_table(self, df: pd.DataFrame, path: Path, date_column: Optional[str] = None):
+        """Append rows to an output: CSV in place, Parquet as a new part file in a dataset directory
+
+        With partition_by set, the rows go to a new part file in each period's partition.
+        """
+        if self.output_format == 'csv':
+            df.to_csv(path, mode='a', header=not path.exists(), index=False)
             return
-            
-        # Combine all dataframes
-        combined_df = pd.concat(dfs, ignore_index=True)
-        
-        # Remove duplicates
-        combined_df = combined_df.drop_duplicates()
         
-        # Save to output
-        output_path = self.output_dir / 'tickets_processed.csv'
-        combined_df.to_csv(output_path, index=False)
-        logger.info(f"Saved processed ticket data to {output_path}")
+        if path.is_file():
+            # Turn a single-file output into a directory dataset holding its rows,
+            # split into partitions when partition_by is set
+            tmp_path = path.with_name(path.name + '.tmp')
+            path.rename(tmp_path)
+            path.mkdir()
+            if self.partition_by:
+                write_partitions(pd.read_parquet(tmp_path), path, date_column, self.partition_by)
+                tmp_path.unlink()
+            else:
+                tmp_path.rename(path / 'part-00000.parquet')
+        if self.partition_by:
+            write_partitions(df, path, date_column, self.partition_by)
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        part_number = len(list(path.glob('part-*.parquet')))
+        df.to_parquet(path / f"part-{part_number:05d}.parquet", index=False)
+    
+    def _iter_output(self, path: Path) -> Iterator[pd.DataFrame]:
+        """Read an existing output back in chunks"""
+        if path.suffix == '.csv':
+            yield from pd.read_csv(path, chunksize=self.chunksize)
+            return
+        import pyarrow.parquet as pq
+        for file in (sorted(path.rglob('*.parquet')) if path.is_dir() else [path]):
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=self.chunksize):
+                yield batch.to_pandas()
+    
+    @staticmethod
+    def _remove_output(path: Path):
+        """Remove a previous output, which may be a file or a streamed directory dataset"""
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+    
+    def _part_path(self, parts_dir: Path, raw_file: Path) -> Path:
+        return parts_dir / f"{raw_file.stem}.{self.output_format}"
+    
+    def _write_table(self, df: pd.DataFrame, path: Path):
+        if self.output_format == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+    
+    @staticmethod
+    def _read_table(path: Path) -> pd.DataFrame:
+        return pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
     
-    def _clean_csat_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _clean_csat_data(df: pd.DataFrame) -> pd.DataFrame:
         """Clean and validate CSAT data
         
         Expected columns: satisfaction_score, survey_date, [other columns TBD]
@@ -107,7 +406,8 @@ class DataPreprocessor:
         
         return df
     
-    def _clean_ticket_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _clean_ticket_data(df: pd.DataFrame) -> pd.DataFrame:
         """Clean and validate support ticket data
         
         Expected columns: 
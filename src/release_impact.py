@@ -0,0 +1,272 @@
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.stats_batch import (benjamini_hochberg, bootstrap_mean_diff_ci, mann_whitney_u,
+                              pad_windows, two_proportion_z_test, welch_t_test)
+
+logger = logging.getLogger(__name__)
+
+# Before/after impact of every release on feedback sentiment and themes.
+#
+# Usage:
+#   from src.release_impact import ReleaseImpactEngine
+#
+#   engine = ReleaseImpactEngine.from_results(analysis_results, csat_df, tickets_df)
+#   impact = engine.evaluate(dev_tickets_df, before_days=30, after_days=30)
+#
+#   impact.summary             # per dev item: n_before/n_after, sentiment_before/after/change, t_stat, p_value
+#   impact.theme_changes       # item x theme: change in share of feedback mentioning the theme
+#   impact.theme_p_values      # item x theme: two-proportion z-test of that change
+#   impact.theme_q_values      # ... Benjamini-Hochberg adjusted over every release x theme test
+#
+#   # Rank tests and bootstrap intervals need the feedback rows themselves
+#   impact = engine.evaluate(dev_tickets_df, rank_tests=True, bootstrap=1000, seed=0)
+#
+# Feedback is sorted by date once and reduced to cumulative sums per distinct
+# date (rows, sentiment, squared sentiment, and the same per theme). The
+# windows [release - before, release) and [release, release + after) of all
+# releases are located with one searchsorted call each, and their totals are
+# differences of cumulative sums, so thousands of releases cost a few array
+# operations instead of one filter over the feedback per release. Mann-Whitney
+# tests and bootstrap intervals read each window as a slice of the sorted
+# rows, batched over releases by src.stats_batch.
+
+# Column blocks of the cumulative sums
+_ROWS, _KNOWN, _SUM, _SUM_SQ = range(4)
+
+
+class ReleaseImpact(NamedTuple):
+    """Before/after statistics for each dev item, indexed by ticket_id"""
+    summary: pd.DataFrame
+    theme_changes: pd.DataFrame  # Change in theme prevalence (share of feedback rows)
+    theme_p_values: pd.DataFrame  # Significance of the prevalence change
+    theme_q_values: pd.DataFrame  # theme_p_values adjusted for multiple comparisons
+    theme_sentiment_changes: pd.DataFrame  # Change in mean sentiment of rows mentioning the theme
+    theme_sentiment_p_values: pd.DataFrame  # Welch t-test of that change
+    theme_sentiment_q_values: pd.DataFrame  # theme_sentiment_p_values adjusted for multiple comparisons
+    theme_sentiment_mw_p_values: pd.DataFrame  # Mann-Whitney test of that change (NaN unless rank_tests)
+
+
+class ReleaseImpactEngine:
+    def __init__(self, dates: pd.Series, sentiment: Optional[pd.Series] = None,
+                 memberships: Optional[pd.DataFrame] = None):
+        """Index feedback rows by date
+
+        Args:
+            dates (pd.Series): Date of each feedback row
+            sentiment (pd.Series, optional): Signed sentiment per row, aligned by index
+            memberships (pd.DataFrame, optional): Boolean row x theme matrix, aligned by index
+        """
+        dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+        self.themes: List[str] = list(memberships.columns) if memberships is not None else []
+
+        if sentiment is not None:
+            scores = pd.to_numeric(sentiment.reindex(dates.index), errors='coerce').to_numpy(float)
+        else:
+            scores = np.full(len(dates), np.nan)
+        if memberships is not None:
+            matrix = memberships.reindex(dates.index).fillna(False).to_numpy(bool)
+        else:
+            matrix = np.zeros((len(dates), 0), dtype=bool)
+
+        valid = dates.notna().to_numpy()
+        timestamps = dates.to_numpy('datetime64[ns]')[valid]
+        scores, matrix = scores[valid], matrix[valid]
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, scores, matrix = timestamps[order], scores[order], matrix[order]
+
+        # Sorted rows, sliced per window by the rank tests and the bootstrap
+        self.row_dates, self.row_scores, self.row_themes = timestamps, scores, matrix
+
+        known = ~np.isnan(scores)
+        values = np.where(known, scores, 0.0)
+        per_row = np.column_stack([
+            np.ones(len(values)), known, values, values ** 2,
+            matrix, matrix & known[:, None], matrix * values[:, None], matrix * (values ** 2)[:, None],
+        ]).astype(float)
+
+        # One row of totals per distinct date, then running totals with a leading zero row
+        self.dates, starts = np.unique(timestamps, return_index=True)
+        totals = np.add.reduceat(per_row, starts, axis=0) if len(starts) else per_row[:0]
+        self.cumulative = np.vstack([np.zeros((1, per_row.shape[1])), np.cumsum(totals, axis=0)])
+        logger.info(f"Indexed {len(timestamps)} feedback rows over {len(self.dates)} distinct dates")
+
+    @classmethod
+    def from_results(cls, sentiment_results: Dict, csat_df: Optional[pd.DataFrame] = None,
+                     tickets_df: Optional[pd.DataFrame] = None) -> 'ReleaseImpactEngine':
+        """Build the index from TextAnalyzer.analyze_all results and the source frames"""
+        sources = [
+            (csat_df, 'survey_date', 'csat_sentiment', 'csat_themes'),
+            (tickets_df, 'created_date', 'ticket_sentiment', 'ticket_themes'),
+        ]
+        dates, sentiment, memberships = [], [], []
+        for df, date_column, sentiment_key, themes_key in sources:
+            if df is None or df.empty or date_column not in df.columns:
+                continue
+            dates.append(df[date_column])
+            scores = sentiment_results.get(sentiment_key)
+            sentiment.append(scores['sentiment_score'].reindex(df.index) if scores is not None
+                             else pd.Series(np.nan, index=df.index))
+            themes = sentiment_results.get(themes_key)
+            memberships.append(themes.reindex(df.index) if themes is not None else pd.DataFrame(index=df.index))
+
+        if not dates:
+            return cls(pd.Series([], dtype='datetime64[ns]'))
+        memberships = pd.concat(memberships, ignore_index=True)
+        return cls(
+            pd.concat(dates, ignore_index=True),
+            pd.concat(sentiment, ignore_index=True),
+            memberships.fillna(False).astype(bool)
+        )
+
+    def window_totals(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Totals of every cumulative column over each [start, end), one row per window"""
+        lo = np.searchsorted(self.dates, starts, side='left')
+        hi = np.searchsorted(self.dates, ends, side='left')
+        return self.cumulative[hi] - self.cumulative[lo]
+
+    def _block(self, totals: np.ndarray, block: int) -> np.ndarray:
+        """Per-theme columns of one statistic (rows, known, sum, sum of squares)"""
+        start = 4 + block * len(self.themes)
+        return totals[:, start:start + len(self.themes)]
+
+    @staticmethod
+    def _mean_var(count: np.ndarray, total: np.ndarray, total_sq: np.ndarray):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, np.nan)
+            var = np.where(count > 1, (total_sq - total * mean) / (count - 1), np.nan)
+        return mean, np.maximum(var, 0)
+
+    def _sample_tests(self, scores: np.ndarray, pre_bounds, post_bounds, bootstrap: int,
+                      confidence: float, rng: np.random.Generator, max_cells: int):
+        """Mann-Whitney p-values and bootstrap intervals per release, in blocks of releases
+
+        Each block is padded to its longest window, so at most max_cells values
+        are materialised at once.
+        """
+        (pre_lo, pre_hi), (post_lo, post_hi) = pre_bounds, post_bounds
+        width = max(int((pre_hi - pre_lo).max(initial=0)), int((post_hi - post_lo).max(initial=0)), 1)
+        block = max(1, max_cells // width)
+        p_values, ci_low, ci_high = (np.full(len(pre_lo), np.nan) for _ in range(3))
+        for first in range(0, len(pre_lo), block):
+            rows = slice(first, first + block)
+            before = pad_windows(scores, pre_lo[rows], pre_hi[rows])
+            after = pad_windows(scores, post_lo[rows], post_hi[rows])
+            p_values[rows] = mann_whitney_u(before, after)[1]
+            if bootstrap:
+                ci_low[rows], ci_high[rows] = bootstrap_mean_diff_ci(
+                    before, after, bootstrap, confidence, seed=rng.integers(2 ** 32), max_cells=max_cells
+                )
+        return p_values, ci_low, ci_high
+
+    def evaluate(self, dev_tickets_df: pd.DataFrame, before_days: float = 30, after_days: float = 30,
+                 date_column: str = 'target_release_date', rank_tests: bool = True, bootstrap: int = 0,
+                 confidence: float = 0.95, seed: Optional[int] = None,
+                 max_cells: int = 5_000_000) -> ReleaseImpact:
+        """Compare feedback before and after each dev item's release
+
+        Args:
+            dev_tickets_df (pd.DataFrame): Backlog with ticket_id and date_column
+            before_days (float): Length of the window ending at the release
+            after_days (float): Length of the window starting at the release
+            date_column (str): Column holding the release date
+            rank_tests (bool): Also run Mann-Whitney tests on the sentiment
+                scores, overall and per theme
+            bootstrap (int): Resamples for the confidence interval of the
+                sentiment change; 0 skips it
+            confidence (float): Level of the bootstrap interval
+            seed (int, optional): Seed for the bootstrap
+            max_cells (int): Values materialised at once by rank tests and bootstrap
+
+        Returns:
+            ReleaseImpact: Frames indexed by ticket_id; items without a release
+                date or without feedback on both sides get NaN statistics
+        """
+        start = time.perf_counter()
+        releases = pd.to_datetime(dev_tickets_df[date_column], errors='coerce').to_numpy('datetime64[ns]')
+        before = np.timedelta64(int(before_days * 86400e9), 'ns')
+        after = np.timedelta64(int(after_days * 86400e9), 'ns')
+
+        # NaT releases get empty windows
+        missing = np.isnat(releases)
+        releases = np.where(missing, np.datetime64(0, 'ns'), releases)
+        pre = self.window_totals(releases - before, releases)
+        post = self.window_totals(releases, releases + after)
+        pre[missing] = 0
+        post[missing] = 0
+
+        # The same windows as row ranges of the sorted feedback
+        pre_bounds = [np.searchsorted(self.row_dates, bound) for bound in (releases - before, releases)]
+        post_bounds = [np.searchsorted(self.row_dates, bound) for bound in (releases, releases + after)]
+        for bounds in (pre_bounds, post_bounds):
+            bounds[0][missing] = bounds[1][missing] = 0
+
+        mean_pre, var_pre = self._mean_var(pre[:, _KNOWN], pre[:, _SUM], pre[:, _SUM_SQ])
+        mean_post, var_post = self._mean_var(post[:, _KNOWN], post[:, _SUM], post[:, _SUM_SQ])
+        t_stat, p_value = welch_t_test(mean_pre, var_pre, pre[:, _KNOWN], mean_post, var_post, post[:, _KNOWN])
+
+        index = pd.Index(dev_tickets_df['ticket_id'], name='ticket_id')
+        summary = pd.DataFrame({
+            'release_date': pd.to_datetime(dev_tickets_df[date_column], errors='coerce').to_numpy(),
+            'n_before': pre[:, _ROWS].astype(np.int64),
+            'n_after': post[:, _ROWS].astype(np.int64),
+            'sentiment_before': mean_pre,
+            'sentiment_after': mean_post,
+            'sentiment_change': mean_post - mean_pre,
+            't_stat': t_stat,
+            'p_value': p_value,
+            'q_value': benjamini_hochberg(p_value),
+        }, index=index)
+
+        rng = np.random.default_rng(seed)
+        summary['mw_p_value'] = summary['ci_low'] = summary['ci_high'] = np.nan
+        theme_mw_p = np.full((len(index), len(self.themes)), np.nan)
+        if rank_tests or bootstrap:
+            mw_p, summary['ci_low'], summary['ci_high'] = self._sample_tests(
+                self.row_scores, pre_bounds, post_bounds, bootstrap, confidence, rng, max_cells
+            )
+            if rank_tests:
+                summary['mw_p_value'] = mw_p
+        if rank_tests:
+            for column, theme in enumerate(self.themes):
+                theme_scores = np.where(self.row_themes[:, column], self.row_scores, np.nan)
+                theme_mw_p[:, column] = self._sample_tests(
+                    theme_scores, pre_bounds, post_bounds, 0, confidence, rng, max_cells
+                )[0]
+
+        # Theme prevalence and theme sentiment
+        def frame(values):
+            return pd.DataFrame(values, index=index, columns=self.themes)
+
+        count_pre, count_post = self._block(pre, _ROWS), self._block(post, _ROWS)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share_pre = count_pre / pre[:, [_ROWS]]
+            share_post = count_post / post[:, [_ROWS]]
+        _, prevalence_p = two_proportion_z_test(count_pre, pre[:, [_ROWS]], count_post, post[:, [_ROWS]])
+
+        moments = (_KNOWN, _SUM, _SUM_SQ)
+        theme_mean_pre, theme_var_pre = self._mean_var(*(self._block(pre, block) for block in moments))
+        theme_mean_post, theme_var_post = self._mean_var(*(self._block(post, block) for block in moments))
+        _, theme_sentiment_p = welch_t_test(
+            theme_mean_pre, theme_var_pre, self._block(pre, _KNOWN),
+            theme_mean_post, theme_var_post, self._block(post, _KNOWN)
+        )
+
+        logger.info(
+            f"Evaluated {len(summary)} releases x {len(self.themes)} themes "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return ReleaseImpact(
+            summary=summary,
+            theme_changes=frame(share_post - share_pre),
+            theme_p_values=frame(prevalence_p),
+            theme_q_values=frame(benjamini_hochberg(prevalence_p)),
+            theme_sentiment_changes=frame(theme_mean_post - theme_mean_pre),
+            theme_sentiment_p_values=frame(theme_sentiment_p),
+            theme_sentiment_q_values=frame(benjamini_hochberg(theme_sentiment_p)),
+            theme_sentiment_mw_p_values=frame(theme_mw_p),
+        )
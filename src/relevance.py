@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+# Free-text relevance of backlog items to the feedback corpus.
+#
+# Usage:
+#   from src.relevance import RelevanceIndex
+#
+#   index = RelevanceIndex.load_or_build('data/cache/relevance', feedback_text, sentiment)
+#   relevance_df = index.score(dev_tickets_df, threshold=0.1)
+#   # ticket_id, matching_feedback, relevance, weighted_relevance, mean_sentiment
+#
+#   ImpactAnalyzer().analyze_relevance(csat_df, tickets_df, dev_tickets_df, analysis_results)
+#
+# A TF-IDF matrix (one L2-normalized sparse row per feedback text) is built
+# once and saved with the vectorizer's vocabulary and idf weights (JSON and
+# NumPy files, nothing unpickled on load); it is rebuilt only when the
+# feedback text changes. Backlog items (title and description) are
+# vectorized with the same vocabulary, and cosine similarities come from
+# one sparse product per chunk of feedback rows, so memory is bounded by
+# chunk_size rather than the corpus. An item matches a text when their
+# similarity reaches threshold. weighted_relevance sums the similarities of
+# matching texts, doubling those with negative sentiment, as theme weights do.
+
+DEFAULT_INDEX_PATH = Path('data/cache/relevance')
+# Vectorizer settings saved with the index so load rebuilds the same transform
+VECTORIZER_SETTINGS = ('stop_words', 'sublinear_tf', 'ngram_range', 'lowercase', 'norm')
+
+
+class RelevanceIndex:
+    def __init__(self, vectorizer: TfidfVectorizer, matrix: sparse.csr_matrix,
+                 sentiment: Optional[np.ndarray] = None, fingerprint: Optional[str] = None):
+        """Wrap a fitted vectorizer and its feedback matrix; see build and load
+
+        Args:
+            vectorizer (TfidfVectorizer): Fitted on the feedback text
+            matrix (sparse.csr_matrix): TF-IDF rows of the feedback text
+            sentiment (np.ndarray, optional): Signed sentiment per row (NaN if unknown)
+            fingerprint (str, optional): Hash of the text the matrix was built from
+        """
+        self.vectorizer = vectorizer
+        self.matrix = matrix.tocsr()
+        self.sentiment = (
+            np.asarray(sentiment, dtype=float) if sentiment is not None else np.full(matrix.shape[0], np.nan)
+        )
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @staticmethod
+    def fingerprint_of(texts: pd.Series) -> str:
+        """Hash identifying a feedback corpus"""
+        digest = hashlib.sha256()
+        for text in texts.astype(object).fillna(''):
+            digest.update(str(text).encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, texts: pd.Series, sentiment: Optional[pd.Series] = None, max_features: int = 200_000,
+              ngram_range=(1, 2), min_df: int = 2) -> 'RelevanceIndex':
+        """Fit TF-IDF on the feedback text
+
+        Args:
+            texts (pd.Series): Feedback text
+            sentiment (pd.Series, optional): Signed sentiment per text, aligned by index
+            max_features (int): Vocabulary size limit
+            ngram_range (tuple): Word n-gram lengths
+            min_df (int): Minimum number of texts a term must appear in; lowered
+                to 1 for corpora with fewer texts
+        """
+        start = time.perf_counter()
+        texts = texts.astype(object).fillna('')
+        vectorizer = TfidfVectorizer(
+            stop_words='english', sublinear_tf=True, ngram_range=ngram_range,
+            min_df=min_df if len(texts) >= min_df else 1, max_features=max_features, dtype=np.float32
+        )
+        matrix = vectorizer.fit_transform(texts)
+        scores = None
+        if sentiment is not None:
+            scores = pd.to_numeric(sentiment.reindex(texts.index), errors='coerce').to_numpy(float)
+
+        index = cls(vectorizer, matrix, scores, cls.fingerprint_of(texts))
+        logger.info(
+            f"Built TF-IDF index of {matrix.shape[0]} texts x {matrix.shape[1]} terms "
+            f"({matrix.nnz} non-zeros) in {time.perf_counter() - start:.2f}s"
+        )
+        return index
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """Write the matrix, sentiment, vocabulary and idf weights to the directory path"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(path / 'matrix.npz', self.matrix)
+        np.save(path / 'sentiment.npy', self.sentiment)
+        np.save(path / 'idf.npy', self.vectorizer.idf_)
+        vocabulary = {term: int(column) for term, column in self.vectorizer.vocabulary_.items()}
+        (path / 'vocabulary.json').write_text(json.dumps(vocabulary))
+        settings = {name: self.vectorizer.get_params()[name] for name in VECTORIZER_SETTINGS}
+        (path / 'meta.json').write_text(json.dumps({
+            'rows': len(self), 'fingerprint': self.fingerprint, 'vectorizer': settings
+        }))
+        logger.info(f"Saved TF-IDF index to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH) -> 'RelevanceIndex':
+        """Read an index written by save"""
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        settings = dict(meta['vectorizer'])
+        settings['ngram_range'] = tuple(settings['ngram_range'])
+        vectorizer = TfidfVectorizer(
+            vocabulary=json.loads((path / 'vocabulary.json').read_text()), dtype=np.float32, **settings
+        )
+        vectorizer.idf_ = np.load(path / 'idf.npy')
+        return cls(
+            vectorizer, sparse.load_npz(path / 'matrix.npz'), np.load(path / 'sentiment.npy'),
+            meta.get('fingerprint')
+        )
+
+    @classmethod
+    def load_or_build(cls, path, texts: pd.Series, sentiment: Optional[pd.Series] = None,
+                      **options) -> 'RelevanceIndex':
+        """Load the saved index if it was built from the same texts, otherwise build and save one
+
+        Sentiment is taken from the arguments either way, since it changes with the model.
+        """
+        path = Path(path)
+        fingerprint = cls.fingerprint_of(texts)
+        if (path / 'meta.json').exists():
+            try:
+                index = cls.load(path)
+                if index.fingerprint == fingerprint:
+                    if sentiment is not None:
+                        index.sentiment = pd.to_numeric(
+                            sentiment.reindex(texts.index), errors='coerce'
+                        ).to_numpy(float)
+                    logger.info(f"Loaded TF-IDF index of {len(index)} texts from {path}")
+                    return index
+                logger.info("Feedback text changed, rebuilding TF-IDF index")
+            except Exception as e:
+                logger.warning(f"Could not load TF-IDF index from {path}, rebuilding: {str(e)}")
+        index = cls.build(texts, sentiment, **options)
+        index.save(path)
+        return index
+
+    def score(self, dev_tickets_df: pd.DataFrame, threshold: float = 0.1,
+              chunk_size: int = 100_000) -> pd.DataFrame:
+        """Relevance of each backlog item to the feedback
+
+        Args:
+            dev_tickets_df (pd.DataFrame): Backlog with ticket_id, title and
+                optionally description
+            threshold (float): Cosine similarity at which a text counts as matching
+            chunk_size (int): Feedback rows multiplied at once
+
+        Returns:
+            pd.DataFrame: ticket_id, matching_feedback (count), relevance (sum of
+                matching similarities), weighted_relevance and mean_sentiment of
+                the matching texts, in backlog order
+        """
+        start = time.perf_counter()
+        text = dev_tickets_df['title'].astype('string').fillna('')
+        if 'description' in dev_tickets_df.columns:
+            text = text.str.cat(dev_tickets_df['description'].astype('string'), sep=' ', na_rep='')
+        queries = self.vectorizer.transform(text.astype(object)).T.tocsc()
+
+        n_items = len(dev_tickets_df)
+        counts = np.zeros(n_items, dtype=np.int64)
+        relevance = np.zeros(n_items)
+        weighted = np.zeros(n_items)
+        sentiment_sums = np.zeros(n_items)
+        sentiment_counts = np.zeros(n_items, dtype=np.int64)
+
+        known = ~np.isnan(self.sentiment)
+        weights = np.where(known & (self.sentiment < 0), 2.0, 1.0)
+        scores = np.where(known, self.sentiment, 0.0)
+        for first in range(0, len(self), chunk_size):
+            rows = slice(first, first + chunk_size)
+            similarity = (self.matrix[rows] @ queries).tocsr()
+            similarity.data[similarity.data < threshold] = 0
+            similarity.eliminate_zeros()
+            matched = similarity.copy()
+            matched.data[:] = 1
+
+            counts += np.asarray(matched.sum(axis=0), dtype=np.int64).ravel()
+            relevance += np.asarray(similarity.sum(axis=0)).ravel()
+            weighted += similarity.T @ weights[rows]
+            sentiment_sums += matched.T @ scores[rows]
+            sentiment_counts += (matched.T @ known[rows].astype(np.int64)).astype(np.int64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_sentiment = np.where(sentiment_counts > 0, sentiment_sums / sentiment_counts, np.nan)
+        relevance_df = pd.DataFrame({
+            'ticket_id': dev_tickets_df['ticket_id'].to_numpy(),
+            'matching_feedback': counts,
+            'relevance': relevance,
+            'weighted_relevance': weighted,
+            'mean_sentiment': mean_sentiment,
+        })
+        logger.info(
+            f"Scored {n_items} backlog items against {len(self)} feedback texts "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return relevance_df
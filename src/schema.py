@@ -0,0 +1,178 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column types for the processed datasets.
+#
+# Usage:
+#   from src.schema import CSAT_SCHEMA, apply_schema
+#
+#   df = apply_schema(df, CSAT_SCHEMA)
+#
+# Schemas map column name -> dtype. 'datetime' parses dates, 'category' makes
+# a categorical, integer dtypes are used as-is when the column has no missing
+# values and fall back to the nullable equivalent (e.g. 'Int8') otherwise.
+# Columns not named in the schema are left untouched. Writing the result to
+# Parquet preserves these types for the next reader.
+#
+#   df = pd.read_csv(path, **csv_read_options(TICKET_SCHEMA))  # typed while parsing
+#   df = compact_frame(df, TICKET_SCHEMA)    # schema + downcasts + low-cardinality categoricals
+#   log_memory('tickets', df)                # typed vs. untyped (object/int64) footprint
+
+CSAT_SCHEMA: Dict[str, str] = {
+    'response_id': 'string[pyarrow]',
+    'survey_date': 'datetime',
+    'satisfaction_score': 'int8',
+    'reason_for_rating': 'string[pyarrow]',
+    'feature_feedback': 'string[pyarrow]',
+    'improvement_suggestions': 'string[pyarrow]',
+    'feedback_text': 'string[pyarrow]',
+}
+
+TICKET_SCHEMA: Dict[str, str] = {
+    'ticket_id': 'string[pyarrow]',
+    'created_date': 'datetime',
+    'status': 'category',
+    'priority': 'category',
+    'category': 'category',
+    'subject': 'string[pyarrow]',
+    'description': 'string[pyarrow]',
+    'resolution_notes': 'string[pyarrow]',
+}
+
+
+DEV_SCHEMA: Dict[str, str] = {
+    'ticket_id': 'string[pyarrow]',
+    'title': 'string[pyarrow]',
+    'description': 'string[pyarrow]',
+    'status': 'category',
+    'priority': 'category',
+    'created_date': 'datetime',
+    'target_release_date': 'datetime',
+    'story_points': 'int8',
+    'assigned_team': 'category',
+}
+
+
+def has_type(series: pd.Series, dtype: str) -> bool:
+    """Whether series already holds the schema type dtype"""
+    if dtype == 'datetime':
+        return pd.api.types.is_datetime64_any_dtype(series)
+    if dtype == 'category':
+        return isinstance(series.dtype, pd.CategoricalDtype)
+    if dtype.lower().startswith(('int', 'uint')):
+        # The nullable form only counts when it holds missing values, as apply_schema would leave it
+        nullable = 'UInt' + dtype[4:] if dtype.lower().startswith('uint') else 'Int' + dtype[3:]
+        if series.dtype == pd.api.types.pandas_dtype(nullable):
+            return bool(series.isna().any())
+        return series.dtype == pd.api.types.pandas_dtype(dtype)
+    return series.dtype == pd.api.types.pandas_dtype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """Return df with the schema's columns converted to their declared types
+
+    Columns that already have their type (e.g. read back from Parquet) are
+    left as they are, and only converted columns are replaced.
+    """
+    df = df.copy(deep=False)
+    for col, dtype in schema.items():
+        if col not in df.columns or has_type(df[col], dtype):
+            continue
+        if dtype == 'datetime':
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif dtype == 'category':
+            # Rebuild categories so concatenated frames get the union
+            df[col] = df[col].astype('string').astype('category')
+        elif dtype.lower().startswith(('int', 'uint')):
+            values = pd.to_numeric(df[col], errors='coerce')
+            nullable = 'UInt' + dtype[4:] if dtype.lower().startswith('uint') else 'Int' + dtype[3:]
+            df[col] = values.astype(nullable if values.isna().any() else dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def csv_read_options(schema: Dict[str, str], columns: Optional[List[str]] = None,
+                     header: Optional[Iterable[str]] = None) -> Dict:
+    """read_csv keyword arguments that parse the schema's columns directly into their types
+
+    Integer columns are read as the nullable equivalent so missing values do
+    not fail the read; apply_schema narrows them afterwards. When header (the
+    file's column names) is given, schema columns absent from it are left out,
+    so a file missing one still reads.
+    """
+    present = set(header) if header is not None else None
+    wanted = [
+        col for col in schema
+        if (columns is None or col in columns) and (present is None or col in present)
+    ]
+    dtypes, dates = {}, []
+    for col in wanted:
+        dtype = schema[col]
+        if dtype == 'datetime':
+            dates.append(col)
+        elif dtype.lower().startswith(('int', 'uint')):
+            dtypes[col] = 'UInt' + dtype[4:] if dtype.lower().startswith('uint') else 'Int' + dtype[3:]
+        else:
+            dtypes[col] = dtype
+    return {'usecols': columns, 'dtype': dtypes, 'parse_dates': dates}
+
+
+def compact_frame(df: pd.DataFrame, schema: Optional[Dict[str, str]] = None,
+                  category_ratio: float = 0.5) -> pd.DataFrame:
+    """Apply schema, then shrink the remaining columns
+
+    Numeric columns outside the schema are downcast to the smallest type that
+    holds them, and text columns whose distinct values make up less than
+    category_ratio of the rows become categoricals.
+    """
+    df = apply_schema(df, schema) if schema else df.copy(deep=False)
+    for col in df.columns:
+        if schema and col in schema:
+            continue
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='float')
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=True) < category_ratio * len(series):
+                df[col] = series.astype('category')
+    return df
+
+
+def untyped_memory(df: pd.DataFrame) -> int:
+    """Bytes df would take with plain object and 64-bit columns (pandas' defaults)"""
+    total = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            total += len(series) * 8
+        else:
+            total += int(series.astype(object).memory_usage(index=False, deep=True))
+    return total
+
+
+def log_memory(name: str, df: pd.DataFrame, original: Optional[pd.DataFrame] = None) -> Tuple[int, int]:
+    """Log and return (bytes before, bytes after) compaction
+
+    Both sides are measured when original (the frame as read) is given;
+    otherwise the before side is the untyped_memory estimate and is logged as such.
+    """
+    after = int(df.memory_usage(deep=True).sum())
+    if original is not None:
+        before = int(original.memory_usage(deep=True).sum())
+        label = 'as read'
+    else:
+        before = untyped_memory(df)
+        label = 'estimated untyped'
+    ratio = before / after if after else float('inf')
+    logger.info(
+        f"{name}: {len(df)} rows use {after / 1024 ** 2:.2f} MB "
+        f"({label} {before / 1024 ** 2:.2f} MB, {ratio:.1f}x smaller)"
+    )
+    return before, after
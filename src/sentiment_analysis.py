@@ -1,16 +1,84 @@
 import pandas as pd
 import numpy as np
-from transformers import pipeline
 import logging
+from collections import Counter
+from typing import Iterable, Iterator, Optional, Tuple
+from src.batch_inference import BatchInferenceEngine
+from src.model_registry import ModelRegistry, get_registry
+from src.sentiment_pool import SentimentWorkerPool
+from src.streaming import StreamingScorer
+from src.theme_matcher import ThemeMatcher
+from src.theme_taxonomy import get_taxonomy
+from src.theme_stats import ThemeStatistics
+from src.sentiment_cache import DEFAULT_CACHE_PATH, SentimentCache, describe_model
 
 logger = logging.getLogger(__name__)
 
 class TextAnalyzer:
-    def __init__(self):
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
+    def __init__(self, batch_size: int = 32, max_length: int = 512,
+                 model_name: Optional[str] = None, registry: Optional[ModelRegistry] = None,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH, cache_max_entries: int = 1_000_000,
+                 taxonomy_path: Optional[str] = None, backend: str = 'pytorch',
+                 workers: Optional[int] = 1, torch_threads: Optional[int] = 1):
+        """Initialize the sentiment model and its batched inference engine
+
+        Args:
+            batch_size (int): Number of texts scored per forward pass
+            max_length (int): Maximum number of tokens kept per text
+            model_name (str, optional): Sentiment model; None uses the pipeline default
+            registry (ModelRegistry, optional): Where to get the model from; defaults
+                to the process-wide registry so the model is only loaded once
+            cache_path (str, optional): SQLite file for cached sentiment results
+                across runs; None disables caching
+            cache_max_entries (int): LRU bound on the number of cached results
+            taxonomy_path (str, optional): Theme taxonomy file; defaults to
+                config/themes.json
+            backend (str): 'pytorch', 'quantized' (int8) or 'onnx' (ONNX Runtime);
+                check a faster backend with ModelRegistry.parity_check first
+            workers (int, optional): Sentiment worker processes, each loading the
+                model once; 1 scores in this process, None uses every CPU
+                divided by torch_threads. Results match the serial path.
+            torch_threads (int, optional): torch threads per worker process
+        """
+        self.registry = registry or get_registry()
+        self.cache = SentimentCache(cache_path, cache_max_entries) if cache_path else None
+        if workers == 1:
+            self.sentiment_analyzer = self.registry.get("sentiment-analysis", model_name, backend)
+            self.inference_engine = BatchInferenceEngine(
+                self.sentiment_analyzer,
+                batch_size=batch_size,
+                max_length=max_length
+            )
+            self.model_name, self.model_version = describe_model(self.sentiment_analyzer)
+        else:
+            # The model lives in the worker processes only
+            self.sentiment_analyzer = None
+            self.inference_engine = SentimentWorkerPool(
+                workers, model_name, backend, batch_size, max_length, torch_threads
+            )
+            self.model_name, self.model_version = self.inference_engine.describe_model()
+        if backend != 'pytorch':
+            # Scores differ slightly between backends, so they are cached separately
+            self.model_version = f"{self.model_version}+{backend}"
+        self.taxonomy = get_taxonomy(taxonomy_path)
+        
+    def close(self):
+        """Stop sentiment worker processes, if any"""
+        if isinstance(self.inference_engine, SentimentWorkerPool):
+            self.inference_engine.close()
+        
+    @property
+    def theme_matcher(self) -> ThemeMatcher:
+        """Shared compiled matcher, picking up edits to the taxonomy file"""
+        return self.taxonomy.matcher
         
     def analyze_all(self, csat_df, tickets_df):
-        """Analyze sentiment and themes in all text data"""
+        """Analyze sentiment and themes in all text data
+
+        The sentiment frames and the boolean theme-membership frames are
+        indexed like their source DataFrame, e.g.
+        ``csat_df.join(results['csat_sentiment'])`` attaches the scores.
+        """
         try:
             # Combine feedback from both sources
             csat_text = self._prepare_csat_text(csat_df)
@@ -20,80 +88,239 @@ class TextAnalyzer:
             csat_sentiment = self._analyze_sentiment(csat_text)
             ticket_sentiment = self._analyze_sentiment(ticket_text)
             
-            # Extract themes
-            themes = self._extract_themes(csat_text + ticket_text)
+            # Match themes per row, then list those present anywhere
+            matcher = self.theme_matcher
+            csat_themes = matcher.match(csat_text)
+            ticket_themes = matcher.match(ticket_text)
+            themes = [
+                theme for theme in matcher.themes
+                if csat_themes[theme].any() or ticket_themes[theme].any()
+            ]
+            
+            # Per-theme counts, sentiment and monthly frequencies in one pass
+            theme_stats = ThemeStatistics(matcher.themes)
+            theme_stats.add(csat_themes, csat_sentiment['sentiment_score'], self._column(csat_df, 'survey_date'))
+            theme_stats.add(ticket_themes, ticket_sentiment['sentiment_score'], self._column(tickets_df, 'created_date'))
             
             return {
                 'csat_sentiment': csat_sentiment,
                 'ticket_sentiment': ticket_sentiment,
-                'themes': themes
+                'csat_themes': csat_themes,
+                'ticket_themes': ticket_themes,
+                'themes': themes,
+                'theme_stats': theme_stats
             }
             
         except Exception as e:
             logger.error(f"Error in text analysis: {str(e)}")
             raise
     
-    def _prepare_csat_text(self, df):
-        """Prepare CSAT text for analysis"""
-        texts = []
-        if not df.empty:
-            # Combine relevant text columns
-            text_columns = ['reason_for_rating', 'feature_feedback', 'improvement_suggestions']
-            for _, row in df.iterrows():
-                combined_text = ' '.join(str(row[col]) for col in text_columns if col in row)
-                if combined_text.strip():
-                    texts.append(combined_text)
-        return texts
+    def iter_chunk_analysis(self, chunks: Iterable[pd.DataFrame], source: str,
+                            theme_stats: Optional[ThemeStatistics] = None
+                            ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Analyze a stream of CSAT ('csat') or ticket ('tickets') chunks one at a time
+        
+        Yields:
+            tuple: (sentiment, theme memberships) for each chunk, indexed like
+                   the chunk. theme_stats, if given, is updated as chunks pass.
+        """
+        sources = {
+            'csat': (self._prepare_csat_text, 'survey_date'),
+            'tickets': (self._prepare_ticket_text, 'created_date'),
+        }
+        if source not in sources:
+            raise ValueError(f"Unknown source {source!r}, expected one of {list(sources)}")
+        prepare, date_column = sources[source]
+        
+        for chunk in chunks:
+            text = prepare(chunk)
+            sentiment = self._analyze_sentiment(text)
+            memberships = self.theme_matcher.match(text)
+            if theme_stats is not None:
+                theme_stats.add(memberships, sentiment['sentiment_score'], self._column(chunk, date_column))
+            yield sentiment, memberships
+    
+    def analyze_chunks(self, csat_chunks: Iterable[pd.DataFrame] = (),
+                       ticket_chunks: Iterable[pd.DataFrame] = ()):
+        """Analyze chunked CSAT and ticket data with bounded memory
+        
+        Only aggregates are kept, so peak memory depends on the chunk size,
+        not on the input size. The result has the same 'themes' and
+        'theme_stats' entries as analyze_all, plus per-source sentiment
+        totals under 'sentiment_summary'.
+        """
+        try:
+            theme_stats = ThemeStatistics(self.theme_matcher.themes)
+            summary = {}
+            for source, chunks in (('csat', csat_chunks), ('tickets', ticket_chunks)):
+                rows, total, labels = 0, 0.0, Counter()
+                for sentiment, _ in self.iter_chunk_analysis(chunks, source, theme_stats):
+                    rows += len(sentiment)
+                    total += float(sentiment['sentiment_score'].sum())
+                    labels.update(sentiment['label'].value_counts().to_dict())
+                summary[source] = {
+                    'rows': rows,
+                    'mean_sentiment': total / rows if rows else float('nan'),
+                    'labels': dict(labels),
+                }
+            
+            themes = [theme for theme, count in zip(theme_stats.themes, theme_stats.counts) if count > 0]
+            return {
+                'themes': themes,
+                'theme_stats': theme_stats,
+                'sentiment_summary': summary
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in chunked text analysis: {str(e)}")
+            raise
+    
+    def feedback_text(self, csat_df, tickets_df) -> pd.Series:
+        """CSAT and ticket text in one Series indexed by (source, source row)
+
+        The text is the one analyze_all scores, so its csat_* and ticket_*
+        results concatenated with keys ['csat', 'tickets'] line up with it.
+        """
+        return pd.concat(
+            [self._prepare_csat_text(csat_df), self._prepare_ticket_text(tickets_df)], keys=['csat', 'tickets']
+        )
+    
+    def _prepare_csat_text(self, df) -> pd.Series:
+        """Prepare CSAT text for analysis, indexed by source row"""
+        text_columns = ['reason_for_rating', 'feature_feedback', 'improvement_suggestions']
+        return self._combine_text_columns(df, text_columns)
+    
+    def _prepare_ticket_text(self, df) -> pd.Series:
+        """Prepare support ticket text for analysis, indexed by source row"""
+        text_columns = ['subject', 'description']
+        return self._combine_text_columns(df, text_columns)
     
-    def _prepare_ticket_text(self, df):
-        """Prepare support ticket text for analysis"""
-        texts = []
-        if not df.empty:
-            # Combine relevant text columns
-            text_columns = ['subject', 'description']
-            for _, row in df.iterrows():
-                combined_text = ' '.join(str(row[col]) for col in text_columns if col in row)
-                if combined_text.strip():
-                    texts.append(combined_text)
-        return texts
+    @staticmethod
+    def _column(df, column):
+        return df[column] if df is not None and column in df.columns else None
     
-    def _analyze_sentiment(self, texts):
-        """Analyze sentiment in a list of texts"""
-        if not texts:
-            return []
+    def _combine_text_columns(self, df, text_columns) -> pd.Series:
+        """Join the available text columns row-wise, skipping missing values
+
+        Rows with no text at all are dropped; the remaining rows keep the
+        DataFrame index so results can be joined back onto the source data.
+        """
+        columns = [col for col in text_columns if df is not None and col in df.columns]
+        if df is None or df.empty or not columns:
+            return pd.Series(dtype='string', name='text')
+        
+        parts = [df[col].astype('string').str.strip() for col in columns]
+        combined = parts[0].str.cat(parts[1:], sep=' ', na_rep='') if len(parts) > 1 else parts[0].fillna('')
+        
+        # Missing columns leave repeated separators behind
+        combined = combined.str.replace(r'\s+', ' ', regex=True).str.strip()
+        return combined[combined != ''].rename('text')
+    
+    def _analyze_sentiment(self, texts) -> pd.DataFrame:
+        """Analyze sentiment in a series (or list) of texts
+
+        Returns:
+            pd.DataFrame: label, score and signed sentiment_score (positive
+                          minus negative confidence) indexed like the input
+        """
+        if not isinstance(texts, pd.Series):
+            texts = pd.Series(list(texts), dtype='object')
+        columns = ['label', 'score', 'sentiment_score']
+        if texts.empty:
+            return pd.DataFrame(columns=columns, index=texts.index)
         
         try:
-            results = []
-            for text in texts:
-                if isinstance(text, str) and text.strip():
-                    sentiment = self.sentiment_analyzer(text[:512])[0]  # Truncate to max length
-                    results.append(sentiment)
-            return results
+            results = self._score_texts(texts.tolist())
+            scored = [(i, r) for i, r in zip(texts.index, results) if r is not None]
+            sentiment = pd.DataFrame(
+                [r for _, r in scored],
+                index=pd.Index([i for i, _ in scored], name=texts.index.name),
+                columns=['label', 'score']
+            )
+            sentiment['sentiment_score'] = self._signed_scores(sentiment['label'], sentiment['score'])
+            return sentiment
         except Exception as e:
             logger.error(f"Error in sentiment analysis: {str(e)}")
-            return []
+            return pd.DataFrame(columns=columns)
+    
+    @staticmethod
+    def _signed_scores(labels: pd.Series, scores: pd.Series) -> pd.Series:
+        """Map (label, confidence) to a score in [-1, 1]; unknown labels score 0"""
+        upper = labels.astype(str).str.upper()
+        sign = np.where(upper.str.startswith('POS'), 1.0, np.where(upper.str.startswith('NEG'), -1.0, 0.0))
+        return pd.Series(sign * scores.astype(float).to_numpy(), index=labels.index)
+    
+    def _score_texts(self, texts):
+        """Score texts in input order, only sending cache misses to the model"""
+        texts = list(texts)
+        if self.cache is None:
+            # Batched and token-truncated; results come back in input order
+            return self.inference_engine.run(texts)
+
+        results = [None] * len(texts)
+        keys = [
+            self.cache.key(text, self.model_name, self.model_version)
+            if isinstance(text, str) and text.strip() else None
+            for text in texts
+        ]
+        cached = self.cache.get_many(key for key in keys if key is not None)
+
+        # Score each distinct uncached text once
+        to_score = {}
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            if key in cached:
+                results[i] = cached[key]
+            else:
+                to_score.setdefault(key, texts[i])
+
+        scored = dict(zip(to_score, self.inference_engine.run(list(to_score.values()))))
+        self.cache.put_many({key: result for key, result in scored.items() if result is not None})
+        for i, key in enumerate(keys):
+            if key in scored:
+                results[i] = scored[key]
+
+        logger.info(f"Sentiment cache: {len(cached)} hits, {len(to_score)} misses")
+        return results
+
+    def score_texts(self, texts) -> list:
+        """Sentiment of individual texts, for callers without a DataFrame
+
+        Returns:
+            list: {'label', 'score', 'sentiment_score'} per text in input order,
+                  None for empty or non-string texts
+        """
+        results = self._score_texts(texts)
+        scored = [result for result in results if result is not None]
+        if not scored:
+            return results
+        labels = pd.Series([result['label'] for result in scored])
+        signed = self._signed_scores(labels, pd.Series([result['score'] for result in scored]))
+        signed = iter(signed.tolist())
+        return [
+            None if result is None else
+            {'label': result['label'], 'score': float(result['score']), 'sentiment_score': next(signed)}
+            for result in results
+        ]
+
+    def streaming_scorer(self, max_batch_size: Optional[int] = None, max_wait_ms: float = 10,
+                         max_queue: int = 0) -> StreamingScorer:
+        """Micro-batching scorer for texts arriving one at a time (see src.streaming)
+
+        max_batch_size defaults to the inference batch size.
+        """
+        return StreamingScorer(
+            self.score_texts, max_batch_size or self.inference_engine.batch_size, max_wait_ms, max_queue
+        )
+
+    def extract_themes(self, text: str):
+        """Themes mentioned in a single text, e.g. a development item"""
+        return self.theme_matcher.themes_in(text)
     
     def _extract_themes(self, texts):
         """Extract common themes from texts"""
-        # Define common themes to look for
-        common_themes = {
-            'email': ['email', 'gmail', 'outlook'],
-            'mobile': ['mobile', 'app', 'phone'],
-            'performance': ['speed', 'slow', 'fast', 'performance'],
-            'ui': ['interface', 'ui', 'design', 'layout'],
-            'integration': ['integration', 'sync', 'connect'],
-            'support': ['support', 'help', 'assistance']
-        }
-        
-        # Count theme occurrences
-        theme_counts = {theme: 0 for theme in common_themes}
-        
-        for text in texts:
-            if isinstance(text, str):
-                text_lower = text.lower()
-                for theme, keywords in common_themes.items():
-                    if any(keyword in text_lower for keyword in keywords):
-                        theme_counts[theme] += 1
+        memberships = self.theme_matcher.match(texts)
         
         # Return themes that appear at least once
-        return [theme for theme, count in theme_counts.items() if count > 0]
+        return [theme for theme, present in memberships.any().items() if present]
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Persistent, content-addressed cache of sentiment results.
+#
+# Usage:
+#   from src.sentiment_cache import SentimentCache
+#
+#   cache = SentimentCache('data/cache/sentiment.sqlite', max_entries=2_000_000)
+#   keys = [cache.key(text, model_name, model_version) for text in texts]
+#   found = cache.get_many(keys)                # {key: {'label': ..., 'score': ...}}
+#   cache.put_many({key: result, ...})          # evicts least recently used rows
+#
+# Keys hash the normalized text together with the model name and version, so
+# switching models never returns stale scores. SQLiteLRUCache holds the
+# storage and eviction; other caches (e.g. embeddings) subclass it with
+# their own table and columns.
+
+DEFAULT_CACHE_PATH = Path('data/cache/sentiment.sqlite')
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 900
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and collapse whitespace so trivially different texts share a key"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def describe_model(pipe) -> Tuple[str, str]:
+    """Return (name, version) identifying the model behind a transformers pipeline"""
+    config = getattr(getattr(pipe, 'model', None), 'config', None)
+    name = getattr(config, '_name_or_path', None) or type(pipe).__name__
+    version = getattr(config, '_commit_hash', None) or getattr(config, 'transformers_version', None) or 'unknown'
+    return str(name), str(version)
+
+
+class SQLiteLRUCache:
+    """Content-addressed SQLite store with least-recently-used eviction
+
+    Subclasses name the table and its value columns and convert values to
+    and from rows.
+    """
+    table = 'cache'
+    columns: Tuple[Tuple[str, str], ...] = (('value', 'BLOB'),)  # (name, SQL type)
+
+    def __init__(self, path, max_entries: int = 1_000_000):
+        """Open (or create) the cache database
+
+        Args:
+            path: SQLite file location
+            max_entries (int): Upper bound on cached values; least recently
+                used entries are evicted beyond it
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        value_columns = ', '.join(f"{name} {sql_type} NOT NULL" for name, sql_type in self.columns)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"key TEXT PRIMARY KEY, {value_columns}, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(text: str, model_name: str, model_version: str) -> str:
+        payload = f"{model_name}\x00{model_version}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _to_row(self, value) -> Tuple:
+        return (value,)
+
+    def _from_row(self, row: Tuple):
+        return row[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Look up values for keys, refreshing their LRU position"""
+        keys = list(dict.fromkeys(keys))
+        names = ', '.join(name for name, _ in self.columns)
+        found = {}
+        with self._lock:
+            for batch in _batches(keys):
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, {names} FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update({row[0]: self._from_row(row[1:]) for row in rows})
+
+            now = time.time()
+            self._conn.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+            )
+            self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, values: Dict[str, Any]):
+        """Store values keyed by cache key, then evict down to max_entries"""
+        if not values:
+            return
+        now = time.time()
+        names = ', '.join(name for name, _ in self.columns)
+        placeholders = ', '.join('?' * (len(self.columns) + 2))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {names}, last_used) VALUES ({placeholders})",
+                [(key, *self._to_row(value), now) for key, value in values.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """Delete least recently used rows above max_entries (caller holds the lock)"""
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            logger.info(f"Evicted {excess} least recently used {self.table} cache entries")
+
+
+class SentimentCache(SQLiteLRUCache):
+    """Sentiment results ({'label': ..., 'score': ...}) keyed by text and model"""
+    table = 'sentiment'
+    columns = (('label', 'TEXT'), ('score', 'REAL'))
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = 1_000_000):
+        super().__init__(path, max_entries)
+
+    def _to_row(self, result: Dict) -> Tuple:
+        return result['label'], float(result['score'])
+
+    def _from_row(self, row: Tuple) -> Dict:
+        return {'label': row[0], 'score': row[1]}
+
+
+def _batches(items: List, size: int = _SQL_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
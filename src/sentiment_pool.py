@@ -0,0 +1,175 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.batch_inference import BatchInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+# Sentiment scoring spread over worker processes.
+#
+# Usage:
+#   from src.sentiment_pool import SentimentWorkerPool
+#
+#   with SentimentWorkerPool(workers=8, torch_threads=4) as pool:
+#       results = pool.run(texts)     # same results, in the same order, as BatchInferenceEngine.run
+#       pool.stats                    # {'texts': ..., 'seconds': ..., 'texts_per_second': ...}
+#
+#   TextAnalyzer(workers=8, torch_threads=4)   # uses a pool for _analyze_sentiment
+#
+# Each worker loads the model once, in its initializer, and keeps it for the
+# life of the pool. Token lengths are computed by the workers in chunks of
+# at most TOKENIZE_CHUNK texts, then the parent plans the very batches the
+# serial engine would use. Both phases hand out at most max_pending tasks at
+# a time, so memory for queued texts stays bounded. Results are written back
+# by position, so the output matches the serial path. Workers are started
+# with 'spawn' so that no torch thread state is inherited from the parent.
+
+# Largest number of texts sent to a worker in one tokenization task
+TOKENIZE_CHUNK = 4096
+
+# Per-process engine, set by _init_worker
+_engine: Optional[BatchInferenceEngine] = None
+
+
+def _init_worker(model_name: Optional[str], backend: str, batch_size: int, max_length: int,
+                 torch_threads: Optional[int]):
+    global _engine
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    from src.model_registry import get_registry
+    pipe = get_registry().get("sentiment-analysis", model_name, backend)
+    _engine = BatchInferenceEngine(pipe, batch_size=batch_size, max_length=max_length)
+
+
+def _token_lengths(texts: List[str]) -> List[int]:
+    return _engine.token_lengths(texts)
+
+
+def _score_batch(texts: List[str]) -> List[Dict]:
+    return _engine.score_batch(texts)
+
+
+def _describe() -> Tuple[str, str]:
+    from src.sentiment_cache import describe_model
+    return describe_model(_engine.pipe)
+
+
+class SentimentWorkerPool:
+    def __init__(self, workers: Optional[int] = None, model_name: Optional[str] = None,
+                 backend: str = 'pytorch', batch_size: int = 32, max_length: int = 512,
+                 torch_threads: Optional[int] = 1, max_pending: Optional[int] = None):
+        """Configure the pool; worker processes start on first use
+
+        Args:
+            workers (int, optional): Worker processes; None uses every CPU
+                divided by torch_threads
+            model_name (str, optional): Sentiment model; None uses the pipeline default
+            backend (str): Model backend, see ModelRegistry.get
+            batch_size (int): Number of texts per forward pass
+            max_length (int): Maximum number of tokens per text
+            torch_threads (int, optional): torch intra-op threads per worker;
+                None leaves torch's default
+            max_pending (int, optional): Tasks (tokenization chunks or batches)
+                queued or running at once;
+                defaults to twice the number of workers
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // (torch_threads or 1))
+        self.max_pending = max_pending or 2 * self.workers
+        self.batch_size = batch_size
+        self._initargs = (model_name, backend, batch_size, max_length, torch_threads)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {'texts': 0, 'seconds': 0.0, 'texts_per_second': 0.0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(f"Starting {self.workers} sentiment workers")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=self._initargs,
+            )
+        return self._executor
+
+    def describe_model(self) -> Tuple[str, str]:
+        """(name, version) of the model loaded by the workers"""
+        return self.executor.submit(_describe).result()
+
+    def run(self, texts: Sequence[str]) -> List[Optional[Dict]]:
+        """Score texts across the workers
+
+        Returns:
+            list: One pipeline result per input text in the original order.
+                  Entries for empty or non-string texts are None.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if not valid:
+            return results
+
+        start = time.perf_counter()
+
+        # Tokenize in parallel, then batch exactly as the serial engine does
+        chunk = max(self.batch_size, min(-(-len(valid) // self.workers), TOKENIZE_CHUNK))
+        lengths = [0] * len(valid)
+        self._run_bounded(_token_lengths, (
+            (range(first, min(first + chunk, len(valid))), [texts[i] for i in valid[first:first + chunk]])
+            for first in range(0, len(valid), chunk)
+        ), lengths)
+        batches = BatchInferenceEngine.plan_batches(valid, lengths, self.batch_size)
+        self._run_bounded(_score_batch, (
+            (batch_idx, [texts[i] for i in batch_idx]) for batch_idx in batches
+        ), results)
+
+        elapsed = time.perf_counter() - start
+        throughput = len(valid) / elapsed if elapsed > 0 else float('inf')
+        self.stats = {'texts': len(valid), 'seconds': elapsed, 'texts_per_second': throughput}
+        logger.info(
+            f"Scored {len(valid)} texts in {elapsed:.2f}s on {self.workers} workers "
+            f"({throughput:.1f} texts/sec, batch size {self.batch_size})"
+        )
+        return results
+
+    def _run_bounded(self, fn, tasks: Iterable[Tuple[Sequence[int], List[str]]], results: List):
+        """Run fn on each task's texts with at most max_pending tasks submitted at once
+
+        Tasks are (positions, texts) pairs, consumed lazily; the outputs for
+        each task are written to results at its positions.
+        """
+        pending = {}
+        for positions, task_texts in tasks:
+            if len(pending) >= self.max_pending:
+                self._collect(pending, results, wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[self.executor.submit(fn, task_texts)] = positions
+        self._collect(pending, results, wait(pending).done)
+
+    @staticmethod
+    def _collect(pending: Dict, results: List, done):
+        for future in done:
+            for i, output in zip(pending.pop(future), future.result()):
+                results[i] = output
+
+    def close(self):
+        """Stop the workers; the next run starts new ones"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import DataIngestion
+from src.impact_analysis import ImpactAnalyzer
+from src.incremental_ranking import IncrementalRanker
+from src.sentiment_analysis import TextAnalyzer
+from src.streaming import StreamingScorer
+
+logger = logging.getLogger(__name__)
+
+# Long-lived HTTP service answering impact queries from warm, in-memory state.
+#
+# Usage:
+#   python -m src.service --port 8080
+#
+#   curl localhost:8080/health
+#   curl 'localhost:8080/ranking?top=10'                  # highest composite scores
+#   curl 'localhost:8080/ranking?top=5&theme=mobile'      # ... among items touching a theme
+#   curl localhost:8080/items/DEV-123                     # score, rank, themes and release impact
+#   curl -d '{"texts": ["App crashes on login"]}' localhost:8080/score
+#   curl -d '{"texts": ["Checkout is slow"]}' localhost:8080/feedback   # score and add to the ranking
+#   curl -X PUT -d '{"title": "Speed up checkout", "priority": "High", "story_points": 5}' \
+#        localhost:8080/items/DEV-123                     # add or edit a backlog item
+#   curl -X DELETE localhost:8080/items/DEV-123
+#   curl -X POST localhost:8080/reload                    # re-read data and re-rank
+#
+# Built on asyncio.start_server and the standard library only. Data, model
+# and theme index are loaded once, and the ranking is held by an
+# IncrementalRanker, so queries are lookups and new feedback or backlog edits
+# only rescore the items they affect. Changes made this way are in memory
+# only; /reload starts again from the data files. Texts posted to /score
+# and /feedback by concurrent requests are gathered into micro-batches (up
+# to max_batch_size texts, waiting at most max_wait_ms for more) by a
+# StreamingScorer, whose thread runs the model while the event loop keeps
+# serving. /reload scores on its own thread, so model calls from it and from
+# the scorer take turns under one lock.
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1_000_000
+
+
+class ServiceState(NamedTuple):
+    """Everything a query reads, swapped as a whole on reload"""
+    ranker: IncrementalRanker  # Ranked backlog, updated in place by /feedback and /items
+    releases: Optional[pd.DataFrame]  # Release impact summary indexed by ticket_id
+    loaded_at: datetime
+    load_seconds: float
+
+
+def _jsonable(value: Any) -> Any:
+    """Plain JSON value for pandas/NumPy scalars, timestamps, NaN and containers"""
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class ImpactService:
+    def __init__(self, text_analyzer: Optional[TextAnalyzer] = None,
+                 impact_analyzer: Optional[ImpactAnalyzer] = None,
+                 max_batch_size: int = 32, max_wait_ms: float = 10,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        """Create the service; call load() (or serve()) to read data
+
+        Args:
+            text_analyzer (TextAnalyzer, optional): Warm sentiment model and theme matcher
+            impact_analyzer (ImpactAnalyzer, optional): Loads data and ranks the backlog
+            max_batch_size (int): Most texts scored in one model call
+            max_wait_ms (float): Longest a text waits for others to join its batch
+            max_body_bytes (int): Larger request bodies are refused with 413
+        """
+        self.text_analyzer = text_analyzer or TextAnalyzer()
+        self.impact_analyzer = impact_analyzer or ImpactAnalyzer(
+            data_ingestion=DataIngestion(auto_load=False), text_analyzer=self.text_analyzer
+        )
+        self.max_body_bytes = max_body_bytes
+        # The pipeline, its cache and engine stats are not safe to share between threads
+        self.model_lock = threading.Lock()
+        # Loading and re-ranking run here, off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reload')
+        self.scorer = StreamingScorer(self._score, max_batch_size, max_wait_ms)
+        self.state: Optional[ServiceState] = None
+        self.routes: Dict[Tuple[str, str], Callable] = {
+            ('GET', 'health'): self._health,
+            ('GET', 'ranking'): self._ranking,
+            ('GET', 'items'): self._item,
+            ('PUT', 'items'): self._put_item,
+            ('DELETE', 'items'): self._delete_item,
+            ('POST', 'score'): self._score_request,
+            ('POST', 'feedback'): self._feedback,
+            ('POST', 'reload'): self._reload,
+        }
+
+    def load(self) -> ServiceState:
+        """Load data, analyse feedback and rank the backlog; replaces the served state"""
+        start = time.perf_counter()
+        analyzer = self.impact_analyzer
+        csat_df, tickets_df, dev_tickets_df = analyzer.data_ingestion.load_all_data()
+        with self.model_lock:
+            analysis = self.text_analyzer.analyze_all(csat_df, tickets_df)
+        ranker = analyzer.build_ranker(dev_tickets_df, analysis)
+
+        releases = None
+        if 'target_release_date' in dev_tickets_df.columns:
+            releases = analyzer.analyze_releases(
+                csat_df, tickets_df, dev_tickets_df, analysis, rank_tests=False
+            ).summary
+
+        self.state = ServiceState(ranker, releases, datetime.now(), time.perf_counter() - start)
+        logger.info(f"Service state loaded: {len(ranker)} backlog items in {self.state.load_seconds:.2f}s")
+        return self.state
+
+    def _score(self, texts: List[str]) -> List[Optional[Dict]]:
+        """Sentiment and themes of a batch of texts (runs in the scorer thread)"""
+        with self.model_lock:
+            sentiment = self.text_analyzer.score_texts(texts)
+        matcher = self.text_analyzer.theme_matcher
+        return [
+            None if result is None else {**result, 'themes': matcher.themes_in(text)}
+            for text, result in zip(texts, sentiment)
+        ]
+
+    # Handlers return (status, payload)
+
+    async def _health(self, parts: List[str], query: Dict, body: Any):
+        state = self.state
+        return HTTPStatus.OK, {
+            'status': 'ok',
+            'items': len(state.ranker),
+            'loaded_at': state.loaded_at,
+            'load_seconds': state.load_seconds,
+        }
+
+    async def _ranking(self, parts: List[str], query: Dict, body: Any):
+        ranker = self.state.ranker
+        try:
+            top = int(query.get('top', 10))
+        except ValueError:
+            top = 0
+        if top < 1:
+            return HTTPStatus.BAD_REQUEST, {'error': "'top' must be a positive integer"}
+        ranked = ranker.top(top, query.get('theme') or None)
+        ranked.insert(0, 'rank', [ranker.rank_of(ticket_id) for ticket_id in ranked['ticket_id']])
+        return HTTPStatus.OK, {'items': ranked.to_dict('records')}
+
+    async def _item(self, parts: List[str], query: Dict, body: Any):
+        if len(parts) != 1:
+            return HTTPStatus.NOT_FOUND, {'error': 'expected /items/<ticket_id>'}
+        ticket_id = unquote(parts[0])
+        state = self.state
+        item = state.ranker.item(ticket_id)
+        if item is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"unknown ticket_id {ticket_id!r}"}
+        item['total_items'] = len(state.ranker)
+        if state.releases is not None and ticket_id in state.releases.index:
+            item['release_impact'] = state.releases.loc[[ticket_id]].iloc[0].to_dict()
+        return HTTPStatus.OK, item
+
+    async def _put_item(self, parts: List[str], query: Dict, body: Any):
+        if len(parts) != 1:
+            return HTTPStatus.NOT_FOUND, {'error': 'expected /items/<ticket_id>'}
+        if not isinstance(body, dict) or not isinstance(body.get('title'), str):
+            return HTTPStatus.BAD_REQUEST, {'error': "expected {'title': str, 'priority': ..., 'story_points': ...}"}
+        priority, story_points = body.get('priority'), body.get('story_points')
+        if priority is not None and not isinstance(priority, str):
+            return HTTPStatus.BAD_REQUEST, {'error': "'priority' must be a string"}
+        if story_points is not None and (
+            isinstance(story_points, bool) or not isinstance(story_points, (int, float))
+            or not math.isfinite(story_points) or story_points < 0
+        ):
+            return HTTPStatus.BAD_REQUEST, {'error': "'story_points' must be a non-negative number"}
+        item = {'priority': None, 'story_points': None, **body, 'ticket_id': unquote(parts[0])}
+        rank = self.state.ranker.upsert_item(item)
+        return HTTPStatus.OK, {'ticket_id': item['ticket_id'], 'rank': rank}
+
+    async def _delete_item(self, parts: List[str], query: Dict, body: Any):
+        if len(parts) != 1:
+            return HTTPStatus.NOT_FOUND, {'error': 'expected /items/<ticket_id>'}
+        ticket_id = unquote(parts[0])
+        if not self.state.ranker.remove_item(ticket_id):
+            return HTTPStatus.NOT_FOUND, {'error': f"unknown ticket_id {ticket_id!r}"}
+        return HTTPStatus.OK, {'ticket_id': ticket_id, 'removed': True}
+
+    async def _score_request(self, parts: List[str], query: Dict, body: Any):
+        texts = body.get('texts') if isinstance(body, dict) else None
+        if isinstance(body, dict) and isinstance(body.get('text'), str):
+            texts = [body['text']]
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return HTTPStatus.BAD_REQUEST, {'error': "expected {'texts': [str, ...]} or {'text': str}"}
+        return HTTPStatus.OK, {'results': await self.scorer.score_async(texts)}
+
+    async def _feedback(self, parts: List[str], query: Dict, body: Any):
+        texts = body.get('texts') if isinstance(body, dict) else None
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return HTTPStatus.BAD_REQUEST, {'error': "expected {'texts': [str, ...]}"}
+        results = await self.scorer.score_async(texts)
+        memberships = self.text_analyzer.theme_matcher.match(texts)
+        sentiment = pd.Series([np.nan if result is None else result['sentiment_score'] for result in results])
+        updated = self.state.ranker.add_feedback(memberships, sentiment)
+        return HTTPStatus.OK, {'results': results, 'items_rescored': updated}
+
+    async def _reload(self, parts: List[str], query: Dict, body: Any):
+        state = await asyncio.get_running_loop().run_in_executor(self.executor, self.load)
+        return HTTPStatus.OK, {'items': len(state.ranker), 'load_seconds': state.load_seconds}
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Route one request and return (status, JSON-ready payload)"""
+        url = urlsplit(target)
+        segments = [segment for segment in url.path.split('/') if segment]
+        if not segments:
+            segments = ['health']
+        handler = self.routes.get((method, segments[0]))
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"no route for {method} {url.path}"}
+
+        try:
+            payload = json.loads(body) if body else None
+        except (ValueError, RecursionError):
+            # RecursionError: nesting deeper than the decoder can follow
+            return HTTPStatus.BAD_REQUEST, {'error': 'request body is not valid JSON'}
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            return await handler(segments[1:], query, payload)
+        except Exception as e:
+            logger.error(f"Error handling {method} {target}: {str(e)}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line.strip():
+                        break
+                    headers = await self._read_headers(reader)
+                except ValueError:
+                    # readline raises ValueError for lines longer than the stream's limit
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': 'request line or header too long'}, False)
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'malformed request line'}, False)
+                    break
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': 'invalid Content-Length'}, False)
+                    break
+                if length > self.max_body_bytes:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': f"body larger than {self.max_body_bytes} bytes"}, False)
+                    break
+                body = await reader.readexactly(length)
+
+                status, payload = await self.dispatch(method.upper(), target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                logger.debug(f"{method} {target} -> {int(status)} in {(time.perf_counter() - start) * 1000:.1f}ms")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        """Header fields up to the blank line, with lower-cased names"""
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        data = json.dumps(_jsonable(payload)).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080):
+        """Load state if needed, then serve until cancelled"""
+        if self.state is None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.load)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(f"Serving impact queries on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def run_service(host: str = '127.0.0.1', port: int = 8080, **kwargs):
+    """Run ImpactService(**kwargs) until interrupted"""
+    service = ImpactService(**kwargs)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        logger.info("Service stopped")
+    finally:
+        service.scorer.close()
+        service.executor.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve impact queries over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=10)
+    args = parser.parse_args()
+    run_service(args.host, args.port, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
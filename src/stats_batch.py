@@ -0,0 +1,178 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import stats
+
+logger = logging.getLogger(__name__)
+
+# Significance tests over many comparisons at once.
+#
+# Usage:
+#   from src.stats_batch import (benjamini_hochberg, bootstrap_mean_diff_ci, mann_whitney_u,
+#                                nan_moments, pad_windows, welch_t_test)
+#
+#   before = pad_windows(sorted_scores, lo_before, hi_before)   # one NaN-padded row per comparison
+#   after = pad_windows(sorted_scores, lo_after, hi_after)
+#
+#   t_stat, p = welch_t_test(*nan_moments(before), *nan_moments(after))
+#   u_stat, p_mw = mann_whitney_u(before, after)
+#   low, high = bootstrap_mean_diff_ci(before, after, n_resamples=1000, seed=0)
+#   q = benjamini_hochberg(p)                                    # false discovery rate control
+#
+# Every function works element-wise or row-wise on arrays: samples are 2D
+# arrays with one comparison per row, padded with NaN, and summary statistics
+# are arrays of any shape. Nothing loops over comparisons in Python; the
+# tests agree with scipy.stats (ttest_ind(equal_var=False), mannwhitneyu
+# with method='asymptotic', false_discovery_control) run one pair at a time.
+
+
+def pad_windows(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Rows values[lo[i]:hi[i]], left-aligned and padded with NaN to the longest window"""
+    lo = np.asarray(lo, dtype=np.int64)
+    hi = np.asarray(hi, dtype=np.int64)
+    width = int((hi - lo).max()) if len(lo) else 0
+    positions = lo[:, None] + np.arange(width)
+    inside = positions < hi[:, None]
+    if not len(values):
+        return np.full(positions.shape, np.nan)
+    return np.where(inside, np.asarray(values, dtype=float)[np.minimum(positions, len(values) - 1)], np.nan)
+
+
+def nan_moments(samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(mean, sample variance, count) of each row, ignoring NaN"""
+    known = ~np.isnan(samples)
+    count = known.sum(axis=1).astype(float)
+    total = np.where(known, samples, 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, np.nan)
+        deviations = np.where(known, samples - mean[:, None], 0)
+        var = np.where(count > 1, (deviations ** 2).sum(axis=1) / (count - 1), np.nan)
+    return mean, var, count
+
+
+def welch_t_test(mean_a: np.ndarray, var_a: np.ndarray, n_a: np.ndarray,
+                 mean_b: np.ndarray, var_b: np.ndarray, n_b: np.ndarray):
+    """Two-sided Welch t-test of b against a from summary statistics, element-wise
+
+    Returns:
+        tuple: (t statistic, p-value), NaN where a sample has fewer than two values
+            or both variances are zero
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se_a, se_b = var_a / n_a, var_b / n_b
+        se = se_a + se_b
+        t_stat = (mean_b - mean_a) / np.sqrt(se)
+        dof = se ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+        valid = (n_a >= 2) & (n_b >= 2) & (se > 0)
+        t_stat = np.where(valid, t_stat, np.nan)
+        p_value = np.where(valid, 2 * stats.t.sf(np.abs(t_stat), np.where(valid, dof, 1)), np.nan)
+    return t_stat, p_value
+
+
+def two_proportion_z_test(count_a: np.ndarray, n_a: np.ndarray, count_b: np.ndarray, n_b: np.ndarray):
+    """Two-sided pooled z-test of count_b / n_b against count_a / n_a, element-wise"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pooled = (count_a + count_b) / (n_a + n_b)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+        z_stat = (count_b / n_b - count_a / n_a) / se
+        valid = (n_a > 0) & (n_b > 0) & (se > 0)
+        z_stat = np.where(valid, z_stat, np.nan)
+        p_value = np.where(valid, 2 * stats.norm.sf(np.abs(z_stat)), np.nan)
+    return z_stat, p_value
+
+
+def mann_whitney_u(samples_a: np.ndarray, samples_b: np.ndarray):
+    """Two-sided Mann-Whitney U test of each row of samples_a against the same row of samples_b
+
+    Uses the normal approximation with tie and continuity corrections.
+
+    Returns:
+        tuple: (U statistic of samples_a, p-value), NaN where either row is empty
+    """
+    combined = np.concatenate([samples_a, samples_b], axis=1)
+    n_a = (~np.isnan(samples_a)).sum(axis=1).astype(float)
+    n_b = (~np.isnan(samples_b)).sum(axis=1).astype(float)
+    n = n_a + n_b
+    if combined.shape[1] == 0:
+        nan = np.full(len(combined), np.nan)
+        return nan, nan
+
+    ranks = stats.rankdata(combined, axis=1, nan_policy='omit')
+    rank_sum_a = np.nansum(ranks[:, :samples_a.shape[1]], axis=1)
+    u_a = rank_sum_a - n_a * (n_a + 1) / 2
+
+    # Tie correction: sum of t^3 - t over groups of equal values in each row
+    ordered = np.sort(combined, axis=1)
+    known = ~np.isnan(ordered)
+    new_run = np.ones(ordered.shape, dtype=bool)
+    new_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    run_ids = np.cumsum(new_run, axis=1) - 1
+    width = ordered.shape[1]
+    flat_ids = (np.arange(len(ordered))[:, None] * width + run_ids)[known]
+    run_sizes = np.bincount(flat_ids, minlength=len(ordered) * width).reshape(len(ordered), width)
+    ties = (run_sizes.astype(float) ** 3 - run_sizes).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_u = n_a * n_b / 2
+        sigma = np.sqrt(n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1))))
+        u_max = np.maximum(u_a, n_a * n_b - u_a)
+        z_stat = (u_max - mean_u - 0.5) / sigma
+        valid = (n_a > 0) & (n_b > 0) & (sigma > 0)
+        p_value = np.where(valid, np.minimum(1.0, 2 * stats.norm.sf(z_stat)), np.nan)
+    return np.where(valid, u_a, np.nan), p_value
+
+
+def bootstrap_mean_diff_ci(samples_a: np.ndarray, samples_b: np.ndarray, n_resamples: int = 1000,
+                           confidence: float = 0.95, seed: Optional[int] = None,
+                           max_cells: int = 5_000_000) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile bootstrap interval of mean(b) - mean(a) for each row
+
+    All rows are resampled together, max_cells values at a time.
+
+    Returns:
+        tuple: (lower bound, upper bound), NaN where either row is empty
+    """
+    rng = np.random.default_rng(seed)
+
+    def resampled_means(samples: np.ndarray, count: int) -> np.ndarray:
+        # NaN sorts last, so each row's values come first
+        packed = np.sort(samples, axis=1)
+        sizes = (~np.isnan(packed)).sum(axis=1)
+        if packed.shape[1] == 0:
+            return np.full((len(packed), count), np.nan)
+        picks = (rng.random((len(packed), count, packed.shape[1])) * sizes[:, None, None]).astype(np.int64)
+        values = packed[np.arange(len(packed))[:, None, None], picks]
+        used = np.arange(packed.shape[1]) < sizes[:, None, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(used, values, 0).sum(axis=2) / sizes[:, None]
+
+    rows = max(len(samples_a), 1)
+    width = max(samples_a.shape[1], samples_b.shape[1], 1)
+    block = max(1, max_cells // (rows * width))
+    diffs = []
+    for done in range(0, n_resamples, block):
+        count = min(block, n_resamples - done)
+        diffs.append(resampled_means(samples_b, count) - resampled_means(samples_a, count))
+    diffs = np.concatenate(diffs, axis=1) if diffs else np.full((len(samples_a), 0), np.nan)
+
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        empty = np.isnan(diffs).all(axis=1) if diffs.shape[1] else np.ones(len(diffs), dtype=bool)
+        bounds = np.full((2, len(diffs)), np.nan)
+        if (~empty).any():
+            bounds[:, ~empty] = np.percentile(diffs[~empty], [tail, 100 - tail], axis=1)
+    return bounds[0], bounds[1]
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """Benjamini-Hochberg adjusted p-values (q-values) over every non-NaN entry, same shape"""
+    p_values = np.asarray(p_values, dtype=float)
+    flat = p_values.ravel()
+    tested = np.flatnonzero(~np.isnan(flat))
+    q_values = np.full(flat.shape, np.nan)
+    if len(tested):
+        order = tested[np.argsort(flat[tested], kind='stable')]
+        scaled = flat[order] * len(tested) / np.arange(1, len(tested) + 1)
+        q_values[order] = np.minimum(1.0, np.minimum.accumulate(scaled[::-1])[::-1])
+    return q_values.reshape(p_values.shape)
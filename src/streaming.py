@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching scorer for texts that arrive one at a time.
+#
+# Usage:
+#   from src.streaming import StreamingScorer
+#
+#   scorer = StreamingScorer(text_analyzer.score_texts, max_batch_size=32, max_wait_ms=20)
+#   future = scorer.submit("App crashes when I upload a photo")   # concurrent.futures.Future
+#   futures = scorer.submit_many(new_ticket_texts)
+#   result = future.result()                     # {'label': ..., 'score': ..., 'sentiment_score': ...}
+#   results = scorer.score(texts)                # blocking shortcut
+#   results = await scorer.score_async(texts)    # from asyncio code
+#   scorer.close()                               # finishes queued texts, then stops
+#
+# A background thread takes the first waiting text, then keeps collecting
+# until max_batch_size texts are gathered or max_wait_ms has passed, and
+# scores the whole batch with one call. Single texts therefore get the
+# throughput of batch inference at the cost of at most max_wait_ms latency.
+# With max_queue set, submit blocks while that many texts are waiting.
+# Futures cancelled before their batch starts (e.g. by asyncio.wait_for
+# timing out around score_async) are skipped and never scored.
+
+_STOP = object()
+
+
+class StreamingScorer:
+    def __init__(self, score: Callable[[List[str]], Sequence[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 10, max_queue: int = 0):
+        """Start the batching thread
+
+        Args:
+            score: Function scoring a list of texts, returning one result per text
+                in order (e.g. TextAnalyzer.score_texts)
+            max_batch_size (int): Most texts per call to score
+            max_wait_ms (float): Longest the first text of a batch waits for more
+            max_queue (int): Texts allowed to wait before submit blocks; 0 is unbounded
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        self.score_batch = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = {'texts': 0, 'batches': 0, 'seconds': 0.0}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='streaming-scorer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, text: str) -> Future:
+        """Queue one text; the future resolves to its result"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("StreamingScorer is closed")
+            self._queue.put((text, future))
+        return future
+
+    def submit_many(self, texts: Sequence[str]) -> List[Future]:
+        return [self.submit(text) for text in texts]
+
+    def score(self, texts: Sequence[str], timeout: Optional[float] = None) -> List[Any]:
+        """Queue texts and wait for their results, in order"""
+        return [future.result(timeout) for future in self.submit_many(texts)]
+
+    async def score_async(self, texts: Sequence[str]) -> List[Any]:
+        """Queue texts and await their results without blocking the event loop"""
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in self.submit_many(texts))))
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.stats['texts'] / self.stats['batches'] if self.stats['batches'] else 0.0
+
+    def _next_batch(self) -> List:
+        """Block for one text, then gather more until the batch is full or the wait is over"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is _STOP
+            # Marks the futures running so they can no longer be cancelled; drops cancelled ones
+            items = [item for item in batch if item is not _STOP and item[1].set_running_or_notify_cancel()]
+            if items:
+                try:
+                    self._score(items)
+                except Exception as e:
+                    logger.error(f"Error delivering results of batch of {len(items)} texts: {str(e)}")
+            if stop:
+                return
+
+    def _score(self, items: List):
+        texts = [text for text, _ in items]
+        start = time.perf_counter()
+        try:
+            results = self.score_batch(texts)
+        except Exception as e:
+            logger.error(f"Error scoring batch of {len(texts)} texts: {str(e)}")
+            self._resolve(items, exception=e)
+            return
+
+        if len(results) != len(items):
+            error = ValueError(f"score returned {len(results)} results for {len(items)} texts")
+            self._resolve(items, exception=error)
+            return
+
+        self.stats['texts'] += len(texts)
+        self.stats['batches'] += 1
+        self.stats['seconds'] += time.perf_counter() - start
+        self._resolve(items, results)
+
+    @staticmethod
+    def _resolve(items: List, results: Optional[Sequence[Any]] = None, exception: Optional[BaseException] = None):
+        """Set each future's result (or exception), skipping any already resolved"""
+        for i, (_, future) in enumerate(items):
+            try:
+                if exception is not None:
+                    future.set_exception(exception)
+                else:
+                    future.set_result(results[i])
+            except InvalidStateError:
+                pass
+
+    def close(self):
+        """Score everything already queued, then stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        logger.info(
+            f"Streaming scorer scored {self.stats['texts']} texts in {self.stats['batches']} batches "
+            f"(mean batch size {self.mean_batch_size:.1f})"
+        )
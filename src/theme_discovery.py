@@ -0,0 +1,353 @@
+import logging
+import time
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import CountVectorizer
+
+from src.batch_inference import BatchInferenceEngine
+from src.sentiment_cache import SQLiteLRUCache, describe_model
+
+logger = logging.getLogger(__name__)
+
+# Theme discovery from sentence embeddings of the feedback text.
+#
+# Usage:
+#   from src.theme_discovery import TextEmbedder, ThemeDiscovery
+#
+#   discovery = ThemeDiscovery(TextEmbedder())  # n_clusters defaults to suggested_clusters(len(texts))
+#   clusters = discovery.fit(feedback_text, sentiment, memberships)   # one row per cluster
+#   clusters[clusters['emerging']]               # clusters the keyword taxonomy mostly misses
+#   discovery.match_items(dev_tickets_df, n_clusters=3)               # nearest clusters per item
+#   discovery.nearest_feedback(dev_tickets_df, n_neighbors=5)         # nearest feedback texts
+#
+#   ImpactAnalyzer().discover_themes(csat_df, tickets_df, dev_tickets_df, analysis_results)
+#
+# Texts are embedded by mean-pooling a sentence-transformers model's token
+# states (loaded through the model registry) and the vectors are kept in an
+# SQLite cache keyed like SentimentCache, so a rerun only embeds new texts.
+# MiniBatchKMeans groups the unit vectors, and each cluster is labelled with
+# the words most over-represented in it. The centroids double as the coarse
+# level of an inverted-file index: a query is compared with every centroid,
+# then only with the feedback of its n_probe nearest clusters, so search
+# cost grows with n_clusters + n_probe * rows / n_clusters rather than rows.
+
+DEFAULT_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+DEFAULT_EMBEDDING_CACHE_PATH = Path('data/cache/embeddings.sqlite')
+
+# Bounds for the cluster count derived from the corpus size
+MIN_CLUSTERS = 2
+MAX_CLUSTERS = 200
+
+
+def suggested_clusters(n_texts: int) -> int:
+    """Cluster count for n_texts texts: sqrt(n / 2), within MIN_CLUSTERS..MAX_CLUSTERS"""
+    return int(min(max(round((n_texts / 2) ** 0.5), MIN_CLUSTERS), MAX_CLUSTERS, max(n_texts, 1)))
+
+
+class ThemeDiscoveryResult(NamedTuple):
+    """Discovered clusters and the clusters nearest each backlog item"""
+    clusters: pd.DataFrame  # One row per cluster: size, label, terms, mean_sentiment, keyword_coverage, emerging
+    item_clusters: pd.DataFrame  # ticket_id, rank, cluster, similarity, label
+
+
+class EmbeddingCache(SQLiteLRUCache):
+    """float32 embedding vectors keyed by text and model"""
+    table = 'embeddings'
+    columns = (('vector', 'BLOB'),)
+
+    def __init__(self, path=DEFAULT_EMBEDDING_CACHE_PATH, max_entries: int = 1_000_000):
+        super().__init__(path, max_entries)
+
+    def _to_row(self, vector: np.ndarray) -> Tuple:
+        return (np.asarray(vector, dtype=np.float32).tobytes(),)
+
+    def _from_row(self, row: Tuple) -> np.ndarray:
+        return np.frombuffer(row[0], dtype=np.float32)
+
+
+class TextEmbedder(BatchInferenceEngine):
+    def __init__(self, model_name: Optional[str] = None, registry=None, batch_size: int = 32,
+                 max_length: int = 256, cache_path=DEFAULT_EMBEDDING_CACHE_PATH,
+                 cache_max_entries: int = 1_000_000):
+        """Load the embedding model through the registry
+
+        Args:
+            model_name (str, optional): Sentence embedding model; defaults to
+                DEFAULT_EMBEDDING_MODEL
+            registry (ModelRegistry, optional): Defaults to the process-wide registry
+            batch_size (int): Number of texts per forward pass
+            max_length (int): Maximum number of tokens per text
+            cache_path: Embedding cache location; None disables caching
+            cache_max_entries (int): Upper bound on cached vectors
+        """
+        if registry is None:
+            from src.model_registry import get_registry
+            registry = get_registry()
+        pipe = registry.get("feature-extraction", model_name or DEFAULT_EMBEDDING_MODEL)
+        super().__init__(pipe, batch_size=batch_size, max_length=max_length)
+        self.model_name, self.model_version = describe_model(pipe)
+        self.cache = EmbeddingCache(cache_path, cache_max_entries) if cache_path is not None else None
+
+    def score_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Unit-length mean of the token states of each text, ignoring padding"""
+        import torch
+
+        encoded = self.pipe.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors='pt'
+        )
+        with torch.inference_mode():
+            hidden = self.pipe.model(**encoded).last_hidden_state
+        mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return list(pooled.cpu().numpy().astype(np.float32))
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """Embeddings of texts as an (n, dim) float32 array
+
+        Cached vectors are reused; rows for empty or non-string texts are zero.
+        """
+        texts = list(texts)
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+
+        missing = valid
+        if self.cache is not None and valid:
+            keys = {i: self.cache.key(texts[i], self.model_name, self.model_version) for i in valid}
+            found = self.cache.get_many(keys.values())
+            for i in valid:
+                vectors[i] = found.get(keys[i])
+            missing = [i for i in valid if vectors[i] is None]
+
+        if missing:
+            computed = self.run([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            if self.cache is not None:
+                self.cache.put_many({keys[i]: vectors[i] for i in missing})
+        logger.info(f"Embedded {len(missing)} new texts, {len(valid) - len(missing)} from cache")
+
+        dim = next((len(vector) for vector in vectors if vector is not None), 0)
+        embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+        for i in valid:
+            embeddings[i] = vectors[i]
+        return embeddings
+
+
+class ClusterIndex:
+    def __init__(self, embeddings: np.ndarray, centroids: np.ndarray, assignments: np.ndarray):
+        """Inverted-file index: rows grouped by their k-means cluster
+
+        Args:
+            embeddings (np.ndarray): Unit-length row vectors
+            centroids (np.ndarray): Cluster centres, one row per cluster
+            assignments (np.ndarray): Cluster of each row of embeddings
+        """
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms > 0, norms, 1)
+        self.order = np.argsort(assignments, kind='stable')
+        self.vectors = embeddings[self.order]
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(len(centroids) + 1))
+
+    def nearest_clusters(self, queries: np.ndarray, n: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """(cosine similarities, cluster ids) of the n nearest centroids of each query, best first"""
+        n = min(n, len(self.centroids))
+        similarity = queries @ self.centroids.T
+        top = np.argpartition(-similarity, n - 1, axis=1)[:, :n]
+        top_sim = np.take_along_axis(similarity, top, axis=1)
+        ranked = np.argsort(-top_sim, axis=1, kind='stable')
+        return np.take_along_axis(top_sim, ranked, axis=1), np.take_along_axis(top, ranked, axis=1)
+
+    def search(self, queries: np.ndarray, n_neighbors: int = 10,
+               n_probe: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate nearest rows of each query among the rows of its n_probe nearest clusters
+
+        Returns:
+            tuple: (cosine similarities, row positions), best first, padded with
+                NaN and -1 when the probed clusters hold fewer than n_neighbors rows
+        """
+        similarities = np.full((len(queries), n_neighbors), np.nan)
+        positions = np.full((len(queries), n_neighbors), -1, dtype=np.int64)
+        _, probes = self.nearest_clusters(queries, n_probe)
+        for q, (query, clusters) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in clusters])
+            if not len(candidates):
+                continue
+            scores = self.vectors[candidates] @ query
+            k = min(n_neighbors, len(candidates))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            similarities[q, :k] = scores[best]
+            positions[q, :k] = self.order[candidates[best]]
+        return similarities, positions
+
+
+class ThemeDiscovery:
+    def __init__(self, embedder: Optional[TextEmbedder] = None, n_clusters: Optional[int] = None,
+                 top_terms: int = 5, random_state: Optional[int] = 0, batch_size: int = 4096):
+        """Configure clustering; call fit() with the feedback text
+
+        Args:
+            embedder (TextEmbedder, optional): Created on first use if not given
+            n_clusters (int, optional): Number of clusters (capped at the number of
+                texts); None uses suggested_clusters for the corpus size
+            top_terms (int): Words used to label each cluster
+            random_state (int, optional): Seed for k-means
+            batch_size (int): Mini-batch size for k-means
+        """
+        self._embedder = embedder
+        self.n_clusters = n_clusters
+        self.top_terms = top_terms
+        self.random_state = random_state
+        self.batch_size = batch_size
+        self.clusters: Optional[pd.DataFrame] = None
+        self.index: Optional[ClusterIndex] = None
+        self.texts: Optional[pd.Series] = None
+
+    @property
+    def embedder(self) -> TextEmbedder:
+        if self._embedder is None:
+            self._embedder = TextEmbedder()
+        return self._embedder
+
+    def fit(self, texts: pd.Series, sentiment: Optional[pd.Series] = None,
+            memberships: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Embed and cluster feedback text
+
+        Args:
+            texts (pd.Series): Feedback text
+            sentiment (pd.Series, optional): Signed sentiment per text, aligned by index
+            memberships (pd.DataFrame, optional): Keyword theme memberships, aligned
+                by index; clusters mostly outside every keyword theme are 'emerging'
+
+        Returns:
+            pd.DataFrame: One row per cluster, largest first
+        """
+        try:
+            start = time.perf_counter()
+            texts = texts[texts.map(lambda text: isinstance(text, str) and bool(text.strip()))]
+            if texts.empty:
+                raise ValueError("No feedback text to cluster")
+            embeddings = self.embedder.embed(texts)
+
+            n_clusters = min(self.n_clusters or suggested_clusters(len(texts)), len(texts))
+            kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=self.batch_size,
+                                     random_state=self.random_state, n_init=3)
+            assignments = kmeans.fit_predict(embeddings)
+            self.index = ClusterIndex(embeddings, kmeans.cluster_centers_, assignments)
+            self.texts = texts
+
+            sizes = np.bincount(assignments, minlength=n_clusters)
+            terms = self._cluster_terms(texts, assignments, n_clusters)
+            clusters = pd.DataFrame({
+                'cluster': np.arange(n_clusters),
+                'size': sizes,
+                'label': [' / '.join(words[:3]) for words in terms],
+                'terms': terms,
+            })
+            clusters['mean_sentiment'] = self._cluster_mean(sentiment, texts.index, assignments, n_clusters)
+            if memberships is not None:
+                covered = memberships.reindex(texts.index, fill_value=False).any(axis=1).to_numpy(float)
+                clusters['keyword_coverage'] = self._cluster_mean(
+                    pd.Series(covered, index=texts.index), texts.index, assignments, n_clusters
+                )
+                clusters['emerging'] = clusters['keyword_coverage'] < 0.5
+            self.clusters = clusters.sort_values('size', ascending=False, kind='stable').reset_index(drop=True)
+
+            logger.info(
+                f"Clustered {len(texts)} texts into {n_clusters} clusters "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return self.clusters
+
+        except Exception as e:
+            logger.error(f"Error in theme discovery: {str(e)}")
+            raise
+
+    def _cluster_terms(self, texts: pd.Series, assignments: np.ndarray, n_clusters: int) -> List[List[str]]:
+        """Words most over-represented in each cluster relative to all feedback"""
+        try:
+            vectorizer = CountVectorizer(stop_words='english', binary=True, max_features=50_000)
+            counts = vectorizer.fit_transform(texts)
+        except ValueError:
+            # Only stop words or no words at all
+            return [[] for _ in range(n_clusters)]
+        vocabulary = vectorizer.get_feature_names_out()
+
+        members = sparse.csr_matrix(
+            (np.ones(len(assignments)), (assignments, np.arange(len(assignments)))),
+            shape=(n_clusters, len(assignments))
+        )
+        sizes = np.maximum(np.bincount(assignments, minlength=n_clusters), 1)[:, None]
+        share = (members @ counts).toarray() / sizes
+        overall = np.asarray(counts.sum(axis=0)).ravel() / len(assignments)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = np.where(share > 0, share * np.log(share / overall), -np.inf)
+
+        top = np.argsort(-score, axis=1, kind='stable')[:, :self.top_terms]
+        return [
+            [vocabulary[term] for term in row if np.isfinite(score[cluster, term]) and score[cluster, term] > 0]
+            for cluster, row in enumerate(top)
+        ]
+
+    @staticmethod
+    def _cluster_mean(values: Optional[pd.Series], index: pd.Index, assignments: np.ndarray,
+                      n_clusters: int) -> np.ndarray:
+        """Mean of values over each cluster's texts (NaN if none are known)"""
+        if values is None:
+            return np.full(n_clusters, np.nan)
+        values = pd.to_numeric(values.reindex(index), errors='coerce').to_numpy(float)
+        known = ~np.isnan(values)
+        totals = np.bincount(assignments[known], weights=values[known], minlength=n_clusters)
+        counts = np.bincount(assignments[known], minlength=n_clusters)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    def _embed_items(self, dev_tickets_df: pd.DataFrame) -> np.ndarray:
+        if self.index is None:
+            raise RuntimeError("ThemeDiscovery.fit must be called before matching items")
+        text = dev_tickets_df['title'].astype('string').fillna('')
+        if 'description' in dev_tickets_df.columns:
+            text = text.str.cat(dev_tickets_df['description'].astype('string'), sep=' ', na_rep='')
+        return self.embedder.embed(text.astype(object))
+
+    def match_items(self, dev_tickets_df: pd.DataFrame, n_clusters: int = 3) -> pd.DataFrame:
+        """The n_clusters clusters nearest each backlog item (title and description)
+
+        Returns:
+            pd.DataFrame: ticket_id, rank, cluster, similarity and label, one row per match
+        """
+        similarity, clusters = self.index.nearest_clusters(self._embed_items(dev_tickets_df), n_clusters)
+        n = clusters.shape[1]
+        labels = self.clusters.set_index('cluster')['label']
+        return pd.DataFrame({
+            'ticket_id': np.repeat(dev_tickets_df['ticket_id'].to_numpy(), n),
+            'rank': np.tile(np.arange(1, n + 1), len(dev_tickets_df)),
+            'cluster': clusters.ravel(),
+            'similarity': similarity.ravel(),
+            'label': labels.reindex(clusters.ravel()).to_numpy(),
+        })
+
+    def nearest_feedback(self, dev_tickets_df: pd.DataFrame, n_neighbors: int = 5,
+                         n_probe: int = 3) -> pd.DataFrame:
+        """The feedback texts nearest each backlog item, searched through the cluster index
+
+        Returns:
+            pd.DataFrame: ticket_id, rank, feedback_index (index label of the text),
+                similarity and text, one row per match
+        """
+        similarity, positions = self.index.search(self._embed_items(dev_tickets_df), n_neighbors, n_probe)
+        found = positions.ravel() >= 0
+        rows = positions.ravel()[found]
+        return pd.DataFrame({
+            'ticket_id': np.repeat(dev_tickets_df['ticket_id'].to_numpy(), n_neighbors)[found],
+            'rank': np.tile(np.arange(1, n_neighbors + 1), len(dev_tickets_df))[found],
+            'feedback_index': self.texts.index[rows],
+            'similarity': similarity.ravel()[found],
+            'text': self.texts.to_numpy()[rows],
+        })
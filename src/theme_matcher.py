@@ -0,0 +1,78 @@
+import re
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Compiled multi-keyword theme matcher.
+#
+# Usage:
+#   from src.theme_matcher import ThemeMatcher
+#
+#   matcher = ThemeMatcher({'mobile': ['mobile', 'app'], 'email': ['email', 'gmail']})
+#   memberships = matcher.match(texts)     # boolean DataFrame: one row per text, one column per theme
+#   matcher.themes_in("Mobile app crashes")  # ['mobile']
+#
+# All keywords are compiled into a single regex, so each text is scanned once
+# regardless of the number of themes. Keywords only match whole words (an
+# optional plural "s" is allowed), so "app" matches "apps" but not "approach".
+
+
+class ThemeMatcher:
+    def __init__(self, themes: Dict[str, Iterable[str]]):
+        """Compile the theme dictionary
+
+        Args:
+            themes (dict): Theme name -> keywords/phrases that signal the theme
+        """
+        self.themes: List[str] = list(themes)
+        self._theme_ids: Dict[str, List[int]] = {}
+        for theme_id, theme in enumerate(self.themes):
+            for keyword in themes[theme]:
+                # casefold, as IGNORECASE matches folded characters ('ſ' for 's', Kelvin sign for 'k')
+                keyword = keyword.strip().casefold()
+                if keyword:
+                    ids = self._theme_ids.setdefault(keyword, [])
+                    if theme_id not in ids:
+                        ids.append(theme_id)
+
+        # Longest keywords first so multi-word phrases win over their prefixes
+        alternatives = '|'.join(re.escape(keyword) for keyword in sorted(self._theme_ids, key=len, reverse=True))
+        self.pattern = re.compile(rf'(?<!\w)({alternatives})s?(?!\w)', re.IGNORECASE) if alternatives else None
+
+    def match(self, texts) -> pd.DataFrame:
+        """Theme memberships for each text
+
+        Args:
+            texts: Series (index is kept) or any iterable of strings
+
+        Returns:
+            pd.DataFrame: Boolean matrix with one row per text and one column per theme
+        """
+        if not isinstance(texts, pd.Series):
+            texts = pd.Series(list(texts), dtype='object')
+        memberships = np.zeros((len(texts), len(self.themes)), dtype=bool)
+
+        if self.pattern is not None and len(texts):
+            found = texts.astype('string').str.findall(self.pattern)
+            rows, cols = [], []
+            for row, keywords in enumerate(found):
+                if not isinstance(keywords, list):
+                    continue
+                for keyword in keywords:
+                    theme_ids = self._theme_ids.get(keyword.casefold(), ())
+                    rows.extend([row] * len(theme_ids))
+                    cols.extend(theme_ids)
+            memberships[rows, cols] = True
+
+        return pd.DataFrame(memberships, index=texts.index, columns=self.themes)
+
+    def themes_in(self, text: str) -> List[str]:
+        """Themes mentioned in a single text"""
+        if self.pattern is None or not isinstance(text, str):
+            return []
+        theme_ids = {i for keyword in self.pattern.findall(text) for i in self._theme_ids.get(keyword.casefold(), ())}
+        return [self.themes[i] for i in sorted(theme_ids)]
@@ -0,0 +1,108 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Reusable per-theme statistics over the feedback corpus.
+#
+# Usage:
+#   from src.theme_stats import ThemeStatistics
+#
+#   stats = ThemeStatistics(matcher.themes, freq='M')
+#   stats.add(csat_themes, csat_sentiment['sentiment_score'], csat_df['survey_date'])
+#   stats.add(ticket_themes, ticket_sentiment['sentiment_score'], tickets_df['created_date'])
+#
+#   stats.to_frame()                   # count, frequency, mean_sentiment, weight per theme
+#   stats.bucketed                     # mentions per theme per month
+#   stats.weights()                    # {'mobile': 0.32, ...} used for backlog scoring
+#   stats.theme_score(['mobile'])      # O(themes) lookup for a single dev item
+#
+# Everything is accumulated from the boolean theme-membership matrices, so
+# scoring the backlog never rescans feedback text.
+
+
+class ThemeStatistics:
+    def __init__(self, themes: Iterable[str], freq: str = 'M'):
+        """Create an empty index
+
+        Args:
+            themes: Theme names (columns of the membership matrices)
+            freq (str): Period used for the time-bucketed frequencies
+        """
+        self.themes: List[str] = list(themes)
+        self.freq = freq
+        self.total_rows = 0
+        self.counts = np.zeros(len(self.themes), dtype=np.int64)
+        self.sentiment_sums = np.zeros(len(self.themes), dtype=float)
+        self.sentiment_counts = np.zeros(len(self.themes), dtype=np.int64)
+        self.bucketed = pd.DataFrame(columns=self.themes, dtype=np.int64)
+
+    def add(self, memberships: pd.DataFrame, sentiment: Optional[pd.Series] = None,
+            dates: Optional[pd.Series] = None):
+        """Accumulate a batch of feedback rows
+
+        Args:
+            memberships (pd.DataFrame): Boolean row x theme matrix
+            sentiment (pd.Series, optional): Signed sentiment per row, aligned by index
+            dates (pd.Series, optional): Feedback date per row, aligned by index
+        """
+        if memberships is None or memberships.empty:
+            return self
+        matrix = memberships.reindex(columns=self.themes, fill_value=False).to_numpy(dtype=bool)
+
+        self.total_rows += len(matrix)
+        self.counts += matrix.sum(axis=0)
+
+        if sentiment is not None:
+            scores = pd.to_numeric(sentiment.reindex(memberships.index), errors='coerce').to_numpy(float)
+            known = ~np.isnan(scores)
+            self.sentiment_sums += matrix[known].T @ scores[known]
+            self.sentiment_counts += matrix[known].sum(axis=0)
+
+        if dates is not None:
+            periods = pd.to_datetime(dates.reindex(memberships.index), errors='coerce').dt.to_period(self.freq)
+            frame = pd.DataFrame(matrix.astype(np.int64), columns=self.themes)
+            per_period = frame.groupby(periods.to_numpy()).sum()
+            self.bucketed = per_period.add(self.bucketed, fill_value=0).astype(np.int64).sort_index()
+
+        return self
+
+    @property
+    def frequency(self) -> pd.Series:
+        """Share of feedback rows mentioning each theme"""
+        total = self.total_rows or 1
+        return pd.Series(self.counts / total, index=self.themes)
+
+    @property
+    def mean_sentiment(self) -> pd.Series:
+        """Mean signed sentiment of the rows mentioning each theme (NaN if none)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(self.sentiment_counts > 0, self.sentiment_sums / self.sentiment_counts, np.nan)
+        return pd.Series(means, index=self.themes)
+
+    def weights(self) -> Dict[str, float]:
+        """Importance of each mentioned theme: frequency, doubled for negative sentiment"""
+        frequency = self.frequency
+        sentiment_weight = np.where(self.mean_sentiment < 0, 2.0, 1.0)
+        weights = frequency * sentiment_weight
+        return {theme: float(weights[theme]) for theme in self.themes if frequency[theme] > 0}
+
+    def theme_score(self, item_themes: Iterable[str]) -> float:
+        """Normalized relevance of an item mentioning item_themes"""
+        weights = self.weights()
+        max_weight = max(weights.values()) if weights else 0
+        if max_weight <= 0:
+            return 0.0
+        return sum(weights.get(theme, 0.0) for theme in item_themes) / max_weight
+
+    def to_frame(self) -> pd.DataFrame:
+        weights = self.weights()
+        return pd.DataFrame({
+            'count': self.counts,
+            'frequency': self.frequency.to_numpy(),
+            'mean_sentiment': self.mean_sentiment.to_numpy(),
+            'weight': [weights.get(theme, 0.0) for theme in self.themes],
+        }, index=pd.Index(self.themes, name='theme'))
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.theme_matcher import ThemeMatcher
+
+logger = logging.getLogger(__name__)
+
+# Externally configured theme taxonomy.
+#
+# Usage:
+#   from src.theme_taxonomy import get_taxonomy
+#
+#   taxonomy = get_taxonomy()                  # config/themes.json (shared per process)
+#   taxonomy = get_taxonomy('themes.yaml')     # YAML needs PyYAML installed
+#   taxonomy.matcher.match(texts)              # compiled ThemeMatcher, reloaded if the file changed
+#   taxonomy.parents                           # {'dashboard': 'ui', ...}
+#
+# File format (JSON or YAML):
+#   themes:
+#     mobile:
+#       keywords: [mobile, app, phone]
+#       synonyms: [ios, android]
+#       children:
+#         offline_mode:
+#           keywords: [offline]
+#
+# Theme names must be unique across the whole tree. A parent theme also
+# matches every keyword of its descendants, so a text about "offline" counts
+# towards both offline_mode and mobile.
+
+DEFAULT_TAXONOMY_PATH = Path('config/themes.json')
+
+# Used when the default taxonomy file is not available
+DEFAULT_THEMES = {
+    'email': ['email', 'gmail', 'outlook'],
+    'mobile': ['mobile', 'app', 'phone'],
+    'performance': ['speed', 'slow', 'fast', 'performance'],
+    'ui': ['interface', 'ui', 'design', 'layout'],
+    'integration': ['integration', 'sync', 'connect'],
+    'support': ['support', 'help', 'assistance']
+}
+
+
+class ThemeTaxonomy:
+    def __init__(self, path=None):
+        """Load a taxonomy file
+
+        Args:
+            path (str, optional): JSON or YAML taxonomy file; defaults to
+                config/themes.json, falling back to DEFAULT_THEMES if it is missing
+        """
+        self.path = Path(path) if path else DEFAULT_TAXONOMY_PATH
+        self._explicit = path is not None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._content_hash = None
+        self.themes: Dict[str, List[str]] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self._matcher: Optional[ThemeMatcher] = None
+        self.reload_if_changed()
+
+    @property
+    def matcher(self) -> ThemeMatcher:
+        """Compiled matcher for the current taxonomy, reloaded if the file changed"""
+        self.reload_if_changed()
+        return self._matcher
+
+    def children(self, theme: str) -> List[str]:
+        return [child for child, parent in self.parents.items() if parent == theme]
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the file if it changed on disk
+
+        The matcher is only recompiled when the resulting keyword index actually
+        differs, so touching the file or editing formatting costs one parse.
+
+        Returns:
+            bool: True if the compiled matcher was replaced
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if self._matcher is not None and signature == self._signature:
+                return False
+            self._signature = signature
+
+            if signature is None:
+                if self._explicit:
+                    raise FileNotFoundError(f"Theme taxonomy not found: {self.path}")
+                if self._matcher is not None:
+                    return False
+                logger.warning(f"No theme taxonomy at {self.path}, using built-in themes")
+                themes, parents = dict(DEFAULT_THEMES), {theme: None for theme in DEFAULT_THEMES}
+            else:
+                raw = self.path.read_bytes()
+                content_hash = hashlib.sha256(raw).hexdigest()
+                if self._matcher is not None and content_hash == self._content_hash:
+                    return False
+                self._content_hash = content_hash
+                themes, parents = self._flatten(self._parse(raw))
+
+            if self._matcher is not None and themes == self.themes and parents == self.parents:
+                return False
+
+            self.themes, self.parents = themes, parents
+            self._matcher = ThemeMatcher(themes)
+            logger.info(f"Compiled theme taxonomy with {len(themes)} themes from {self.path}")
+            return True
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _parse(self, raw: bytes) -> Dict:
+        if self.path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("PyYAML is required to load YAML theme taxonomies") from e
+            data = yaml.safe_load(raw) or {}
+        else:
+            data = json.loads(raw.decode('utf-8'))
+        if not isinstance(data.get('themes'), dict):
+            raise ValueError(f"Theme taxonomy {self.path} must contain a 'themes' mapping")
+        return data['themes']
+
+    @staticmethod
+    def _flatten(tree: Dict):
+        """Flatten the theme tree into name -> keywords (including descendants) and name -> parent"""
+        themes, parents = {}, {}
+
+        def visit(name, spec, parent):
+            if name in themes:
+                raise ValueError(f"Duplicate theme name in taxonomy: {name}")
+            spec = spec or {}
+            own = [name.replace('_', ' ')] if not spec.get('keywords') else []
+            own += list(spec.get('keywords', [])) + list(spec.get('synonyms', []))
+            themes[name], parents[name] = own, parent
+            for child, child_spec in (spec.get('children') or {}).items():
+                visit(child, child_spec, name)
+                themes[name] = themes[name] + [k for k in themes[child] if k not in themes[name]]
+
+        for name, spec in tree.items():
+            visit(name, spec, None)
+        return themes, parents
+
+
+_taxonomies: Dict[Path, ThemeTaxonomy] = {}
+_taxonomies_lock = threading.Lock()
+
+
+def get_taxonomy(path=None) -> ThemeTaxonomy:
+    """Return the shared taxonomy for path, loading it on first use"""
+    key = Path(path) if path else DEFAULT_TAXONOMY_PATH
+    with _taxonomies_lock:
+        if key not in _taxonomies:
+            _taxonomies[key] = ThemeTaxonomy(path)
+        return _taxonomies[key]
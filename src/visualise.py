@@ -4,7 +4,6 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 from pathlib import Path
-from src.data_ingestion import DataIngestion
 from src.impact_analysis import ImpactAnalyzer
 from datetime import datetime
 import logging
@@ -36,16 +35,18 @@ class DevelopmentVisualizer:
         
         logger.info(f"Visualizations will be saved to: {self.viz_dir}")
     
-    def create_visualizations(self):
-        """Generate all visualizations"""
+    def create_visualizations(self, impact_df: pd.DataFrame = None):
+        """Generate all visualizations
+
+        Args:
+            impact_df (pd.DataFrame, optional): Precomputed impact analysis; when
+                omitted the data is loaded and analysed here
+        """
         try:
-            # Get data
-            data_ingestion = DataIngestion()
-            csat_df, tickets_df, dev_tickets_df = data_ingestion.get_combined_data()
-            
             # Get impact analysis
-            impact_analyzer = ImpactAnalyzer()
-            impact_df = impact_analyzer.analyze_impact(None)  # cutoff_date not used
+            if impact_df is None:
+                impact_analyzer = ImpactAnalyzer()
+                impact_df = impact_analyzer.analyze_impact(None)  # cutoff_date not used
             
             # Create priority table
             self._create_priority_table(impact_df)
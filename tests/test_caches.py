@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.sentiment_cache import SentimentCache
+from src.theme_discovery import EmbeddingCache
+
+
+def test_sentiment_cache_round_trip_and_eviction(tmp_path):
+    cache = SentimentCache(tmp_path / 'sentiment.sqlite', max_entries=2)
+    keys = [cache.key(text, 'model', 'v1') for text in ('a', 'b', 'c')]
+    cache.put_many({keys[0]: {'label': 'POSITIVE', 'score': 0.9}})
+    cache.put_many({keys[1]: {'label': 'NEGATIVE', 'score': 0.6}})
+    cache.put_many({keys[2]: {'label': 'POSITIVE', 'score': 0.7}})
+
+    found = cache.get_many(keys)
+    assert len(cache) == 2 and keys[0] not in found
+    assert found[keys[1]] == {'label': 'NEGATIVE', 'score': 0.6}
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.close()
+
+
+def test_keys_depend_on_model_and_normalized_text():
+    assert SentimentCache.key('a  b', 'm', 'v1') == SentimentCache.key('a b', 'm', 'v1')
+    assert SentimentCache.key('a b', 'm', 'v1') != SentimentCache.key('a b', 'm', 'v2')
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    path = tmp_path / 'embeddings.sqlite'
+    cache = EmbeddingCache(path)
+    vector = np.arange(4, dtype=np.float32) / 3
+    key = cache.key('text', 'model', 'v1')
+    cache.put_many({key: vector})
+    cache.close()
+
+    found = EmbeddingCache(path).get_many([key, 'missing'])
+    assert list(found) == [key]
+    np.testing.assert_array_equal(found[key], vector)
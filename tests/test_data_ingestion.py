@@ -0,0 +1,43 @@
+import logging
+
+import pandas as pd
+
+from src.data_ingestion import DataIngestion
+from src.schema import CSAT_SCHEMA
+
+
+def test_backlog_missing_a_date_column_loads_with_a_warning(tmp_path, caplog):
+    path = tmp_path / 'dev_backlog.csv'
+    pd.DataFrame({
+        'ticket_id': ['DEV-1'], 'title': ['Fix crash'], 'description': ['app crash'], 'status': ['open'],
+        'priority': ['High'], 'created_date': ['2024-01-05'],
+    }).to_csv(path, index=False)
+    ingestion = DataIngestion(csat_path=tmp_path / 'none.csv', tickets_path=tmp_path / 'none.csv',
+                              dev_tickets_path=path, auto_load=False)
+
+    with caplog.at_level(logging.WARNING, logger='src.data_ingestion'):
+        dev_tickets_df = ingestion.load_dev_tickets()
+
+    assert pd.api.types.is_datetime64_any_dtype(dev_tickets_df['created_date'])
+    assert "missing columns: ['target_release_date']" in caplog.text
+
+
+def test_csv_and_parquet_chunks_have_the_same_types(tmp_path):
+    df = pd.DataFrame({
+        'response_id': [f"R{i}" for i in range(6)],
+        'survey_date': pd.date_range('2024-01-01', periods=6).astype(str),
+        'satisfaction_score': [1, 2, 3, 4, 5, 5],
+        'feedback_text': ['slow', 'ok', 'great', 'ok', 'slow', 'fine'],
+        'channel': ['web'] * 6,
+        'votes': [1, 2, 3, 4, 5, 6],
+    })
+    df.to_csv(tmp_path / 'csat.csv', index=False)
+    df.to_parquet(tmp_path / 'csat.parquet', index=False)
+
+    csv_chunks = list(DataIngestion._iter_table(tmp_path / 'csat.csv', 4, schema=CSAT_SCHEMA))
+    parquet_chunks = list(DataIngestion._iter_table(tmp_path / 'csat.parquet', 4, schema=CSAT_SCHEMA))
+
+    assert [len(chunk) for chunk in parquet_chunks] == [4, 2]
+    assert list(parquet_chunks[1].index) == [4, 5]
+    for csv_chunk, parquet_chunk in zip(csv_chunks, parquet_chunks):
+        pd.testing.assert_series_equal(csv_chunk.dtypes, parquet_chunk.dtypes)
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from src.incremental_ranking import IncrementalRanker
+from src.scoring import BacklogScorer
+from src.theme_matcher import ThemeMatcher
+from src.theme_stats import ThemeStatistics
+
+MATCHER = ThemeMatcher({'mobile': ['mobile', 'app'], 'billing': ['invoice'], 'search': ['search']})
+
+BACKLOG = pd.DataFrame({
+    'ticket_id': ['DEV-1', 'DEV-2', 'DEV-3', 'DEV-4', 'DEV-5'],
+    'title': ['Fix mobile app crash', 'Invoice export', 'Dark mode', 'Search filters', 'App invoice view'],
+    'priority': ['High', 'Medium', 'Low', 'Medium', 'Low'],
+    'story_points': [5, 3, 8, 2, 13],
+})
+
+
+def feedback(texts, sentiment):
+    index = pd.RangeIndex(len(texts))
+    return MATCHER.match(pd.Series(texts, index=index)), pd.Series(sentiment, index=index, dtype=float)
+
+
+def full_rescore(backlog, theme_stats):
+    return BacklogScorer(backlog, MATCHER).rank(theme_stats.weights()).reset_index(drop=True)
+
+
+def assert_matches(ranker, backlog, theme_stats):
+    expected = full_rescore(backlog, theme_stats)
+    actual = ranker.to_frame()
+    assert actual['ticket_id'].tolist() == expected['ticket_id'].tolist()
+    assert actual['composite_score'].to_numpy() == pytest.approx(expected['composite_score'].to_numpy())
+    assert actual['theme_score'].to_numpy() == pytest.approx(expected['theme_score'].to_numpy())
+    for rank, ticket_id in enumerate(expected['ticket_id'], start=1):
+        assert ranker.rank_of(ticket_id) == rank
+    assert ranker.top(2)['ticket_id'].tolist() == expected['ticket_id'].head(2).tolist()
+
+
+def test_updates_match_a_full_rescore():
+    stats = ThemeStatistics(MATCHER.themes).add(*feedback(['mobile app is slow', 'invoice ok'], [-0.5, 0.4]))
+    ranker = IncrementalRanker(BACKLOG, MATCHER, stats)
+    backlog = BACKLOG.copy()
+    assert_matches(ranker, backlog, stats)
+
+    # Theme counts change, and billing turns negative
+    ranker.add_feedback(*feedback(['invoice wrong', 'invoice late', 'search broken'], [-0.9, -0.8, -0.2]))
+    assert_matches(ranker, backlog, stats)
+
+    # Replacing an item keeps its backlog position; new items go last
+    changed = {'ticket_id': 'DEV-3', 'title': 'Dark mode search', 'priority': 'High', 'story_points': 1}
+    ranker.upsert_item(changed)
+    backlog.loc[backlog['ticket_id'] == 'DEV-3', list(changed)] = list(changed.values())
+    added = {'ticket_id': 'DEV-6', 'title': 'Mobile invoice search', 'priority': 'Medium', 'story_points': 21}
+    ranker.upsert_item(added)
+    backlog = pd.concat([backlog, pd.DataFrame([added])], ignore_index=True)
+    assert_matches(ranker, backlog, stats)
+
+    assert ranker.remove_item('DEV-1')
+    backlog = backlog[backlog['ticket_id'] != 'DEV-1']
+    ranker.add_feedback(*feedback(['love the app', 'app works', 'great app'], [0.9, 0.8, 0.7]))
+    assert_matches(ranker, backlog, stats)
+
+
+def test_duplicate_ticket_ids_keep_the_first_row():
+    backlog = pd.concat([BACKLOG, BACKLOG.iloc[[0]].assign(title='Search speed')], ignore_index=True)
+    stats = ThemeStatistics(MATCHER.themes).add(*feedback(['app crash', 'search slow'], [-0.5, -0.5]))
+    ranker = IncrementalRanker(backlog, MATCHER, stats)
+
+    assert len(ranker) == len(BACKLOG)
+    assert ranker.item('DEV-1')['relevant_themes'] == ['mobile']
+    assert 'DEV-1' not in ranker.items_for_themes(['search'])
+    ranker.remove_item('DEV-1')
+    assert 'DEV-1' not in ranker.items_for_themes(['mobile', 'search'])
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from src.partitions import read_range, write_partitions
+from src.preprocessing import DataPreprocessor
+from src.schema import CSAT_SCHEMA, apply_schema
+
+
+def csat_rows(dates):
+    return apply_schema(pd.DataFrame({
+        'response_id': [f"R{i}" for i in range(len(dates))],
+        'survey_date': dates,
+        'satisfaction_score': 3,
+        'feedback_text': 'ok',
+    }), CSAT_SCHEMA)
+
+
+def test_empty_range_keeps_schema_types(tmp_path):
+    path = tmp_path / 'csat.parquet'
+    write_partitions(csat_rows(['2024-01-05']), path, 'survey_date', 'month')
+
+    empty = read_range(path, 'survey_date', start='2025-01-01',
+                       columns=['survey_date', 'satisfaction_score'], schema=CSAT_SCHEMA)
+    assert empty.empty
+    assert list(empty.columns) == ['survey_date', 'satisfaction_score']
+    assert pd.api.types.is_datetime64_any_dtype(empty['survey_date'])
+    assert empty['satisfaction_score'].dtype == 'int8'
+
+
+def test_streamed_append_partitions_a_single_file_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    preprocessor = DataPreprocessor(output_format='parquet', streaming=True, partition_by='month')
+    path = preprocessor.output_dir / 'csat_processed.parquet'
+    csat_rows(['2024-01-05', '2024-02-10']).to_parquet(path, index=False)
+
+    preprocessor._append_table(csat_rows(['2024-02-20']), path, 'survey_date')
+
+    assert not list(path.glob('*.parquet'))
+    assert sorted(p.name for p in path.iterdir()) == ['month=2024-01', 'month=2024-02']
+    assert len(read_range(path, 'survey_date', start='2024-02-01')) == 2
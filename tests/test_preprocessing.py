@@ -0,0 +1,78 @@
+import pandas as pd
+
+from src.partitions import read_range
+from src.preprocessing import DataPreprocessor
+
+
+def write_raw(name, rows):
+    pd.DataFrame(rows, columns=['response_id', 'survey_date', 'satisfaction_score', 'feedback_text']).to_csv(
+        f"data/raw/{name}", index=False
+    )
+
+
+def read_output(path):
+    return read_range(path).sort_values('response_id').reset_index(drop=True)
+
+
+def run(**options):
+    preprocessor = DataPreprocessor(incremental=True, output_format='parquet', **options)
+    preprocessor.process_csat_data()
+    return preprocessor.output_dir / 'csat_processed.parquet'
+
+
+def test_new_files_rewrite_only_their_partitions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data/raw').mkdir(parents=True)
+    write_raw('csat_a.csv', [('R1', '2024-01-05', 4, 'fine'), ('R2', '2024-01-20', 2, 'slow')])
+    write_raw('csat_b.csv', [('R3', '2024-02-03', 5, 'great')])
+    path = run(partition_by='month')
+    january = path / 'month=2024-01' / 'part-00000.parquet'
+    january_stat = january.stat()
+
+    # One new February row and one row already in January
+    write_raw('csat_c.csv', [('R4', '2024-02-14', 3, 'ok'), ('R2', '2024-01-20', 2, 'slow')])
+    run(partition_by='month')
+
+    assert january.stat().st_mtime_ns == january_stat.st_mtime_ns
+    assert len(list((path / 'month=2024-02').glob('*.parquet'))) == 1
+    assert read_output(path)['response_id'].tolist() == ['R1', 'R2', 'R3', 'R4']
+
+    full = DataPreprocessor(output_format='parquet', partition_by='month')
+    full.output_dir = tmp_path / 'full'
+    full.output_dir.mkdir()
+    full.process_csat_data()
+    pd.testing.assert_frame_equal(read_output(path), read_output(full.output_dir / 'csat_processed.parquet'))
+
+
+def test_changed_file_rebuilds_without_its_old_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data/raw').mkdir(parents=True)
+    write_raw('csat_a.csv', [('R1', '2024-01-05', 4, 'fine')])
+    write_raw('csat_b.csv', [('R2', '2024-02-03', 5, 'great')])
+    path = run(partition_by='month')
+
+    write_raw('csat_b.csv', [('R3', '2024-03-01', 1, 'broken')])
+    run(partition_by='month')
+
+    assert read_output(path)['response_id'].tolist() == ['R1', 'R3']
+    assert not (path / 'month=2024-02').exists()
+
+
+def test_layout_change_rebuilds_the_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data/raw').mkdir(parents=True)
+    write_raw('csat_a.csv', [('R1', '2024-01-05', 4, 'fine'), ('R2', '2024-02-03', 5, 'great')])
+    assert run(partition_by='month').is_dir()
+
+    path = run()
+    assert path.is_file()
+    assert read_output(path)['response_id'].tolist() == ['R1', 'R2']
+
+
+def test_stream_dataset_uses_the_configured_chunksize(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data/raw').mkdir(parents=True)
+    write_raw('csat_a.csv', [(f"R{i}", '2024-01-05', 4, 'fine') for i in range(5)])
+
+    chunks = list(DataPreprocessor(chunksize=2).stream_dataset('csat'))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from src.relevance import RelevanceIndex
+
+FEEDBACK = pd.Series(['mobile app crash on login', 'the app crash again', 'invoice was wrong', 'love dark mode'])
+SENTIMENT = pd.Series([-0.9, -0.7, -0.5, 0.8])
+BACKLOG = pd.DataFrame({'ticket_id': ['DEV-1', 'DEV-2'], 'title': ['Fix app crash', 'Invoice export']})
+
+
+def test_saved_index_scores_like_the_built_one(tmp_path):
+    built = RelevanceIndex.build(FEEDBACK, SENTIMENT, min_df=1)
+    built.save(tmp_path)
+    loaded = RelevanceIndex.load(tmp_path)
+
+    assert not list(tmp_path.glob('*.pkl'))
+    assert loaded.fingerprint == built.fingerprint
+    pd.testing.assert_frame_equal(loaded.score(BACKLOG), built.score(BACKLOG))
+    assert loaded.score(BACKLOG)['matching_feedback'].tolist() == [2, 1]
+
+
+def test_load_or_build_rebuilds_when_feedback_changes(tmp_path):
+    RelevanceIndex.load_or_build(tmp_path, FEEDBACK, SENTIMENT)
+    index = RelevanceIndex.load_or_build(tmp_path, FEEDBACK.iloc[:2], SENTIMENT.iloc[:2])
+    assert len(index) == 2
+    assert RelevanceIndex.load(tmp_path).fingerprint == RelevanceIndex.fingerprint_of(FEEDBACK.iloc[:2])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from src.schema import apply_schema, compact_frame, csv_read_options, has_type, log_memory
+
+SCHEMA = {'when': 'datetime', 'kind': 'category', 'score': 'int8', 'text': 'string[pyarrow]'}
+
+
+def typed_frame():
+    return pd.DataFrame({
+        'when': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'kind': pd.Categorical(['a', 'b', 'a']),
+        'score': np.array([1, 2, 3], dtype='int8'),
+        'text': pd.array(['x', None, 'z'], dtype='string[pyarrow]'),
+    })
+
+
+def test_typed_columns_are_not_converted_again():
+    df = typed_frame()
+    result = apply_schema(df, SCHEMA)
+    for col in SCHEMA:
+        assert result[col].dtype == df[col].dtype
+    assert np.shares_memory(result['score'].to_numpy(), df['score'].to_numpy())
+    assert result['kind'].cat.categories.equals(df['kind'].cat.categories)
+
+
+def test_untyped_columns_are_converted():
+    df = pd.DataFrame({'when': ['2024-01-01'], 'kind': ['a'], 'score': [1.0], 'text': ['x']})
+    result = apply_schema(df, SCHEMA)
+    assert all(has_type(result[col], dtype) for col, dtype in SCHEMA.items())
+    assert df['kind'].dtype != result['kind'].dtype  # input left as it was
+
+
+def test_nullable_integers_count_as_typed_only_with_missing_values():
+    assert has_type(pd.Series([1, None], dtype='Int8'), 'int8')
+    assert not has_type(pd.Series([1, 2], dtype='int64'), 'int8')
+
+    narrowed = apply_schema(pd.DataFrame({'score': pd.array([1, 2], dtype='Int8')}), SCHEMA)
+    assert narrowed['score'].dtype == np.int8
+
+
+def test_compact_frame_only_shrinks_columns_outside_the_schema():
+    df = typed_frame().assign(extra=np.array([1, 2, 3], dtype='int64'), label=['p', 'p', 'p'])
+    result = compact_frame(df, SCHEMA)
+    assert result['extra'].dtype == np.int8
+    assert isinstance(result['label'].dtype, pd.CategoricalDtype)
+    assert df['extra'].dtype == np.int64
+
+
+def test_log_memory_measures_the_frame_before_compaction():
+    df = pd.DataFrame({'extra': np.arange(1000, dtype='int64') % 100})
+    before, after = log_memory('frame', compact_frame(df, {}), df)
+    assert before == df.memory_usage(deep=True).sum()
+    assert after < before
+
+
+def test_csv_read_options_skip_columns_missing_from_the_header():
+    options = csv_read_options(SCHEMA, header=['kind', 'score'])
+    assert options['parse_dates'] == []
+    assert set(options['dtype']) == {'kind', 'score'}
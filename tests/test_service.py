@@ -0,0 +1,194 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from src.impact_analysis import ImpactAnalyzer
+from src.service import ImpactService
+from src.theme_matcher import ThemeMatcher
+from src.theme_stats import ThemeStatistics
+
+FEEDBACK = pd.Series([
+    'mobile app crash on login',
+    'the app crash again',
+    'invoice was wrong',
+    'love the mobile app',
+])
+
+BACKLOG = pd.DataFrame({
+    'ticket_id': ['DEV-1', 'DEV-2', 'DEV-3'],
+    'title': ['Fix mobile app crash', 'Invoice export', 'Dark mode'],
+    'priority': ['High', 'Medium', 'Low'],
+    'story_points': [5, 3, 8],
+})
+
+
+class FakeTextAnalyzer:
+    """Keyword themes and a rule-based 'model', enough to drive the service"""
+
+    def __init__(self):
+        self.theme_matcher = ThemeMatcher({'mobile': ['mobile', 'app'], 'billing': ['invoice']})
+
+    def score_texts(self, texts):
+        return [
+            {'label': 'NEGATIVE', 'score': 0.9, 'sentiment_score': -0.9} if 'crash' in text
+            else {'label': 'POSITIVE', 'score': 0.8, 'sentiment_score': 0.8}
+            for text in texts
+        ]
+
+    def analyze_all(self, csat_df, tickets_df):
+        text = tickets_df['description']
+        sentiment = pd.Series([result['sentiment_score'] for result in self.score_texts(text)], index=text.index)
+        stats = ThemeStatistics(self.theme_matcher.themes).add(self.theme_matcher.match(text), sentiment)
+        return {'theme_stats': stats}
+
+
+class FakeIngestion:
+    def load_all_data(self):
+        return pd.DataFrame(), pd.DataFrame({'description': FEEDBACK}), BACKLOG
+
+
+@pytest.fixture
+def service():
+    text_analyzer = FakeTextAnalyzer()
+    service = ImpactService(
+        text_analyzer=text_analyzer,
+        impact_analyzer=ImpactAnalyzer(data_ingestion=FakeIngestion(), text_analyzer=text_analyzer),
+        max_wait_ms=1,
+        max_body_bytes=1000,
+    )
+    service.load()
+    yield service
+    service.scorer.close()
+    service.executor.shutdown()
+
+
+async def _exchange(port, raw: bytes):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    writer.close()
+    return status, json.loads(body)
+
+
+def _request(method, path, body=None, headers=None):
+    data = b'' if body is None else json.dumps(body).encode('utf-8')
+    head = {'Content-Length': str(len(data)), 'Connection': 'close', **(headers or {})}
+    lines = ''.join(f"{name}: {value}\r\n" for name, value in head.items())
+    return f"{method} {path} HTTP/1.1\r\n{lines}\r\n".encode('latin-1') + data
+
+
+def call(service, *requests):
+    """Send raw requests to a server on a free port; returns [(status, payload), ...]"""
+    async def scenario():
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await _exchange(port, raw) for raw in requests]
+    return asyncio.run(scenario())
+
+
+def test_health_and_ranking(service):
+    (status, health), (_, ranking) = call(service, _request('GET', '/health'), _request('GET', '/ranking?top=2'))
+    assert status == 200 and health['items'] == 3
+    assert [item['rank'] for item in ranking['items']] == [1, 2]
+    assert ranking['items'][0]['ticket_id'] == 'DEV-1'
+
+
+@pytest.mark.parametrize('top', ['0', '-1', 'abc'])
+def test_ranking_rejects_bad_top(service, top):
+    [(status, payload)] = call(service, _request('GET', f'/ranking?top={top}'))
+    assert status == 400 and 'top' in payload['error']
+
+
+def test_ranking_by_theme(service):
+    [(_, ranking)] = call(service, _request('GET', '/ranking?theme=billing'))
+    assert [item['ticket_id'] for item in ranking['items']] == ['DEV-2']
+
+
+def test_item_lookup(service):
+    (status, item), (missing, _) = call(service, _request('GET', '/items/DEV-2'), _request('GET', '/items/NOPE'))
+    assert status == 200 and item['ticket_id'] == 'DEV-2' and item['total_items'] == 3
+    assert missing == 404
+
+
+def test_score(service):
+    [(status, payload)] = call(service, _request('POST', '/score', {'texts': ['app crash', 'great invoice']}))
+    assert status == 200
+    assert [result['label'] for result in payload['results']] == ['NEGATIVE', 'POSITIVE']
+    assert payload['results'][0]['themes'] == ['mobile']
+
+
+def test_feedback_updates_ranking(service):
+    before = service.state.ranker.item('DEV-2')['theme_score']
+    [(status, payload)] = call(service, _request('POST', '/feedback', {'texts': ['invoice crash'] * 5}))
+    assert status == 200 and payload['items_rescored'] >= 1
+    assert service.state.ranker.item('DEV-2')['theme_score'] > before
+
+
+def test_put_and_delete_item(service):
+    put, get, delete = call(
+        service,
+        _request('PUT', '/items/DEV-9', {'title': 'Mobile app polish', 'priority': 'High', 'story_points': 13}),
+        _request('GET', '/items/DEV-9'),
+        _request('DELETE', '/items/DEV-9'),
+    )
+    assert put[0] == 200 and put[1]['rank'] >= 1
+    assert get[1]['relevant_themes'] == ['mobile']
+    assert delete == (200, {'ticket_id': 'DEV-9', 'removed': True})
+    assert service.state.ranker.item('DEV-9') is None
+
+
+@pytest.mark.parametrize('body', [
+    {'title': 'x', 'story_points': 'abc'},
+    {'title': 'x', 'story_points': -1},
+    {'title': 'x', 'story_points': True},
+    {'title': 'x', 'priority': 3},
+    {'priority': 'High'},
+])
+def test_put_item_rejects_bad_fields(service, body):
+    [(status, _)] = call(service, _request('PUT', '/items/DEV-9', body))
+    assert status == 400
+    assert service.state.ranker.item('DEV-9') is None
+
+
+def test_bad_content_length(service):
+    negative = _request('POST', '/score', headers={'Content-Length': '-5'})
+    huge = _request('POST', '/score', headers={'Content-Length': '999999999'})
+    [(status_negative, _)] = call(service, negative)
+    [(status_huge, _)] = call(service, huge)
+    assert status_negative == 400
+    assert status_huge == 413
+
+
+def test_header_line_too_long(service):
+    raw = b'GET /health HTTP/1.1\r\nX-Padding: ' + b'a' * 100_000 + b'\r\nConnection: close\r\n\r\n'
+    [(status, payload)] = call(service, raw)
+    assert status == 413 and 'too long' in payload['error']
+
+
+def test_deeply_nested_json(service):
+    body = b'[' * 999
+    raw = b'POST /score HTTP/1.1\r\nContent-Length: 999\r\nConnection: close\r\n\r\n' + body
+    [(status, _)] = call(service, raw)
+    assert status == 400
+
+
+def test_invalid_json_and_unknown_route(service):
+    bad_json = b'POST /score HTTP/1.1\r\nContent-Length: 3\r\nConnection: close\r\n\r\n{x}'
+    (status, _), (missing, _) = call(service, bad_json, _request('GET', '/nothing'))
+    assert status == 400 and missing == 404
+
+
+def test_reload(service):
+    call(service, _request('DELETE', '/items/DEV-1'))
+    [(status, payload)] = call(service, _request('POST', '/reload'))
+    assert status == 200 and payload['items'] == 3
+    assert service.state.ranker.item('DEV-1') is not None
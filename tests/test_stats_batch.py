@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.stats_batch import benjamini_hochberg, mann_whitney_u, nan_moments, pad_windows, welch_t_test
+
+
+def windows(rng, rows=40):
+    """Integer scores (so with many ties) in windows of varying length, NaN-padded"""
+    values = rng.integers(1, 6, size=rows * 30).astype(float)
+    lo = np.arange(rows) * 30
+    hi = lo + rng.integers(5, 30, size=rows)
+    return pad_windows(values, lo, hi)
+
+
+def rows_of(samples):
+    return [row[~np.isnan(row)] for row in samples]
+
+
+def test_welch_t_test_matches_scipy():
+    rng = np.random.default_rng(0)
+    before, after = windows(rng), windows(rng)
+    t_stat, p_value = welch_t_test(*nan_moments(before), *nan_moments(after))
+    for i, (a, b) in enumerate(zip(rows_of(before), rows_of(after))):
+        expected = stats.ttest_ind(b, a, equal_var=False)
+        assert t_stat[i] == pytest.approx(expected.statistic)
+        assert p_value[i] == pytest.approx(expected.pvalue)
+
+
+def test_mann_whitney_u_matches_scipy_with_ties():
+    rng = np.random.default_rng(1)
+    before, after = windows(rng), windows(rng)
+    u_stat, p_value = mann_whitney_u(before, after)
+    for i, (a, b) in enumerate(zip(rows_of(before), rows_of(after))):
+        expected = stats.mannwhitneyu(a, b, alternative='two-sided', method='asymptotic', use_continuity=True)
+        assert u_stat[i] == pytest.approx(expected.statistic)
+        assert p_value[i] == pytest.approx(expected.pvalue)
+
+
+def test_benjamini_hochberg_matches_scipy_and_skips_nan():
+    rng = np.random.default_rng(2)
+    p_values = rng.uniform(size=(6, 5)) ** 3
+    p_values[1, 2] = np.nan
+    q_values = benjamini_hochberg(p_values)
+    tested = ~np.isnan(p_values)
+    assert np.isnan(q_values[1, 2])
+    assert q_values[tested] == pytest.approx(stats.false_discovery_control(p_values[tested]))
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.streaming import StreamingScorer
+
+
+def _upper(texts):
+    return [text.upper() for text in texts]
+
+
+def test_scores_in_order():
+    with StreamingScorer(_upper, max_batch_size=4, max_wait_ms=1) as scorer:
+        assert scorer.score(['a', 'b', 'c', 'd', 'e']) == ['A', 'B', 'C', 'D', 'E']
+
+
+def test_cancelled_future_is_skipped_and_scorer_keeps_running():
+    release = threading.Event()
+    scored = []
+
+    def blocking(texts):
+        release.wait(5)
+        scored.extend(texts)
+        return _upper(texts)
+
+    with StreamingScorer(blocking, max_batch_size=1, max_wait_ms=1) as scorer:
+        first = scorer.submit('first')        # taken by the thread, blocks in score
+        waiting = scorer.submit('cancel me')  # still queued
+        assert waiting.cancel()
+        release.set()
+
+        assert first.result(5) == 'FIRST'
+        assert scorer.submit('after').result(5) == 'AFTER'
+        assert scorer._thread.is_alive()
+    assert 'cancel me' not in scored
+
+
+def test_async_timeout_does_not_kill_the_thread():
+    release = threading.Event()
+
+    def slow(texts):
+        release.wait(5)
+        return _upper(texts)
+
+    async def scenario(scorer):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scorer.score_async(['slow', 'queued']), timeout=0.05)
+        release.set()
+        return await asyncio.wait_for(scorer.score_async(['next']), timeout=5)
+
+    with StreamingScorer(slow, max_batch_size=1, max_wait_ms=1) as scorer:
+        assert asyncio.run(scenario(scorer)) == ['NEXT']
+        assert scorer._thread.is_alive()
+
+
+def test_submit_after_close_raises():
+    scorer = StreamingScorer(_upper)
+    scorer.close()
+    with pytest.raises(RuntimeError):
+        scorer.submit('late')
@@ -0,0 +1,25 @@
+import numpy as np
+
+from src.theme_discovery import ClusterIndex, suggested_clusters
+
+
+def test_suggested_clusters_scales_with_corpus():
+    assert suggested_clusters(1) == 1
+    assert suggested_clusters(85) == 7
+    assert suggested_clusters(20_000) == 100
+    assert suggested_clusters(10_000_000) == 200
+
+
+def test_cluster_index_probing_every_cluster_is_exact():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    assignments = rng.integers(0, 10, len(vectors))
+    centroids = np.stack([vectors[assignments == c].mean(axis=0) for c in range(10)])
+    index = ClusterIndex(vectors, centroids, assignments)
+
+    queries = vectors[:5]
+    similarities, positions = index.search(queries, n_neighbors=3, n_probe=10)
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :3]
+    np.testing.assert_array_equal(positions, expected)
+    np.testing.assert_allclose(similarities[:, 0], 1.0)
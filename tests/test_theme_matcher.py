@@ -0,0 +1,21 @@
+import pandas as pd
+
+from src.theme_matcher import ThemeMatcher
+
+MATCHER = ThemeMatcher({'search': ['search', 'Lookup'], 'kiosk': ['kiosk'], 'mobile': ['app']})
+
+
+def test_matches_whole_words_and_plurals():
+    memberships = MATCHER.match(pd.Series(['Search is slow', 'new apps', 'approach', None], index=[5, 6, 7, 8]))
+    assert list(memberships.index) == [5, 6, 7, 8]
+    assert memberships['search'].tolist() == [True, False, False, False]
+    assert memberships['mobile'].tolist() == [False, True, False, False]
+
+
+def test_case_folded_characters_match_without_errors():
+    # re.IGNORECASE matches 'ſ' (long s) to 's' and the Kelvin sign to 'k'; str.lower leaves both alone
+    texts = ['ſearch results', 'Kiosk offline', 'LOOKUP failed', 'nothing here']
+    memberships = MATCHER.match(texts)
+    assert memberships['search'].tolist() == [True, False, True, False]
+    assert memberships['kiosk'].tolist() == [False, True, False, False]
+    assert MATCHER.themes_in('Kiosk and ſearch') == ['search', 'kiosk']